@@ -0,0 +1,61 @@
+"""Benchmark hcfg and set_cfg on deep configs with many leaves.
+
+Run from the root of the repository with::
+
+    python -m benchmarks.bench_hcfg
+"""
+
+import random
+import tempfile
+import timeit
+from typing import Any, Dict, List
+
+from hesiod import hcfg, hmain, set_cfg
+from hesiod.cfg.cfgstore import ConfigStore
+
+DEPTH = 7
+BRANCHING = 4
+NUM_LOOKUPS = 100_000
+
+
+def make_cfg(depth: int, branching: int) -> Dict[str, Any]:
+    if depth == 0:
+        return {f"leaf{i}": float(i) for i in range(branching)}
+    return {f"node{i}": make_cfg(depth - 1, branching) for i in range(branching)}
+
+
+def nested_get(cfg: Dict[str, Any], name: str) -> Any:
+    value = cfg
+    for n in name.split("."):
+        value = value[n]
+    return value
+
+
+def main() -> None:
+    cfg = make_cfg(DEPTH, BRANCHING)
+    store = ConfigStore(cfg)
+    leaves = [k for k, v in store.index.items() if not isinstance(v, dict)]
+    keys: List[str] = random.Random(0).choices(leaves, k=NUM_LOOKUPS)
+    print(f"config: depth={DEPTH + 1}, leaves={len(leaves)}, lookups={NUM_LOOKUPS}")
+
+    with tempfile.TemporaryDirectory() as base_cfg_dir:
+
+        @hmain(base_cfg_dir, create_out_dir=False, parse_cmd_line=False)
+        def run() -> None:
+            set_cfg("root", cfg)
+
+            results = {
+                "nested walk": lambda: [nested_get(cfg, k) for k in keys],
+                "index lookup": lambda: [store.get(k) for k in keys],
+                "hcfg": lambda: [hcfg(f"root.{k}") for k in keys],
+                "set_cfg": lambda: [set_cfg(f"root.{k}", 0.0) for k in keys[:10_000]],
+            }
+            for name, fn in results.items():
+                seconds = min(timeit.repeat(fn, number=1, repeat=3))
+                print(f"{name:>15}: {seconds * 1e3:8.2f} ms")
+
+        run()
+
+
+if __name__ == "__main__":
+    main()
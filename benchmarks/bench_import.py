@@ -0,0 +1,64 @@
+"""Benchmark the time needed to import hesiod and check which heavy modules it imports.
+
+Each import is measured in a fresh interpreter. Run from the root of the repository with::
+
+    python -m benchmarks.bench_import [max_ms]
+
+If ``max_ms`` is given, the benchmark fails when the best import time exceeds it or when
+a module that should be imported lazily is imported by ``import hesiod``.
+"""
+
+import subprocess
+import sys
+from typing import List
+
+NUM_REPEATS = 10
+LAZY_MODULES = [
+    "asciimatics",
+    "typeguard",
+    "pkg_resources",
+    "asyncio",
+    "sqlite3",
+    "ctypes",
+    "concurrent.futures.process",
+    "dataclasses",
+]
+
+SCRIPT = """
+import sys
+import time
+
+start = time.perf_counter()
+import hesiod
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(",".join(m for m in {modules} if m in sys.modules))
+"""
+
+
+def measure() -> List[str]:
+    script = SCRIPT.format(modules=LAZY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout
+    return output.splitlines()
+
+
+def main() -> None:
+    max_ms = float(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    runs = [measure() for _ in range(NUM_REPEATS)]
+    times = sorted(float(run[0]) * 1e3 for run in runs)
+    imported = sorted({m for run in runs[1:] for m in run[1].split(",") if m})
+    print(f"import hesiod: best {times[0]:.2f} ms, median {times[len(times) // 2]:.2f} ms")
+    print(f"lazy modules imported: {', '.join(imported) or 'none'}")
+
+    if max_ms is not None and (times[0] > max_ms or imported):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Benchmark loading and accessing configs on a synthetic config tree.
+
+Run from the root of the repository with::
+
+    python -m benchmarks.bench_suite [--files N] [--nesting-depth N] [--inheritance-depth N]
+        [--leaves N] [--repeat N] [--output results.json] [--compare baseline.json]
+
+Results are printed and optionally saved as JSON, together with the shape of the configs
+and the commit they were measured on. Passing the JSON file of a previous run with
+``--compare`` prints the ratio between the new and the old timings of each benchmark.
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import hesiod.core as hcore
+from benchmarks.synthetic import SyntheticSpec, generate, get_leaves
+from hesiod import hcfg, hmain, set_cfg
+from hesiod.cfg.cfgdirindex import ConfigDirIndex
+from hesiod.cfg.cfghandler import ConfigHandler
+from hesiod.cfg.cfgstore import ConfigStore
+from hesiod.cfg.layers import merge_layers
+from hesiod.cfg.layers import parse_args as parse_cfg_args
+from hesiod.cfg.layers import unflatten
+
+NUM_LOOKUPS = 10_000
+NUM_ARGS = 100
+TYPED_LEAF_TYPES = (bool, int, float, str)
+
+RESULTS_T = Dict[str, Dict[str, float]]
+
+
+def time_fn(
+    fn: Callable[[], Any], repeat: int, setup: Callable[[], Any] = lambda: None
+) -> Dict[str, float]:
+    """Time a function, running it once per repetition.
+
+    Args:
+        fn: The function to time.
+        repeat: The number of repetitions.
+        setup: A function called before each repetition, not timed (optional).
+
+    Returns:
+        The best and the median time, in seconds.
+    """
+    times = timeit.repeat(fn, setup=setup, number=1, repeat=repeat)
+    return {"best": min(times), "median": statistics.median(times)}
+
+
+def bench_loading(base_cfg_dir: Path, run_file: Path, repeat: int) -> RESULTS_T:
+    """Time loading, resolving and saving configs.
+
+    Lazy loading is timed up to getting a single value.
+
+    The directory index is cleared before each repetition, so that directories are
+    listed again as in a new process.
+
+    Args:
+        base_cfg_dir: The base config directory.
+        run_file: The run file.
+        repeat: The number of repetitions.
+
+    Returns:
+        The timings, indexed by benchmark name.
+    """
+    clear = ConfigDirIndex.clear_cache
+    base_cfgs = ConfigHandler.load_base_cfgs(base_cfg_dir)
+    run_cfg = ConfigHandler.load_cfg_file(run_file)
+    cfg = ConfigHandler.replace_bases(run_cfg, base_cfgs)
+    first_leaf = get_leaves(cfg)[0][0]
+
+    def load_lazy_and_get(key: str) -> Any:
+        cfg, lazy = ConfigHandler.load_cfg_lazy(run_file, base_cfg_dir)
+        return ConfigStore(cfg, lazy=lazy).get(key)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        out_file = Path(out_dir) / "run.yaml"
+        return {
+            "load_base_cfgs": time_fn(
+                lambda: ConfigHandler.load_base_cfgs(base_cfg_dir), repeat, clear
+            ),
+            "replace_bases": time_fn(
+                lambda: ConfigHandler.replace_bases(run_cfg, base_cfgs), repeat
+            ),
+            "load_cfg": time_fn(
+                lambda: ConfigHandler.load_cfg(run_file, base_cfg_dir), repeat, clear
+            ),
+            "load_cfg_lazy": time_fn(lambda: load_lazy_and_get(first_leaf), repeat, clear),
+            "save_cfg": time_fn(lambda: ConfigHandler.save_cfg(cfg, out_file), repeat),
+        }
+
+
+def bench_access(base_cfg_dir: Path, run_file: Path, repeat: int) -> RESULTS_T:
+    """Time getting and setting values in the config of a run.
+
+    Args:
+        base_cfg_dir: The base config directory.
+        run_file: The run file.
+        repeat: The number of repetitions.
+
+    Returns:
+        The timings, indexed by benchmark name.
+    """
+    results: RESULTS_T = {}
+
+    @hmain(base_cfg_dir, run_cfg_file=run_file, create_out_dir=False, parse_cmd_line=False)
+    def run() -> None:
+        rng = random.Random(0)
+        cfg = hcore.get_cfg_copy()
+        leaves = get_leaves(cfg)
+        keys = rng.choices([k for k, _ in leaves], k=NUM_LOOKUPS)
+        typed = rng.choices(
+            [(k, type(v)) for k, v in leaves if type(v) in TYPED_LEAF_TYPES], k=NUM_LOOKUPS
+        )
+        args = [f"--{k}={v!r}" for k, v in rng.choices(leaves, k=NUM_ARGS)]
+
+        def set_values() -> None:
+            for k in keys[:1000]:
+                set_cfg(k, 0)
+
+        results["hcfg"] = time_fn(lambda: [hcfg(k) for k in keys], repeat)
+        results["hcfg_typed"] = time_fn(lambda: [hcfg(k, t) for k, t in typed], repeat)
+        results["set_cfg"] = time_fn(set_values, repeat)
+        results["parse_args"] = time_fn(
+            lambda: merge_layers([cfg, unflatten(parse_cfg_args(args))]), repeat
+        )
+
+    run()
+    return results
+
+
+def get_commit() -> Optional[str]:
+    """Get the current git commit, if any.
+
+    Returns:
+        The hash of the commit or None if it is not available.
+    """
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.strip()
+
+
+def compare(results: RESULTS_T, baseline_file: Path) -> None:
+    """Print the ratio between the given timings and the ones in a previous results file.
+
+    Args:
+        results: The new timings.
+        baseline_file: The JSON file with the old timings.
+    """
+    baseline = json.loads(baseline_file.read_text())
+    print(f"\ncompared with {baseline.get('commit') or baseline_file}:")
+    for name, timing in results.items():
+        old = baseline["results"].get(name)
+        if old is not None:
+            print(f"{name:>16}: {timing['best'] / old['best']:6.2f}x")
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    defaults = SyntheticSpec()
+    parser = argparse.ArgumentParser(description="Run the hesiod benchmark suite.")
+    parser.add_argument("--files", type=int, default=defaults.num_files)
+    parser.add_argument("--nesting-depth", type=int, default=defaults.nesting_depth)
+    parser.add_argument("--inheritance-depth", type=int, default=defaults.inheritance_depth)
+    parser.add_argument("--leaves", type=int, default=defaults.num_leaves)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="the JSON file where results are saved")
+    parser.add_argument("--compare", type=Path, help="a JSON file with previous results")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    spec = SyntheticSpec(
+        args.files, args.nesting_depth, args.inheritance_depth, args.leaves, args.seed
+    )
+    print(", ".join(f"{k}={v}" for k, v in spec._asdict().items()))
+
+    with tempfile.TemporaryDirectory() as root:
+        base_cfg_dir, run_file = generate(Path(root), spec)
+        results = bench_loading(base_cfg_dir, run_file, args.repeat)
+        results.update(bench_access(base_cfg_dir, run_file, args.repeat))
+
+    for name, timing in results.items():
+        print(
+            f"{name:>16}: {timing['best'] * 1e3:9.2f} ms (median {timing['median'] * 1e3:.2f} ms)"
+        )
+
+    if args.output is not None:
+        report = {
+            "spec": spec._asdict(),
+            "commit": get_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.compare is not None:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
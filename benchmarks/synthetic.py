@@ -0,0 +1,136 @@
+"""Generate synthetic base config trees and run files for benchmarks."""
+
+import math
+import random
+from pathlib import Path
+from typing import Any, List, NamedTuple, Tuple
+
+from hesiod.cfg.cfghandler import BASE_KEY, RUN_NAME_KEY, ConfigHandler
+from hesiod.cfg.cfgparser import CFG_T
+
+
+class SyntheticSpec(NamedTuple):
+    """The shape of a synthetic config tree.
+
+    Attributes:
+        num_files: The number of base config files.
+        nesting_depth: The number of nested levels of dictionaries in each file.
+        inheritance_depth: The length of the chains of bases, i.e. the number of files
+            that each base inherits from, including itself.
+        num_leaves: The number of leaves in each file.
+        seed: The seed used to generate the values.
+    """
+
+    num_files: int = 100
+    nesting_depth: int = 4
+    inheritance_depth: int = 3
+    num_leaves: int = 50
+    seed: int = 0
+
+    @property
+    def num_chains(self) -> int:
+        """The number of chains of bases."""
+        return math.ceil(self.num_files / self.inheritance_depth)
+
+
+def make_value(rng: random.Random) -> Any:
+    """Generate a random leaf value.
+
+    Args:
+        rng: The random number generator.
+
+    Returns:
+        An int, a float, a bool, a string or a list of ints.
+    """
+    kind = rng.randrange(5)
+    if kind == 0:
+        return rng.randrange(1000)
+    elif kind == 1:
+        return rng.random()
+    elif kind == 2:
+        return rng.random() < 0.5
+    elif kind == 3:
+        return f"value{rng.randrange(1000)}"
+    return [rng.randrange(10) for _ in range(rng.randrange(1, 5))]
+
+
+def make_cfg(nesting_depth: int, num_leaves: int, rng: random.Random) -> CFG_T:
+    """Generate a nested config with leaves spread evenly across its levels.
+
+    Args:
+        nesting_depth: The number of nested levels of dictionaries.
+        num_leaves: The number of leaves.
+        rng: The random number generator.
+
+    Returns:
+        The config.
+    """
+    num_levels = nesting_depth + 1
+    leaves_per_level = math.ceil(num_leaves / num_levels)
+    cfg: CFG_T = {}
+    node = cfg
+    for level in range(num_levels):
+        for i in range(min(leaves_per_level, num_leaves)):
+            node[f"leaf{i}"] = make_value(rng)
+        num_leaves -= leaves_per_level
+        if level < nesting_depth:
+            node[f"level{level + 1}"] = {}
+            node = node[f"level{level + 1}"]
+    return cfg
+
+
+def get_leaves(cfg: CFG_T, prefix: str = "") -> List[Tuple[str, Any]]:
+    """Get the dotted keys and the values of the leaves of a config.
+
+    Args:
+        cfg: The config.
+        prefix: The dotted key of the given config ("" for the root).
+
+    Returns:
+        The leaves.
+    """
+    leaves = []
+    for k, v in cfg.items():
+        key = f"{prefix}.{k}" if prefix else k
+        if isinstance(v, dict):
+            leaves.extend(get_leaves(v, key))
+        else:
+            leaves.append((key, v))
+    return leaves
+
+
+def generate(root: Path, spec: SyntheticSpec) -> Tuple[Path, Path]:
+    """Write a synthetic base config directory and a run file that uses all of it.
+
+    Base files are organized in chains: ``chain{c}/base{l}.yaml`` inherits from
+    ``chain{c}/base{l + 1}.yaml``, up to ``inheritance_depth`` files. The run file has
+    one section for each chain, that inherits from the first file of the chain and
+    overrides some of its values.
+
+    Args:
+        root: The directory where the configs are written.
+        spec: The shape of the configs.
+
+    Returns:
+        The base config directory and the run file.
+    """
+    rng = random.Random(spec.seed)
+    base_cfg_dir = root / "bases"
+    for index in range(spec.num_files):
+        chain, level = divmod(index, spec.inheritance_depth)
+        cfg = make_cfg(spec.nesting_depth, spec.num_leaves, rng)
+        if level < spec.inheritance_depth - 1 and index + 1 < spec.num_files:
+            cfg[BASE_KEY] = f"chain{chain}.base{level + 1}"
+        chain_dir = base_cfg_dir / f"chain{chain}"
+        chain_dir.mkdir(parents=True, exist_ok=True)
+        ConfigHandler.save_cfg(cfg, chain_dir / f"base{level}.yaml")
+
+    run_cfg: CFG_T = {RUN_NAME_KEY: "synthetic"}
+    for chain in range(spec.num_chains):
+        section = make_cfg(spec.nesting_depth, spec.num_leaves // 10, rng)
+        section[BASE_KEY] = f"chain{chain}.base0"
+        run_cfg[f"section{chain}"] = section
+    run_file = root / "run.yaml"
+    ConfigHandler.save_cfg(run_cfg, run_file)
+
+    return base_cfg_dir, run_file
@@ -1,11 +1,44 @@
-import pkg_resources
-from pkg_resources import DistributionNotFound
+from hesiod.cfg.bundle import compile_bundle
+from hesiod.cfg.interpolation import register_resolver
+from hesiod.cfg.sweep import load_sweep
+from hesiod.core import (
+    get_cfg_copy,
+    get_out_dir,
+    get_run_name,
+    get_typed_cfg,
+    hcfg,
+    hmain,
+    set_cfg,
+)
+from hesiod.launcher import RunResult, launch
+from hesiod.registry import RunRegistry
+from hesiod.stats import RunStats
 
-from hesiod.core import get_cfg_copy, get_out_dir, get_run_name, hcfg, hmain, set_cfg
+__all__ = [
+    "__version__",
+    "hmain",
+    "hcfg",
+    "get_cfg_copy",
+    "get_out_dir",
+    "get_run_name",
+    "set_cfg",
+    "get_typed_cfg",
+    "register_resolver",
+    "compile_bundle",
+    "RunRegistry",
+    "load_sweep",
+    "launch",
+    "RunResult",
+    "RunStats",
+]
 
-__all__ = ["__version__", "hmain", "hcfg", "get_cfg_copy", "get_out_dir", "get_run_name", "set_cfg"]
 
 try:
-    __version__ = pkg_resources.get_distribution("hesiod").version
-except DistributionNotFound:
+    from importlib import metadata as _metadata
+except ImportError:  # python < 3.8
+    import importlib_metadata as _metadata  # type: ignore
+
+try:
+    __version__ = _metadata.version("hesiod")
+except _metadata.PackageNotFoundError:
     pass
@@ -0,0 +1,3 @@
+from hesiod.cli import main
+
+main()
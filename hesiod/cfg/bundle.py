@@ -0,0 +1,166 @@
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Sequence, Tuple, Union
+
+from hesiod.cfg.cfghandler import ConfigHandler
+from hesiod.cfg.cfgparser import CFG_T
+from hesiod.cfg.cfgstore import ConfigStore
+from hesiod.cfg.readonly import ReadOnlyDict
+
+BUNDLE_EXT = ".hbundle"
+BUNDLE_MAGIC = b"HESIODB1"
+
+STORE_DATA_T = Tuple[ReadOnlyDict, Dict[str, Any]]
+
+
+class ConfigBundle:
+    def __init__(
+        self,
+        base_cfg_dir: str,
+        base_cfgs: CFG_T,
+        cfgs: Dict[str, STORE_DATA_T],
+    ) -> None:
+        """Create a bundle of configs.
+
+        A bundle contains all the base configs loaded from a base directory and a
+        set of run (or template) configs, already resolved and indexed. Bundles are
+        saved in a single binary file, that ``hmain`` can load in place of the base
+        directory without globbing directories or parsing YAML files.
+
+        Args:
+            base_cfg_dir: The path to the base configs directory used to build the bundle.
+            base_cfgs: The base configs.
+            cfgs: The resolved configs with their index of dotted keys, indexed
+                by the path of the file they were loaded from.
+        """
+        self.base_cfg_dir = base_cfg_dir
+        self.base_cfgs = base_cfgs
+        self.cfgs = cfgs
+
+    @staticmethod
+    def get_key(cfg_file: Path) -> str:
+        """Get the key used to index a config file in the bundle.
+
+        Files are indexed only by their resolved absolute path, so that the same
+        relative path used from different working directories never matches
+        another file.
+
+        Args:
+            cfg_file: The path to the config file.
+
+        Returns:
+            The resolved absolute path of the file.
+        """
+        return cfg_file.resolve().as_posix()
+
+    @staticmethod
+    def compile(
+        base_cfg_dir: Path,
+        cfg_files: Sequence[Path],
+        num_workers: int = 1,
+    ) -> "ConfigBundle":
+        """Compile a bundle from a base directory and a list of run or template files.
+
+        Args:
+            base_cfg_dir: The path to the base configs directory.
+            cfg_files: The paths to the run or template files.
+            num_workers: The number of workers used to parse base config files (default: 1).
+
+        Returns:
+            The compiled bundle.
+        """
+        base_cfgs = ConfigHandler.load_base_cfgs(base_cfg_dir, num_workers)
+
+        cfgs: Dict[str, STORE_DATA_T] = {}
+        for cfg_file in cfg_files:
+            cfg = ConfigHandler.load_cfg_file(cfg_file)
+            store = ConfigStore(ConfigHandler.replace_bases(cfg, base_cfgs))
+            cfgs[ConfigBundle.get_key(cfg_file)] = (store.cfg, store.index)
+
+        return ConfigBundle(base_cfg_dir.absolute().as_posix(), base_cfgs, cfgs)
+
+    def save(self, bundle_file: Path) -> None:
+        """Save the bundle into the given file.
+
+        The file is written to a temporary file and then atomically renamed.
+
+        Args:
+            bundle_file: The path to the output file.
+        """
+        data = (self.base_cfg_dir, self.base_cfgs, self.cfgs)
+        bundle_dir = bundle_file.absolute().parent
+        fd, tmp_path = tempfile.mkstemp(dir=bundle_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(BUNDLE_MAGIC)
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, bundle_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @staticmethod
+    def load(bundle_file: Path) -> "ConfigBundle":
+        """Load a bundle from the given file.
+
+        Args:
+            bundle_file: The path to the bundle file.
+
+        Raises:
+            ValueError: If the given file is not a bundle.
+
+        Returns:
+            The loaded bundle.
+        """
+        with open(bundle_file, "rb") as f:
+            if f.read(len(BUNDLE_MAGIC)) != BUNDLE_MAGIC:
+                raise ValueError(f"{bundle_file} is not a valid config bundle.")
+            base_cfg_dir, base_cfgs, cfgs = pickle.load(f)
+
+        return ConfigBundle(base_cfg_dir, base_cfgs, cfgs)
+
+    def get_store(self, cfg_file: Path) -> ConfigStore:
+        """Get the resolved config for the given file.
+
+        If the file was compiled in the bundle, the config and its index are taken
+        from the bundle, without reading the file. Otherwise, the file is loaded and
+        its bases are resolved with the base configs in the bundle.
+
+        Args:
+            cfg_file: The path to the config file.
+
+        Returns:
+            The store with the resolved config.
+        """
+        key = ConfigBundle.get_key(cfg_file)
+        if key in self.cfgs:
+            cfg, index = self.cfgs[key]
+            return ConfigStore(cfg, index=dict(index))
+
+        raw_cfg = ConfigHandler.load_cfg_file(cfg_file)
+        return ConfigStore(ConfigHandler.replace_bases(raw_cfg, self.base_cfgs))
+
+
+def compile_bundle(
+    base_cfg_dir: Union[str, Path],
+    cfg_files: Sequence[Union[str, Path]],
+    bundle_file: Union[str, Path],
+    num_workers: int = 1,
+) -> Path:
+    """Compile a bundle of configs and save it into the given file.
+
+    Args:
+        base_cfg_dir: The path to the base configs directory.
+        cfg_files: The paths to the run or template files to include in the bundle.
+        bundle_file: The path to the output file (it should have extension ``.hbundle``).
+        num_workers: The number of workers used to parse base config files (default: 1).
+
+    Returns:
+        The path to the saved bundle.
+    """
+    bundle = ConfigBundle.compile(Path(base_cfg_dir), [Path(f) for f in cfg_files], num_workers)
+    bundle_path = Path(bundle_file)
+    bundle.save(bundle_path)
+    return bundle_path
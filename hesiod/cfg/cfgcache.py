@@ -0,0 +1,191 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from hesiod.cfg.cfgparser import CFG_T
+
+CACHE_ENTRY_EXT = ".hcache"
+CACHE_FORMAT_VERSION = 1
+
+FILE_KEY_T = Tuple[str, int, int]
+FILE_STATE_T = Tuple[FILE_KEY_T, str]
+
+
+class ConfigCache:
+    def __init__(self, cache_dir: Union[str, Path], max_size: Optional[int] = None) -> None:
+        """Create a persistent cache for parsed config files.
+
+        Parsed configs are stored in ``cache_dir`` in pickle format, one entry per
+        config file. An entry is valid only if path, size, modification time and
+        content hash of the config file are unchanged since the entry was written.
+
+        Entries are written to a temporary file and then atomically renamed, so the
+        cache can be shared by concurrent processes (e.g. on a shared filesystem).
+        If ``max_size`` is given, the least recently used entries are evicted
+        whenever the total size of the cache exceeds it. The total size is scanned
+        from the cache directory once and then tracked as entries are written, so
+        entries written by other processes are accounted for at the next eviction.
+
+        The cache directory is trusted: entries are unpickled when read, so the
+        directory should not be writable by untrusted users.
+
+        Args:
+            cache_dir: The path to the cache directory.
+            max_size: The maximum size of the cache in bytes (optional).
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.size: Optional[int] = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_file_key(cfg_file: Path) -> FILE_KEY_T:
+        """Get the key of a config file, based on its path, size and modification time.
+
+        Args:
+            cfg_file: The path to the config file.
+
+        Returns:
+            The absolute path, the size and the modification time (in ns) of the file.
+        """
+        stat = os.stat(cfg_file)
+        return str(cfg_file.absolute()), stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def get_file_state(cfg_file: Path) -> FILE_STATE_T:
+        """Get the state of a config file, i.e. its key and the hash of its content.
+
+        The key is taken before reading the content, so if the file changes in between
+        the state is stale (and entries written with it are never valid) rather than
+        pairing the new key with old content.
+
+        Args:
+            cfg_file: The path to the config file.
+
+        Returns:
+            The key of the file and the hash of its content.
+        """
+        key = ConfigCache.get_file_key(cfg_file)
+        return key, hashlib.sha256(cfg_file.read_bytes()).hexdigest()
+
+    def get_entry_path(self, cfg_file: Path) -> Path:
+        """Get the path of the cache entry for the given config file.
+
+        Args:
+            cfg_file: The path to the config file.
+
+        Returns:
+            The path to the cache entry.
+        """
+        path_hash = hashlib.sha256(str(cfg_file.absolute()).encode()).hexdigest()
+        return self.cache_dir / f"{path_hash}{CACHE_ENTRY_EXT}"
+
+    def get(self, cfg_file: Path, state: Optional[FILE_STATE_T] = None) -> Optional[CFG_T]:
+        """Get the cached config for the given file, if valid.
+
+        Args:
+            cfg_file: The path to the config file.
+            state: The state of the config file, if already known (optional).
+
+        Returns:
+            The cached config or None if the cache has no valid entry for the file.
+        """
+        entry_path = self.get_entry_path(cfg_file)
+        try:
+            with open(entry_path, "rb") as f:
+                version, key, content_hash, cfg = pickle.load(f)
+        except Exception:
+            return None
+
+        if state is None:
+            state = ConfigCache.get_file_state(cfg_file)
+        if version != CACHE_FORMAT_VERSION or (key, content_hash) != state:
+            return None
+
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+        return cfg
+
+    def put(self, cfg_file: Path, cfg: CFG_T, state: Optional[FILE_STATE_T] = None) -> None:
+        """Store the parsed config for the given file.
+
+        The state of the file should be taken before parsing it (see
+        ``ConfigCache.get_file_state``), so that the entry is never valid for content
+        that is different from the parsed one.
+
+        Args:
+            cfg_file: The path to the config file.
+            cfg: The parsed config.
+            state: The state of the config file when it was parsed (default: the
+                current state).
+        """
+        key, content_hash = ConfigCache.get_file_state(cfg_file) if state is None else state
+        entry = (CACHE_FORMAT_VERSION, key, content_hash, cfg)
+        entry_path = self.get_entry_path(cfg_file)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            entry_size = os.path.getsize(tmp_path)
+            try:
+                entry_size -= os.path.getsize(entry_path)
+            except OSError:
+                pass
+            os.replace(tmp_path, entry_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        if self.max_size is not None:
+            with self.lock:
+                if self.size is not None:
+                    self.size += entry_size
+                if self.size is None or self.size > self.max_size:
+                    self.size = self.evict(self.max_size)
+
+    def evict(self, max_size: int) -> int:
+        """Remove the least recently used entries until the cache fits the given size.
+
+        Args:
+            max_size: The maximum size of the cache in bytes.
+
+        Returns:
+            The total size of the remaining entries in bytes.
+        """
+        entries: List[Tuple[float, int, str]] = []
+        total_size = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(CACHE_ENTRY_EXT):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total_size <= max_size:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total_size -= size
+
+        return total_size
+
+    def clear(self) -> None:
+        """Remove all the entries from the cache."""
+        with self.lock:
+            self.size = self.evict(0)
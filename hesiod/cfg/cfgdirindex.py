@@ -0,0 +1,168 @@
+import os
+import stat
+import threading
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+CFG_FILE_EXT = ".yaml"
+
+INODE_T = Tuple[int, int]
+LISTING_T = Tuple[List[str], List[Tuple[str, INODE_T]]]
+
+
+class ConfigDirIndex:
+    _indexes: Dict[str, "ConfigDirIndex"] = {}
+    _listings: Dict[INODE_T, Tuple[int, LISTING_T]] = {}
+    _lock = threading.RLock()
+
+    def __init__(self, path: Path, inode: INODE_T, ancestors: FrozenSet[INODE_T]) -> None:
+        """Create the index of a config directory.
+
+        The directory is listed with a single ``os.scandir`` call the first time that its
+        content is requested, using the type information cached in each ``DirEntry``.
+        Symbolic links to directories are followed, but listings are deduplicated by
+        inode: a directory reached through more than one path is listed only once and
+        links pointing to one of their ancestors are skipped. As in ``Path.glob("*")``,
+        hidden entries (whose name starts with a dot) are ignored.
+
+        Indexes should be obtained with ``ConfigDirIndex.get``, which returns a shared
+        index for each directory, so that all the loaders reuse the same listings.
+        Listings are validated against the modification time of the directory every
+        time that its content is requested, so entries added, removed or renamed
+        later are picked up with a single ``os.stat`` per directory.
+
+        Args:
+            path: The path to the directory.
+            inode: The device and inode numbers of the directory.
+            ancestors: The device and inode numbers of the ancestors of the directory.
+        """
+        self.path = path
+        self.inode = inode
+        self.ancestors = ancestors
+        self._mtime: Optional[int] = None
+        self._files: List[Path] = []
+        self._subdirs: Dict[str, ConfigDirIndex] = {}
+
+    @staticmethod
+    def get(path: Path) -> "ConfigDirIndex":
+        """Get the shared index of the given directory.
+
+        Args:
+            path: The path to the directory.
+
+        Raises:
+            NotADirectoryError: If the given path is not a directory.
+
+        Returns:
+            The index of the directory.
+        """
+        key = os.path.abspath(path)
+        st = os.stat(key)
+        if not stat.S_ISDIR(st.st_mode):
+            raise NotADirectoryError(key)
+
+        with ConfigDirIndex._lock:
+            index = ConfigDirIndex._indexes.get(key)
+            if index is None or index.inode != (st.st_dev, st.st_ino):
+                index = ConfigDirIndex(path, (st.st_dev, st.st_ino), frozenset())
+                ConfigDirIndex._indexes[key] = index
+        return index
+
+    @staticmethod
+    def clear_cache() -> None:
+        """Forget all the indexes, so that directories are listed again."""
+        with ConfigDirIndex._lock:
+            ConfigDirIndex._indexes.clear()
+            ConfigDirIndex._listings.clear()
+
+    @staticmethod
+    def list_dir(path: Path, inode: INODE_T) -> LISTING_T:
+        """List the files and the subdirectories of a directory.
+
+        Args:
+            path: The path to the directory.
+            inode: The device and inode numbers of the directory.
+
+        Returns:
+            The names of the files and the names and inodes of the subdirectories.
+        """
+        files: List[str] = []
+        subdirs: List[Tuple[str, INODE_T]] = []
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    if entry.is_file():
+                        files.append(entry.name)
+                    elif entry.is_dir():
+                        if entry.is_symlink():
+                            st = entry.stat()
+                            subdirs.append((entry.name, (st.st_dev, st.st_ino)))
+                        else:
+                            subdirs.append((entry.name, (inode[0], entry.inode())))
+                except OSError:
+                    continue
+        return files, subdirs
+
+    def _scan(self) -> None:
+        """List the directory, if not done yet or if it changed since the last listing."""
+        mtime = os.stat(self.path).st_mtime_ns
+        if self._mtime == mtime:
+            return
+
+        with ConfigDirIndex._lock:
+            cached = ConfigDirIndex._listings.get(self.inode)
+        if cached is not None and cached[0] == mtime:
+            listing = cached[1]
+        else:
+            listing = ConfigDirIndex.list_dir(self.path, self.inode)
+
+        with ConfigDirIndex._lock:
+            ConfigDirIndex._listings[self.inode] = (mtime, listing)
+            if self._mtime == mtime:
+                return
+
+            file_names, subdir_entries = listing
+            seen = self.ancestors | {self.inode}
+            subdirs: Dict[str, ConfigDirIndex] = {}
+            for name, inode in subdir_entries:
+                if inode in seen:
+                    continue
+                key = os.path.abspath(self.path / name)
+                subdir = ConfigDirIndex._indexes.get(key)
+                if subdir is None or subdir.inode != inode:
+                    subdir = ConfigDirIndex(self.path / name, inode, seen)
+                    ConfigDirIndex._indexes[key] = subdir
+                subdirs[name] = subdir
+            self._subdirs = subdirs
+            self._files = [self.path / name for name in file_names]
+            self._mtime = mtime
+
+    @property
+    def files(self) -> List[Path]:
+        """The files in the directory, in listing order."""
+        self._scan()
+        return self._files
+
+    @property
+    def cfg_files(self) -> List[Path]:
+        """The config files in the directory, in listing order."""
+        return [f for f in self.files if f.suffix == CFG_FILE_EXT]
+
+    @property
+    def subdirs(self) -> Dict[str, "ConfigDirIndex"]:
+        """The indexes of the subdirectories, by name and in listing order."""
+        self._scan()
+        return self._subdirs
+
+    def get_all_files(self) -> List[Path]:
+        """Get all the files in the directory and in its subdirectories, recursively.
+
+        Returns:
+            The list of files.
+        """
+        all_files = list(self.files)
+        for subdir in self.subdirs.values():
+            all_files.extend(subdir.get_all_files())
+        return all_files
@@ -1,15 +1,458 @@
+import functools
+import os
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from contextvars import ContextVar, copy_context
 from copy import deepcopy
 from pathlib import Path
-from typing import Any, Dict, Type
-
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
+
+from hesiod.cfg.cfgcache import ConfigCache
+from hesiod.cfg.cfgdirindex import ConfigDirIndex
 from hesiod.cfg.cfgparser import CFG_T, ConfigParser
+from hesiod.cfg.cfgstore import KEY_SEP, LAZY_LOADERS_T
 from hesiod.cfg.yamlparser import YAMLConfigParser
+from hesiod.stats import count, get_stats
 
 BASE_KEY = "base"
 RUN_NAME_KEY = "run_name"
+BASE_CFGS_T = Mapping[str, Any]
+_PENDING = object()
+_CFG_CACHE: ContextVar[Optional[ConfigCache]] = ContextVar("hesiod_cfg_cache", default=None)
+
+
+def _fsync_path(path: Union[str, Path]) -> None:
+    """Flush a file or a directory to disk.
+
+    Directories cannot be flushed on some platforms (e.g. Windows): in that case,
+    nothing is done.
+
+    Args:
+        path: The path to the file or directory.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+    finally:
+        os.close(fd)
+
+
+def _split_lazy(
+    cfg: CFG_T,
+    prefix: str,
+    overrides: List[Any],
+    base_key: str,
+    lazy: Dict[str, CFG_T],
+) -> CFG_T:
+    """Remove from a config the subtrees that can be resolved lazily.
+
+    A subtree can be resolved lazily if it has a base and no override has a value for
+    it (or for one of the dictionaries that contain it), so that its resolved value
+    does not need to be merged with other values. Subtrees of a dictionary that has a
+    base but cannot be resolved lazily are never split from it, since its base fills in
+    the keys that are missing.
+
+    Args:
+        cfg: The config.
+        prefix: The dotted key of the config ("" for the root).
+        overrides: The values at the same path of the configs merged with the config.
+        base_key: The string used as base key.
+        lazy: The subtrees that can be resolved lazily, indexed by dotted key, that is
+            updated.
+
+    Returns:
+        The config without the subtrees that can be resolved lazily.
+    """
+    eager_cfg: CFG_T = {}
+    for k, v in cfg.items():
+        key = f"{prefix}{KEY_SEP}{k}" if prefix else str(k)
+        sub_overrides = [o[k] for o in overrides if k in o]
+        if not isinstance(v, dict) or not isinstance(k, str) or KEY_SEP in k:
+            eager_cfg[k] = v
+        elif base_key in v and len(sub_overrides) == 0:
+            lazy[key] = v
+        elif base_key not in v and all(isinstance(o, dict) for o in sub_overrides):
+            eager_cfg[k] = _split_lazy(v, key, sub_overrides, base_key, lazy)
+        else:
+            eager_cfg[k] = v
+    return eager_cfg
+
+
+def _resolve_locked(resolver: "BaseResolver", lock: threading.Lock, cfg: CFG_T) -> CFG_T:
+    """Replace all the bases in a given config, holding a lock on the resolver.
+
+    Args:
+        resolver: The resolver.
+        lock: The lock that protects the resolver.
+        cfg: The config to process.
+
+    Returns:
+        The config with all bases resolved.
+    """
+    with lock:
+        return resolver.resolve(cfg)
+
+
+def _submit_load(executor: Executor, cfg_file: Path) -> Future:
+    """Submit the parsing of a config file to an executor.
+
+    Files parsed by a pool of threads are parsed in the context of the caller, so that
+    they are counted in the stats of the current run. Files parsed by a pool of
+    processes are not counted.
+
+    Args:
+        executor: The executor.
+        cfg_file: The config file.
+
+    Returns:
+        The future of the parsed config.
+    """
+    if isinstance(executor, ThreadPoolExecutor):
+        return executor.submit(copy_context().run, ConfigHandler.load_cfg_file, cfg_file)
+    return executor.submit(ConfigHandler.load_cfg_file, cfg_file)
+
+
+class LazyBaseConfigs(Mapping[str, Any]):
+    def __init__(self, cfg_dir: Path) -> None:
+        """Create a lazy view over a directory of base configs.
+
+        The view behaves like the dictionary returned by ``ConfigHandler.load_cfg_dir``,
+        but directories are listed and files are parsed only when the corresponding
+        key is accessed for the first time. Loaded values are cached, so each file
+        is parsed at most once.
+
+        Args:
+            cfg_dir: The path to the base configs directory.
+        """
+        self.cfg_dir = cfg_dir
+        self._entries: Optional[Dict[str, Path]] = None
+        self._subdirs: Set[str] = set()
+        self._loaded: Dict[str, Any] = {}
+
+    @property
+    def entries(self) -> Dict[str, Path]:
+        """The files and subdirectories available in the directory, indexed by name."""
+        if self._entries is None:
+            entries: Dict[str, Path] = {}
+            cfg_files, cfg_subdirs = ConfigHandler.list_cfg_dir(self.cfg_dir)
+            for cfg_file in cfg_files:
+                entries[cfg_file.stem] = cfg_file
+            for cfg_subdir in cfg_subdirs:
+                entries[cfg_subdir.name] = cfg_subdir
+                self._subdirs.add(cfg_subdir.name)
+            self._entries = entries
+        return self._entries
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._loaded:
+            path = self.entries[key]
+            if key in self._subdirs:
+                self._loaded[key] = LazyBaseConfigs(path)
+            else:
+                self._loaded[key] = ConfigHandler.load_cfg_file(path)
+        return self._loaded[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def prefetch(self, base_ids: Iterable[str], executor: Executor) -> List[CFG_T]:
+        """Parse in parallel the files referenced by the given base ids.
+
+        Files that have already been loaded are skipped.
+
+        Args:
+            base_ids: The base ids, as in ``dir.subdir.file``.
+            executor: The executor used to parse the files.
+
+        Returns:
+            The newly loaded configs.
+        """
+        pending: Dict[Tuple[int, str], Tuple[LazyBaseConfigs, str, Future]] = {}
+        for base_id in base_ids:
+            node = self
+            for k in base_id.split("."):
+                if k not in node:
+                    break
+                if k in node._subdirs:
+                    node = node[k]
+                    continue
+                if k not in node._loaded and (id(node), k) not in pending:
+                    future = _submit_load(executor, node.entries[k])
+                    pending[(id(node), k)] = (node, k, future)
+                break
+
+        loaded: List[CFG_T] = []
+        for node, k, future in pending.values():
+            node._loaded[k] = future.result()
+            loaded.append(node._loaded[k])
+
+        return loaded
+
+    def get_path(self, base_id: str) -> Optional[Path]:
+        """Get the path of the file or directory that contains a given base.
+
+        Args:
+            base_id: The base id, as in ``dir.subdir.file``.
+
+        Returns:
+            The path of the config file in which the base is defined, the path of the
+            directory if the base id refers to a whole directory or None if the base
+            id does not refer to any file or directory.
+        """
+        node = self
+        path = self.cfg_dir
+        for k in base_id.split("."):
+            if k not in node:
+                return None
+            if k not in node._subdirs:
+                return node.entries[k]
+            node = node[k]
+            path = node.cfg_dir
+        return path
+
+    def get_loaded_files(self) -> List[Path]:
+        """Get the config files that have been loaded so far, recursively.
+
+        Returns:
+            The paths of the loaded files.
+        """
+        loaded_files: List[Path] = []
+        for key, value in list(self._loaded.items()):
+            if isinstance(value, LazyBaseConfigs):
+                loaded_files.extend(value.get_loaded_files())
+            else:
+                loaded_files.append(self.entries[key])
+        return loaded_files
+
+    def reload(self, cfg_file: Path) -> bool:
+        """Parse again a config file that has already been loaded.
+
+        Args:
+            cfg_file: The path to the config file, as returned by ``get_loaded_files``.
+
+        Returns:
+            True if the file was reloaded, False if it had never been loaded.
+        """
+        try:
+            parts = cfg_file.relative_to(self.cfg_dir).parts
+        except ValueError:
+            return False
+
+        node = self
+        for part in parts[:-1]:
+            child = node._loaded.get(part)
+            if not isinstance(child, LazyBaseConfigs):
+                return False
+            node = child
+
+        key = Path(parts[-1]).stem
+        if key not in node._loaded or key in node._subdirs:
+            return False
+        node._loaded[key] = ConfigHandler.load_cfg_file(node.entries[key])
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Load the whole directory.
+
+        Returns:
+            The loaded configs, as returned by ``ConfigHandler.load_cfg_dir``.
+        """
+        cfg: Dict[str, Any] = {}
+        for key in self:
+            value = self[key]
+            cfg[key] = value.to_dict() if isinstance(value, LazyBaseConfigs) else value
+        return cfg
+
+
+class BaseResolver:
+    def __init__(self, base_cfgs: BASE_CFGS_T, base_key: str = BASE_KEY) -> None:
+        """Create a resolver for the bases referenced in configs.
+
+        Each base id is resolved at most once: the fully resolved base is cached and
+        reused for every further reference, also across different calls to ``resolve``.
+        Cached bases are shared and never returned directly, since ``resolve`` copies
+        inherited values into its output. The bases referenced directly by each resolved
+        base are recorded in ``dependencies``, so that the bases affected by a change
+        can be found and invalidated.
+
+        Args:
+            base_cfgs: The available base configs.
+            base_key: The string used as base key.
+        """
+        self.base_cfgs = base_cfgs
+        self.base_key = base_key
+        self._resolved: Dict[str, CFG_T] = {}
+        self._resolving: List[str] = []
+        self.dependencies: Dict[str, Set[str]] = {}
+
+    def resolve(self, cfg: CFG_T) -> CFG_T:
+        """Replace all the bases in a given config recursively.
+
+        The given config is not modified and the returned one does not share
+        any mutable value with it or with the base configs.
+
+        Args:
+            cfg: The config to process.
+
+        Raises:
+            ValueError: If it is not possible to retrieve one of the bases
+                or if bases refer to each other cyclically.
+
+        Returns:
+            The config with all bases resolved.
+        """
+        return self._resolve(cfg, copy=True)
+
+    def resolve_base(self, base_id: str) -> CFG_T:
+        """Get the fully resolved base config with the given id.
+
+        The returned config is cached and shared: it must not be modified.
+
+        Args:
+            base_id: The id of the base config, as in ``dir.subdir.file``.
+
+        Raises:
+            ValueError: If it is not possible to retrieve the base config
+                or if bases refer to each other cyclically.
+
+        Returns:
+            The resolved base config.
+        """
+        if base_id in self._resolved:
+            return self._resolved[base_id]
+
+        if base_id in self._resolving:
+            cycle = self._resolving[self._resolving.index(base_id) :] + [base_id]
+            raise ValueError(f"Config error: cyclic bases {' -> '.join(cycle)}")
+
+        count("bases_resolved")
+        self._resolving.append(base_id)
+        self.dependencies[base_id] = set()
+        try:
+            base_cfg = ConfigHandler.get_base_cfg(self.base_cfgs, base_id)
+            if not isinstance(base_cfg, dict):
+                raise ValueError(f"Config error: base {base_id} is not a config")
+            resolved = self._resolve(base_cfg, copy=False)
+        finally:
+            self._resolving.pop()
+
+        self._resolved[base_id] = resolved
+        return resolved
+
+    def invalidate(self, base_ids: Optional[Iterable[str]] = None) -> None:
+        """Remove resolved bases from the cache.
+
+        Args:
+            base_ids: The ids of the bases to remove (default: all the bases).
+        """
+        if base_ids is None:
+            self._resolved.clear()
+            self.dependencies.clear()
+        else:
+            for base_id in base_ids:
+                self._resolved.pop(base_id, None)
+                self.dependencies.pop(base_id, None)
+
+    def get_dependents(self, base_ids: Iterable[str]) -> Set[str]:
+        """Get the resolved bases that depend, directly or transitively, on the given ones.
+
+        Args:
+            base_ids: The ids of the bases.
+
+        Returns:
+            The given ids together with the ids of all the bases that depend on them.
+        """
+        dependents = set(base_ids)
+        changed = True
+        while changed:
+            changed = False
+            for base_id, deps in self.dependencies.items():
+                if base_id not in dependents and not deps.isdisjoint(dependents):
+                    dependents.add(base_id)
+                    changed = True
+        return dependents
+
+    def _resolve(self, cfg: CFG_T, copy: bool) -> CFG_T:
+        """Replace all the bases in a given config recursively.
+
+        Args:
+            cfg: The config to process.
+            copy: A flag that indicates whether values must be copied in the output.
+
+        Returns:
+            The config with all bases resolved.
+        """
+        new_cfg: CFG_T = {}
+        for k, v in cfg.items():
+            if k == self.base_key:
+                continue
+            if isinstance(v, dict):
+                new_cfg[k] = self._resolve(v, copy)
+            else:
+                new_cfg[k] = deepcopy(v) if copy else v
+
+        if self.base_key in cfg:
+            count("resolution_steps")
+            if len(self._resolving) > 0:
+                self.dependencies[self._resolving[-1]].add(cfg[self.base_key])
+            base_cfg = self.resolve_base(cfg[self.base_key])
+            for k, v in base_cfg.items():
+                if k not in new_cfg:
+                    new_cfg[k] = deepcopy(v) if copy else v
+
+        return new_cfg
 
 
 class ConfigHandler:
+    parsers_table: Optional[Dict[str, Type[ConfigParser]]] = None
+
+    @staticmethod
+    def set_cache(cfg_cache: Optional[ConfigCache]) -> None:
+        """Set the persistent cache used when loading config files in the current context.
+
+        The cache is used by the code executed in the current context and in the contexts
+        copied from it afterwards (e.g. the threads that parse files in parallel), so that
+        runs executed in different contexts can use different caches.
+
+        Args:
+            cfg_cache: The cache to use or None to disable caching.
+        """
+        _CFG_CACHE.set(cfg_cache)
+
+    @staticmethod
+    def get_cache() -> Optional[ConfigCache]:
+        """Get the persistent cache used when loading config files in the current context.
+
+        Returns:
+            The cache or None if caching is disabled.
+        """
+        return _CFG_CACHE.get()
+
     @staticmethod
     def get_parser(ext: str) -> Type["ConfigParser"]:
         """Return the proper parser given the extension of the file to parse.
@@ -20,23 +463,76 @@ class ConfigHandler:
         Returns:
             The proper parser for the given extension.
         """
-        parsers = [YAMLConfigParser]
-        parsers_table: Dict[str, Type[ConfigParser]] = {}
-        for parser in parsers:
-            for managed_ext in parser.get_managed_extensions():
-                parsers_table[managed_ext] = parser
+        parsers_table = ConfigHandler.parsers_table
+        if parsers_table is None:
+            parsers = [YAMLConfigParser]
+            parsers_table = {}
+            for parser in parsers:
+                for managed_ext in parser.get_managed_extensions():
+                    parsers_table[managed_ext] = parser
+            ConfigHandler.parsers_table = parsers_table
 
         ext = ext.strip()
         ext = ext[1:] if ext[0] == "." else ext
         return parsers_table[ext]
 
     @staticmethod
-    def load_cfg(run_cfg_file: Path, base_cfg_dir: Path) -> CFG_T:
+    def get_executor(num_workers: int, use_processes: bool = False) -> Executor:
+        """Create an executor to load config files in parallel.
+
+        Args:
+            num_workers: The number of workers.
+            use_processes: A flag that indicates whether to use a pool of processes
+                instead of a pool of threads (default: False).
+
+        Returns:
+            The executor.
+        """
+        if use_processes:
+            from concurrent.futures import ProcessPoolExecutor
+
+            return ProcessPoolExecutor(max_workers=num_workers)
+        return ThreadPoolExecutor(max_workers=num_workers)
+
+    @staticmethod
+    def get_base_ids(cfg: CFG_T, base_key: str = BASE_KEY) -> Set[str]:
+        """Collect the ids of all the bases referenced in a given config.
+
+        Args:
+            cfg: The config to inspect.
+            base_key: The string used as base key.
+
+        Returns:
+            The referenced base ids.
+        """
+        base_ids: Set[str] = set()
+        if isinstance(cfg.get(base_key), str):
+            base_ids.add(cfg[base_key])
+        for value in cfg.values():
+            if isinstance(value, dict):
+                base_ids.update(ConfigHandler.get_base_ids(value, base_key))
+        return base_ids
+
+    @staticmethod
+    def load_cfg(
+        run_cfg_file: Path,
+        base_cfg_dir: Path,
+        num_workers: int = 1,
+        use_processes: bool = False,
+    ) -> CFG_T:
         """Load config replacing "bases" with proper values.
 
+        Base configs are loaded lazily: only the files that are referenced
+        (directly or transitively) by the run config are parsed. If ``num_workers``
+        is greater than one, referenced files are parsed in parallel, one wave of
+        references at a time.
+
         Args:
             run_cfg_file: The path to the run config file.
             base_cfg_dir: The path to the base configs directory.
+            num_workers: The number of workers used to parse base files (default: 1).
+            use_processes: A flag that indicates whether to parse files with a pool of
+                processes instead of a pool of threads (default: False).
 
         Returns:
             The loaded config.
@@ -44,16 +540,74 @@ class ConfigHandler:
 
         cfg = ConfigHandler.load_cfg_file(run_cfg_file)
 
-        base_cfgs = ConfigHandler.load_base_cfgs(base_cfg_dir)
+        base_cfgs = LazyBaseConfigs(base_cfg_dir)
+
+        if num_workers > 1:
+            with ConfigHandler.get_executor(num_workers, use_processes) as executor:
+                base_ids = ConfigHandler.get_base_ids(cfg)
+                seen_ids = set(base_ids)
+                while len(base_ids) > 0:
+                    new_ids: Set[str] = set()
+                    for base_cfg in base_cfgs.prefetch(base_ids, executor):
+                        new_ids.update(ConfigHandler.get_base_ids(base_cfg))
+                    base_ids = new_ids - seen_ids
+                    seen_ids.update(base_ids)
 
         cfg = ConfigHandler.replace_bases(cfg, base_cfgs)
 
         return cfg
 
+    @staticmethod
+    def load_cfg_lazy(
+        run_cfg_file: Path,
+        base_cfg_dir: Path,
+        overrides: Iterable[CFG_T] = (),
+    ) -> Tuple[CFG_T, LAZY_LOADERS_T]:
+        """Load config replacing "bases" with proper values only when they are needed.
+
+        The subtrees of the run config that have a base are not resolved: for each of
+        them, a function that resolves it is returned instead, so that the base files
+        are parsed only if the subtree is used (see ``ConfigStore``). Subtrees whose keys
+        are also in the base of the run config or that are merged with values of the given
+        overrides are resolved immediately, as well as the rest of the config.
+
+        Args:
+            run_cfg_file: The path to the run config file.
+            base_cfg_dir: The path to the base configs directory.
+            overrides: The configs that will be merged on top of the loaded one (optional).
+
+        Raises:
+            ValueError: If it is not possible to retrieve one of the bases
+                or if bases refer to each other cyclically.
+
+        Returns:
+            The loaded config, without the lazy subtrees, and the functions that resolve
+            the lazy subtrees, indexed by their dotted keys.
+        """
+        cfg = ConfigHandler.load_cfg_file(run_cfg_file)
+        resolver = BaseResolver(LazyBaseConfigs(base_cfg_dir))
+
+        merged = list(overrides)
+        if BASE_KEY in cfg:
+            merged.insert(0, resolver.resolve_base(cfg[BASE_KEY]))
+
+        lazy: Dict[str, CFG_T] = {}
+        cfg = resolver.resolve(_split_lazy(cfg, "", merged, BASE_KEY, lazy))
+
+        lock = threading.Lock()
+        loaders: Dict[str, Callable[[], CFG_T]] = {}
+        for key, subtree in lazy.items():
+            loaders[key] = functools.partial(_resolve_locked, resolver, lock, subtree)
+        return cfg, loaders
+
     @staticmethod
     def load_cfg_file(cfg_file: Path) -> CFG_T:
         """Load config from a given file.
 
+        If a persistent cache is set (see ``ConfigHandler.set_cache``), it is
+        consulted before parsing the file and updated after parsing it, with the
+        state of the file taken before parsing it.
+
         Args:
             cfg_file: The file with the config.
 
@@ -63,8 +617,23 @@ class ConfigHandler:
         Returns:
             The loaded config.
         """
+        cfg_cache = _CFG_CACHE.get()
+        if cfg_cache is not None:
+            state = ConfigCache.get_file_state(cfg_file)
+            cached_cfg = cfg_cache.get(cfg_file, state)
+            if cached_cfg is not None:
+                count("cache_hits")
+                return cached_cfg
+
         parser = ConfigHandler.get_parser(cfg_file.suffix)
-        cfg = parser.read_cfg_file(cfg_file)
+        stats = get_stats()
+        if stats is None:
+            cfg = parser.read_cfg_file(cfg_file)
+        else:
+            with stats.phase("parse_files"):
+                cfg = parser.read_cfg_file(cfg_file)
+            stats.count("files_parsed")
+            stats.count("bytes_read", os.path.getsize(cfg_file))
 
         if not isinstance(cfg, dict):
             raise ValueError(f"Error in {cfg_file.name}: Config should be a dictionary.")
@@ -73,32 +642,123 @@ class ConfigHandler:
             if not isinstance(key, str):
                 raise ValueError("Error in {cfg_file.name}: Config keys should be strings.")
 
+        if cfg_cache is not None:
+            cfg_cache.put(cfg_file, cfg, state)
+
         return cfg
 
     @staticmethod
-    def load_cfg_dir(cfg_dir: Path) -> Dict[str, CFG_T]:
+    def list_cfg_dir(cfg_dir: Path) -> Tuple[List[Path], List[Path]]:
+        """List config files and subdirectories in a given directory.
+
+        Directories are listed through the shared ``ConfigDirIndex``, so each
+        directory is scanned only once.
+
+        Args:
+            cfg_dir: The config directory.
+
+        Returns:
+            The list of config files and the list of subdirectories.
+        """
+        dir_index = ConfigDirIndex.get(cfg_dir)
+        cfg_subdirs = [subdir.path for subdir in dir_index.subdirs.values()]
+        return dir_index.cfg_files, cfg_subdirs
+
+    @staticmethod
+    def load_cfg_dir(
+        cfg_dir: Path,
+        num_workers: int = 1,
+        use_processes: bool = False,
+    ) -> Dict[str, CFG_T]:
         """Load configs recursively from a given directory.
 
+        If ``num_workers`` is greater than one, directories are listed with a pool
+        of threads and files are parsed with a pool of threads (or processes, if
+        ``use_processes`` is True). The returned config is the same, with keys in
+        the same order, as the one loaded serially.
+
         Args:
             cfg_dir: The config directory.
+            num_workers: The number of workers used to load the directory (default: 1).
+            use_processes: A flag that indicates whether to parse files with a pool of
+                processes instead of a pool of threads (default: False).
 
         Returns:
             The loaded config.
         """
+        if num_workers > 1:
+            return ConfigHandler.load_cfg_dir_parallel(cfg_dir, num_workers, use_processes)
+
         cfg: Dict[str, Dict[str, Any]] = {}
 
-        cfg_files = [p for p in cfg_dir.glob("*.yaml")]
+        cfg_files, cfg_subdirs = ConfigHandler.list_cfg_dir(cfg_dir)
         for cfg_file in cfg_files:
             cfg[cfg_file.stem] = ConfigHandler.load_cfg_file(cfg_file)
 
-        cfg_subdirs = [p for p in cfg_dir.glob("*") if p.is_dir()]
         for cfg_subdir in cfg_subdirs:
             cfg[cfg_subdir.name] = ConfigHandler.load_cfg_dir(cfg_subdir)
 
         return cfg
 
     @staticmethod
-    def load_base_cfgs(base_cfg_dir: Path) -> Dict[str, CFG_T]:
+    def load_cfg_dir_parallel(
+        cfg_dir: Path,
+        num_workers: int,
+        use_processes: bool = False,
+    ) -> Dict[str, CFG_T]:
+        """Load configs recursively from a given directory, in parallel.
+
+        Directories are listed level by level with a pool of threads, while
+        files are submitted for parsing as soon as they are found.
+
+        Args:
+            cfg_dir: The config directory.
+            num_workers: The number of workers.
+            use_processes: A flag that indicates whether to parse files with a pool of
+                processes instead of a pool of threads (default: False).
+
+        Returns:
+            The loaded config.
+        """
+        cfg: Dict[str, Any] = {}
+        parsed: List[Tuple[Dict[str, Any], str, Future]] = []
+
+        with ThreadPoolExecutor(max_workers=num_workers) as list_executor:
+            parse_executor: Executor = list_executor
+            if use_processes:
+                parse_executor = ConfigHandler.get_executor(num_workers, use_processes=True)
+
+            with parse_executor:
+                to_list: List[Tuple[Dict[str, Any], Path]] = [(cfg, cfg_dir)]
+                while len(to_list) > 0:
+                    listed = [
+                        (node, list_executor.submit(ConfigHandler.list_cfg_dir, d))
+                        for node, d in to_list
+                    ]
+                    to_list = []
+                    for node, future in listed:
+                        cfg_files, cfg_subdirs = future.result()
+                        for cfg_file in cfg_files:
+                            node[cfg_file.stem] = _PENDING
+                            parse_future = _submit_load(parse_executor, cfg_file)
+                            parsed.append((node, cfg_file.stem, parse_future))
+                        for cfg_subdir in cfg_subdirs:
+                            node[cfg_subdir.name] = {}
+                            to_list.append((node[cfg_subdir.name], cfg_subdir))
+
+                for node, key, parse_future in parsed:
+                    result = parse_future.result()
+                    if node[key] is _PENDING:
+                        node[key] = result
+
+        return cfg
+
+    @staticmethod
+    def load_base_cfgs(
+        base_cfg_dir: Path,
+        num_workers: int = 1,
+        use_processes: bool = False,
+    ) -> Dict[str, CFG_T]:
         """Load all the base configs.
 
         Starting from the given path, each subdir is considered a
@@ -108,28 +768,51 @@ class ConfigHandler:
 
         Args:
             base_cfg_dir: The path with the base config directories.
+            num_workers: The number of workers used to load the bases (default: 1).
+            use_processes: A flag that indicates whether to parse files with a pool of
+                processes instead of a pool of threads (default: False).
 
         Returns:
             A dictionary with all the base configs.
         """
-        base_cfgs: Dict[str, CFG_T] = {}
-        cfg_files = [p for p in base_cfg_dir.glob("*.yaml")]
-        for cfg_file in cfg_files:
-            base_cfgs[cfg_file.stem] = ConfigHandler.load_cfg_file(cfg_file)
-        cfg_dirs = [p for p in base_cfg_dir.glob("*") if p.is_dir()]
-        for cfg_dir in cfg_dirs:
-            base_cfgs[cfg_dir.name] = ConfigHandler.load_cfg_dir(cfg_dir)
+        return ConfigHandler.load_cfg_dir(base_cfg_dir, num_workers, use_processes)
 
-        return base_cfgs
+    @staticmethod
+    def get_base_cfg(base_cfgs: BASE_CFGS_T, base_id: str) -> CFG_T:
+        """Retrieve the base config identified by the given id.
+
+        Args:
+            base_cfgs: The available base configs.
+            base_id: The id of the base config, as in ``dir.subdir.file``.
+
+        Raises:
+            ValueError: If it is not possible to retrieve the base config.
+
+        Returns:
+            The requested base config.
+        """
+        base_cfg: Any = base_cfgs
+        for k in base_id.split("."):
+            if k not in base_cfg:
+                raise ValueError(f"Config error: cannot find base {base_id}")
+            base_cfg = base_cfg[k]
+
+        if isinstance(base_cfg, LazyBaseConfigs):
+            base_cfg = base_cfg.to_dict()
+
+        return base_cfg
 
     @staticmethod
     def replace_base(
         cfg: CFG_T,
-        base_cfgs: Dict[str, CFG_T],
+        base_cfgs: BASE_CFGS_T,
         base_key: str = BASE_KEY,
     ) -> CFG_T:
         """Replace base placeholder in a given config.
 
+        Only the base placeholder of the given config is replaced: bases
+        possibly referenced by the base config are not resolved.
+
         Args:
             cfg: The config with base placeholder.
             base_cfgs: The available base configs.
@@ -141,28 +824,21 @@ class ConfigHandler:
         Returns:
             The config with the base placeholder replaced.
         """
-        new_cfg = deepcopy(cfg)
-        base_id = new_cfg[base_key]
-        base_cfg = base_cfgs
-
-        for k in base_id.split("."):
-            if k not in base_cfg:
-                raise ValueError(f"Config error: cannot find base {base_id}")
-            base_cfg = base_cfg[k]
+        base_id = cfg[base_key]
+        base_cfg = ConfigHandler.get_base_cfg(base_cfgs, base_id)
 
-        del new_cfg[base_key]
+        new_cfg = {k: v for k, v in cfg.items() if k != base_key}
 
         for k in base_cfg:
             if k not in new_cfg:
-                new_cfg[k] = base_cfg[k]
+                new_cfg[k] = deepcopy(base_cfg[k])
 
         return new_cfg
 
-    @classmethod
+    @staticmethod
     def replace_bases(
-        cls,
         cfg: CFG_T,
-        base_cfgs: Dict[str, CFG_T],
+        base_cfgs: BASE_CFGS_T,
         base_key: str = BASE_KEY,
     ) -> CFG_T:
         """Replace all the bases in a given config recursively.
@@ -172,29 +848,48 @@ class ConfigHandler:
             base_cfgs: The available base configs.
             base_key: The string used as base key.
 
+        Raises:
+            ValueError: If it is not possible to retrieve one of the bases
+                or if bases refer to each other cyclically.
+
         Returns:
             The config with all bases resolved.
         """
-        new_cfg = deepcopy(cfg)
-
-        # replace base in main cfg
-        while base_key in new_cfg:
-            new_cfg = cls.replace_base(new_cfg, base_cfgs, base_key=base_key)
-
-        # replace bases in sub cfgs
-        for cfg_key in new_cfg:
-            if isinstance(new_cfg[cfg_key], dict):
-                new_cfg[cfg_key] = cls.replace_bases(new_cfg[cfg_key], base_cfgs, base_key=base_key)
-
-        return new_cfg
+        return BaseResolver(base_cfgs, base_key=base_key).resolve(cfg)
 
     @staticmethod
-    def save_cfg(cfg: CFG_T, cfg_file: Path) -> None:
+    def save_cfg(cfg: CFG_T, cfg_file: Path, atomic: bool = False, fsync: bool = False) -> None:
         """Save config into the given file.
 
+        If ``atomic`` is True, the config is written to a temporary file in the same
+        directory, that is then atomically renamed, so that the output file is either
+        missing (or left unchanged) or complete, even if the process is killed while
+        writing. If ``fsync`` is True too, the file and the rename are flushed to disk
+        before returning.
+
         Args:
             cfg: The config to be saved.
             cfg_file: The path to the output file.
+            atomic: A flag that indicates whether the file should be written atomically
+                (default: False).
+            fsync: A flag that indicates whether an atomic write should be flushed
+                to disk (default: False).
         """
         parser = ConfigHandler.get_parser(cfg_file.suffix)
-        parser.write_cfg(cfg, cfg_file)
+        if not atomic:
+            parser.write_cfg(cfg, cfg_file)
+            return
+
+        cfg_dir = cfg_file.absolute().parent
+        tmp_path = cfg_dir / f".{cfg_file.name}.{os.urandom(6).hex()}.tmp"
+        try:
+            parser.write_cfg(cfg, tmp_path)
+            if fsync:
+                _fsync_path(tmp_path)
+            os.replace(tmp_path, cfg_file)
+        except BaseException:
+            if tmp_path.exists():
+                tmp_path.unlink()
+            raise
+        if fsync:
+            _fsync_path(cfg_dir)
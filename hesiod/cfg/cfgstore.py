@@ -0,0 +1,344 @@
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Mapping, Optional, Set
+
+from hesiod.cfg.cfgparser import CFG_T
+from hesiod.cfg.readonly import ReadOnlyDict, freeze, replace_in
+
+if TYPE_CHECKING:
+    from hesiod.cfg.interpolation import InterpolationGraph
+
+KEY_SEP = "."
+INTERPOLATION_START = "${"
+
+LAZY_LOADERS_T = Mapping[str, Callable[[], CFG_T]]
+
+
+def get_ancestors(key: str) -> Iterator[str]:
+    """Get the dotted keys of the ancestors of a given dotted key.
+
+    Args:
+        key: The dotted key.
+
+    Returns:
+        An iterator over the ancestors, from the root down (the root "" excluded).
+    """
+    pos = key.find(KEY_SEP)
+    while pos != -1:
+        yield key[:pos]
+        pos = key.find(KEY_SEP, pos + 1)
+
+
+def check_type(key: str, value: Any, t: Any) -> None:
+    """Check the type of a config value with typeguard, imported only when needed.
+
+    Args:
+        key: The dotted key of the value, used in error messages.
+        value: The value to check.
+        t: The expected type of the value.
+
+    Raises:
+        TypeError: If the value is not of the expected type.
+    """
+    from typeguard import check_type as typeguard_check_type
+
+    typeguard_check_type(key, value, t)
+
+
+class ConfigStore:
+    def __init__(
+        self,
+        cfg: Optional[CFG_T] = None,
+        index: Optional[Dict[str, Any]] = None,
+        lazy: Optional[LAZY_LOADERS_T] = None,
+    ) -> None:
+        """Create a store for a read-only config.
+
+        Besides the nested config, the store keeps a flat index that maps every
+        dotted key (as in ``key.subkey.subsubkey``) to the corresponding value, so
+        that getting a value costs a single lookup regardless of its depth. The index
+        is updated incrementally when values are set.
+
+        Only keys that are strings without dots are indexed, since they are the only
+        ones that can be addressed with dotted keys.
+
+        Successful type checks are cached per (key, type) and invalidated only when
+        the key, one of its ancestors or one of its descendants is set.
+
+        String values can contain interpolations, as in ``${key.subkey}/train`` or
+        ``${env:HOME}`` (see ``hesiod.cfg.interpolation``). Their dependencies are
+        tracked when they are indexed, while they are evaluated only when they are
+        requested and then cached until one of their dependencies is set.
+
+        Some subtrees of the config can be lazy: they are not in the config until
+        they are loaded by the corresponding function, the first time that a value
+        in them (or the dictionary that contains them) is requested or set. The index
+        contains only the values that are loaded, while ``cfg`` loads all the lazy
+        subtrees before returning the whole config.
+
+        Args:
+            cfg: The initial config (default: empty config).
+            index: A prebuilt index for the given config (optional). It must
+                have been built by another store for the very same config.
+            lazy: The functions that load the lazy subtrees, indexed by the dotted
+                keys of the subtrees (optional). Lazy subtrees cannot be nested and
+                their keys must not be in the given config.
+
+        Raises:
+            ValueError: If an interpolation is not valid or interpolations have a cycle.
+        """
+        self._cfg: ReadOnlyDict = freeze(cfg if cfg is not None else {})
+        self._lazy: Dict[str, Callable[[], CFG_T]] = dict(lazy) if lazy is not None else {}
+        self._lazy_prefixes = {p for k in self._lazy for p in ("", *get_ancestors(k))}
+        self._lazy_lock = threading.RLock()
+        self._checked_types: Dict[str, Set[Any]] = {}
+        self._interpolations: Optional["InterpolationGraph"] = None
+        if index is not None:
+            self.index = index
+            for key, value in index.items():
+                self._track(key, value)
+        else:
+            self.index = {}
+            self._index_children("", self._cfg)
+
+        if self._interpolations is not None:
+            self._interpolations.check_cycles()
+
+    @property
+    def cfg(self) -> ReadOnlyDict:
+        """The whole config, with all the lazy subtrees loaded."""
+        self.load_lazy("")
+        return self._cfg
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether all the lazy subtrees of the config are loaded."""
+        return len(self._lazy) == 0
+
+    def __contains__(self, key: str) -> bool:
+        if self._lazy:
+            self.load_lazy(key)
+        return key in self.index
+
+    def get(self, key: str, t: Any = None) -> Any:
+        """Get the value for the given dotted key.
+
+        Args:
+            key: The dotted key.
+            t: The expected type of the value (optional).
+
+        Raises:
+            KeyError: If the key is not in the config.
+            TypeError: If ``t`` is not None and the value is not of the expected type.
+            ValueError: If the value has interpolations that cannot be resolved.
+
+        Returns:
+            The requested value, with its interpolations resolved.
+        """
+        if self._lazy:
+            self.load_lazy(key)
+
+        value = self.index[key]
+        if self._interpolations is not None:
+            value = self._interpolations.resolve(key, value, self.index)
+
+        if t is not None:
+            checked_types = self._checked_types.get(key)
+            try:
+                if checked_types is not None and t in checked_types:
+                    return value
+            except TypeError:
+                checked_types = None
+
+            check_type(key, value, t)
+
+            try:
+                self._checked_types.setdefault(key, set()).add(t)
+            except TypeError:
+                pass
+
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Set the value for the given dotted key.
+
+        Missing dictionaries along the path to the key (or values that are not
+        dictionaries) are replaced by new dictionaries. The config is not modified
+        in place: only the dictionaries along the path are copied. The cached values
+        of the interpolations that depend on the key are dropped.
+
+        Args:
+            key: The dotted key.
+            value: The value to set.
+
+        Raises:
+            ValueError: If the value has interpolations that are not valid.
+        """
+        if self._lazy:
+            self._drop_lazy(key)
+
+        keys = key.split(KEY_SEP)
+        value = freeze(value)
+
+        old_value = self.index.get(key)
+        if isinstance(old_value, dict):
+            self._unindex_children(key, old_value)
+        if self._interpolations is not None:
+            self._interpolations.untrack(key)
+
+        self._cfg = replace_in(self._cfg, keys, value)
+
+        node: Any = self._cfg
+        prefix = ""
+        for k in keys[:-1]:
+            node = node[k]
+            prefix = f"{prefix}{KEY_SEP}{k}" if prefix else k
+            self.index[prefix] = node
+            self._checked_types.pop(prefix, None)
+
+        self.index[key] = value
+        self._checked_types.pop(key, None)
+        self._track(key, value)
+        if isinstance(value, dict):
+            self._index_children(key, value)
+
+        if self._interpolations is not None:
+            for stale_key in self._interpolations.invalidate(key):
+                self._checked_types.pop(stale_key, None)
+
+    def get_resolved_cfg(self) -> ReadOnlyDict:
+        """Get the whole config, with all the lazy subtrees loaded and all the interpolations
+        resolved.
+
+        Raises:
+            ValueError: If some interpolations cannot be resolved.
+
+        Returns:
+            The resolved config (the config itself, if it has no interpolations).
+        """
+        cfg = self.cfg
+        if self._interpolations is None:
+            return cfg
+        return self._interpolations.resolve_cfg(cfg, self.index)
+
+    def copy(self) -> "ConfigStore":
+        """Get a copy of the store, that can be changed (and loaded) independently of it.
+
+        Returns:
+            The copy of the store.
+        """
+        with self._lazy_lock:
+            return ConfigStore(self._cfg, index=dict(self.index), lazy=self._lazy)
+
+    def load_lazy(self, key: str) -> None:
+        """Load the lazy subtrees that are needed to get the value for a given dotted key.
+
+        The lazy subtree that contains the key or all the lazy subtrees under it are loaded.
+
+        Args:
+            key: The dotted key ("" for the whole config).
+        """
+        if not self._lazy:
+            return
+
+        with self._lazy_lock:
+            for prefix in (*get_ancestors(key), key):
+                if prefix in self._lazy:
+                    self._load_subtrees([prefix])
+                    return
+            if key in self._lazy_prefixes:
+                self._load_subtrees([k for k in self._lazy if _is_under(k, key)])
+
+    def _load_subtrees(self, keys: List[str]) -> None:
+        """Load some lazy subtrees and set them in the config.
+
+        Args:
+            keys: The dotted keys of the lazy subtrees.
+        """
+        for key in keys:
+            loader = self._lazy.pop(key)
+            self.set(key, loader())
+        self._lazy_prefixes = {p for k in self._lazy for p in ("", *get_ancestors(k))}
+
+    def _drop_lazy(self, key: str) -> None:
+        """Prepare the lazy subtrees for a value that is going to be set.
+
+        The lazy subtree that contains the key is loaded, so that the value is set in it,
+        while the lazy subtrees that would be replaced by the value are dropped.
+
+        Args:
+            key: The dotted key of the value.
+        """
+        with self._lazy_lock:
+            for prefix in get_ancestors(key):
+                if prefix in self._lazy:
+                    self._load_subtrees([prefix])
+                    return
+            dropped = [k for k in self._lazy if k == key or _is_under(k, key)]
+            if len(dropped) > 0:
+                for k in dropped:
+                    del self._lazy[k]
+                self._lazy_prefixes = {p for k in self._lazy for p in ("", *get_ancestors(k))}
+
+    def _track(self, key: str, value: Any) -> None:
+        """Add a value to the graph of interpolations, if it has interpolations.
+
+        The graph (and the module that implements it) is created only for configs
+        that have interpolations.
+
+        Args:
+            key: The dotted key of the value.
+            value: The value.
+        """
+        if isinstance(value, str) and INTERPOLATION_START in value:
+            if self._interpolations is None:
+                from hesiod.cfg.interpolation import InterpolationGraph
+
+                self._interpolations = InterpolationGraph(self.load_lazy)
+            self._interpolations.track(key, value)
+
+    def _index_children(self, prefix: str, cfg: CFG_T) -> None:
+        """Add to the index all the values in a given config, recursively.
+
+        Args:
+            prefix: The dotted key of the config ("" for the root).
+            cfg: The config.
+        """
+        for k, v in cfg.items():
+            if not isinstance(k, str) or KEY_SEP in k:
+                continue
+            key = f"{prefix}{KEY_SEP}{k}" if prefix else k
+            self.index[key] = v
+            self._track(key, v)
+            if isinstance(v, dict):
+                self._index_children(key, v)
+
+    def _unindex_children(self, prefix: str, cfg: CFG_T) -> None:
+        """Remove from the index all the values in a given config, recursively.
+
+        Args:
+            prefix: The dotted key of the config ("" for the root).
+            cfg: The config.
+        """
+        for k, v in cfg.items():
+            if not isinstance(k, str) or KEY_SEP in k:
+                continue
+            key = f"{prefix}{KEY_SEP}{k}" if prefix else k
+            self.index.pop(key, None)
+            self._checked_types.pop(key, None)
+            if self._interpolations is not None:
+                self._interpolations.untrack(key)
+            if isinstance(v, dict):
+                self._unindex_children(key, v)
+
+
+def _is_under(key: str, prefix: str) -> bool:
+    """Check whether a dotted key is a descendant of another one.
+
+    Args:
+        key: The dotted key.
+        prefix: The dotted key of the possible ancestor ("" for the root).
+
+    Returns:
+        True if the key is a descendant of the prefix, False otherwise.
+    """
+    return prefix == "" or key.startswith(prefix + KEY_SEP)
@@ -0,0 +1,485 @@
+import os
+import select
+import struct
+import sys
+import threading
+import warnings
+from contextvars import copy_context
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from hesiod.cfg.cfghandler import BASE_KEY, BaseResolver, ConfigHandler, LazyBaseConfigs
+from hesiod.cfg.cfgparser import CFG_T
+from hesiod.cfg.cfgstore import KEY_SEP, ConfigStore
+
+CFG_DIFF_T = Dict[str, Tuple[Any, Any]]
+STAT_T = Optional[Tuple[int, int]]
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+INOTIFY_EVENT_FORMAT = "iIII"
+INOTIFY_EVENT_SIZE = struct.calcsize(INOTIFY_EVENT_FORMAT)
+INOTIFY_READ_SIZE = 64 * 1024
+
+SETTLE_TIME = 0.05
+
+
+class _Missing:
+    def __repr__(self) -> str:
+        return "<missing>"
+
+
+MISSING: Any = _Missing()
+
+
+def diff_cfgs(old: Any, new: Any, prefix: str = "") -> CFG_DIFF_T:
+    """Compare two configs and collect the values that changed.
+
+    Args:
+        old: The old config (or value).
+        new: The new config (or value).
+        prefix: The dotted key of the compared configs ("" for the root).
+
+    Returns:
+        A dictionary that maps the dotted key of each changed value to the pair
+        (old value, new value). ``MISSING`` is used for keys that were added or removed.
+    """
+    old_is_dict = isinstance(old, dict)
+    new_is_dict = isinstance(new, dict)
+    if old_is_dict and new is MISSING:
+        new, new_is_dict = {}, True
+    elif new_is_dict and old is MISSING:
+        old, old_is_dict = {}, True
+
+    if old_is_dict and new_is_dict:
+        diff: CFG_DIFF_T = {}
+        for k in list(old) + [k for k in new if k not in old]:
+            key = f"{prefix}{KEY_SEP}{k}" if prefix else str(k)
+            diff.update(diff_cfgs(old.get(k, MISSING), new.get(k, MISSING), key))
+        return diff
+
+    if old is new or (type(old) is type(new) and old == new):
+        return {}
+    return {prefix: (old, new)}
+
+
+class _InotifyMonitor:
+    def __init__(self) -> None:
+        """Create a monitor that waits for changes with inotify.
+
+        Directories are watched instead of files, so that files replaced by
+        renaming a new file over them (as many editors do) are still detected.
+
+        Raises:
+            OSError: If inotify is not available.
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is available only on Linux.")
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available.")
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed.")
+        self._libc = libc
+        self._fd = fd
+        self._wake_r, self._wake_w = os.pipe()
+        self._dirs: Dict[int, Path] = {}
+        self._watched: Set[Path] = set()
+
+    def watch(self, files: Iterable[Path]) -> None:
+        """Start watching the directories that contain the given files.
+
+        Args:
+            files: The files to watch.
+        """
+        import ctypes
+
+        for f in files:
+            cfg_dir = Path(os.path.abspath(f)).parent
+            if cfg_dir in self._watched:
+                continue
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(cfg_dir), IN_WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"Cannot watch {cfg_dir}.")
+            self._dirs[wd] = cfg_dir
+            self._watched.add(cfg_dir)
+
+    def wait(self, timeout: float) -> Set[Path]:
+        """Wait for changes in the watched directories.
+
+        Args:
+            timeout: The maximum time to wait, in seconds.
+
+        Returns:
+            The absolute paths of the files that changed.
+        """
+        changed: Set[Path] = set()
+        ready, _, _ = select.select([self._fd, self._wake_r], [], [], timeout)
+        while self._fd in ready:
+            try:
+                data = os.read(self._fd, INOTIFY_READ_SIZE)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset + INOTIFY_EVENT_SIZE <= len(data):
+                wd, _, _, length = struct.unpack_from(INOTIFY_EVENT_FORMAT, data, offset)
+                offset += INOTIFY_EVENT_SIZE
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if wd in self._dirs and name:
+                    changed.add(self._dirs[wd] / os.fsdecode(name))
+            ready, _, _ = select.select([self._fd], [], [], SETTLE_TIME)
+        return changed
+
+    def interrupt(self) -> None:
+        """Wake up a thread waiting for changes."""
+        os.write(self._wake_w, b"\0")
+
+    def close(self) -> None:
+        """Stop watching and release the inotify instance."""
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+
+class _PollingMonitor:
+    def __init__(self) -> None:
+        """Create a monitor that detects changes by polling modification times and sizes."""
+        self._stats: Dict[Path, STAT_T] = {}
+        self._stop = threading.Event()
+
+    @staticmethod
+    def get_stat(cfg_file: Path) -> STAT_T:
+        """Get the modification time and the size of a file.
+
+        Args:
+            cfg_file: The path to the file.
+
+        Returns:
+            The modification time in nanoseconds and the size or None if the file does not exist.
+        """
+        try:
+            st = os.stat(cfg_file)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def watch(self, files: Iterable[Path]) -> None:
+        """Start watching the given files.
+
+        Args:
+            files: The files to watch.
+        """
+        for f in files:
+            cfg_file = Path(os.path.abspath(f))
+            if cfg_file not in self._stats:
+                self._stats[cfg_file] = _PollingMonitor.get_stat(cfg_file)
+
+    def wait(self, timeout: float) -> Set[Path]:
+        """Wait for the given time and then check the watched files.
+
+        Args:
+            timeout: The time to wait, in seconds.
+
+        Returns:
+            The absolute paths of the files that changed.
+        """
+        self._stop.wait(timeout)
+        changed: Set[Path] = set()
+        for cfg_file, old_stat in self._stats.items():
+            new_stat = _PollingMonitor.get_stat(cfg_file)
+            if new_stat != old_stat:
+                self._stats[cfg_file] = new_stat
+                changed.add(cfg_file)
+        return changed
+
+    def interrupt(self) -> None:
+        """Wake up a thread waiting for changes."""
+        self._stop.set()
+
+    def close(self) -> None:
+        """Stop watching."""
+
+
+class ConfigWatcher:
+    def __init__(
+        self,
+        run_cfg_file: Path,
+        base_cfg_dir: Path,
+        get_store: Callable[[], ConfigStore],
+        swap_store: Callable[[ConfigStore], None],
+        on_change: Optional[Callable[[CFG_DIFF_T], None]] = None,
+        interval: float = 1.0,
+        use_inotify: bool = True,
+    ) -> None:
+        """Create a watcher that reloads a run config when its files change.
+
+        The watcher tracks the run file and every base file that was loaded to resolve
+        it. When one of them changes, only that file is parsed again: the bases that
+        depend on it are invalidated and only the subtrees of the run config that
+        reference them are resolved again, while all the other values are reused.
+        The new config is built in a new store, that is then swapped atomically with
+        the current one, so that readers always see a consistent config.
+
+        Values set as overrides (e.g. from the command line) are applied again on top of
+        the reloaded config. Values set at runtime through ``set_value`` are recorded as
+        overrides as well, so they are kept even when the reloaded files change them.
+
+        Changes are detected with inotify where available and by polling the modification
+        time of the files otherwise.
+
+        Args:
+            run_cfg_file: The path to the run config file.
+            base_cfg_dir: The path to the base configs directory.
+            get_store: A function that returns the current store.
+            swap_store: A function that replaces the current store with the given one.
+            on_change: A function called with the diff of the changed values every time
+                that the config is reloaded (optional). It is called from the watcher thread.
+            interval: The polling interval, in seconds (default: 1.0).
+            use_inotify: A flag that indicates whether to use inotify, if available
+                (default: True).
+        """
+        self.run_cfg_file = run_cfg_file
+        self.base_cfgs = LazyBaseConfigs(base_cfg_dir)
+        self.resolver = BaseResolver(self.base_cfgs)
+        self.get_store = get_store
+        self.swap_store = swap_store
+        self.on_change = on_change
+        self.interval = interval
+        self.use_inotify = use_inotify
+        self.overrides: Dict[str, Any] = {}
+        self._raw_cfg: CFG_T = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._monitor: Any = None
+        self._monitor_lock = threading.Lock()
+
+    def load(self) -> CFG_T:
+        """Load the run config and resolve its bases.
+
+        Returns:
+            The resolved config.
+        """
+        self._raw_cfg = ConfigHandler.load_cfg_file(self.run_cfg_file)
+        return self.resolver.resolve(self._raw_cfg)
+
+    def set_value(self, key: str, value: Any) -> None:
+        """Set a value in the current store and keep it across reloads.
+
+        Args:
+            key: The dotted key of the value.
+            value: The value.
+        """
+        with self._lock:
+            self.get_store().set(key, value)
+            self.overrides.pop(key, None)
+            self.overrides[key] = value
+
+    def get_tracked_files(self) -> List[Path]:
+        """Get the files tracked by the watcher.
+
+        Returns:
+            The paths to the run file and to the base files loaded so far.
+        """
+        return [self.run_cfg_file] + self.base_cfgs.get_loaded_files()
+
+    def start(self) -> None:
+        """Start watching files in a background thread.
+
+        The thread runs in a copy of the current context, so that reloads use the same
+        persistent cache of config files (see ``ConfigHandler.set_cache``).
+        """
+        if self._thread is not None:
+            return
+        self._monitor = None
+        if self.use_inotify:
+            try:
+                self._monitor = _InotifyMonitor()
+            except OSError:
+                self._monitor = None
+        if self._monitor is None:
+            self._monitor = _PollingMonitor()
+        self._watch_files()
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=copy_context().run, args=(self._run,), name="hesiod-cfg-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching files and wait for the background thread to finish."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        with self._monitor_lock:
+            self._monitor.interrupt()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        """Wait for changes and reload the config until the watcher is stopped."""
+        try:
+            while not self._stop.is_set():
+                changed_files = self._monitor.wait(self.interval)
+                if len(changed_files) > 0 and not self._stop.is_set():
+                    try:
+                        self.reload(changed_files)
+                    except Exception as e:
+                        warnings.warn(f"Config reload failed: {e}")
+                    else:
+                        self._watch_files()
+        finally:
+            self._monitor.close()
+
+    def _watch_files(self) -> None:
+        """Watch the tracked files, falling back to polling if inotify cannot watch them.
+
+        Adding inotify watches can fail even when inotify is available (e.g. with
+        ``ENOSPC`` when the ``max_user_watches`` limit is reached). In that case the
+        inotify monitor is closed and replaced with a polling monitor.
+        """
+        files = self.get_tracked_files()
+        try:
+            self._monitor.watch(files)
+        except OSError as e:
+            if not isinstance(self._monitor, _InotifyMonitor):
+                raise
+            warnings.warn(f"Cannot watch config files with inotify, polling them instead: {e}")
+            monitor = _PollingMonitor()
+            monitor.watch(files)
+            with self._monitor_lock:
+                self._monitor.close()
+                self._monitor = monitor
+
+    def reload(self, changed_files: Iterable[Path]) -> CFG_DIFF_T:
+        """Reload the config after some files changed.
+
+        Args:
+            changed_files: The paths to the files that changed. Files that are not
+                tracked are ignored.
+
+        Returns:
+            The diff of the values that changed (empty if nothing changed).
+        """
+        with self._lock:
+            subtrees = self._reparse(changed_files)
+
+            old_store = self.get_store()
+            new_store = ConfigStore(old_store.cfg, index=dict(old_store.index))
+            for key, raw_cfg in subtrees:
+                if key == "":
+                    new_store = ConfigStore(self.resolver.resolve(raw_cfg))
+                else:
+                    new_store.set(key, self.resolver.resolve(raw_cfg))
+            if len(subtrees) > 0:
+                for key, value in self.overrides.items():
+                    new_store.set(key, value)
+
+            diff: CFG_DIFF_T = {}
+            for key, _ in subtrees:
+                old_value = old_store.index.get(key, MISSING) if key else old_store.cfg
+                new_value = new_store.index.get(key, MISSING) if key else new_store.cfg
+                diff.update(diff_cfgs(old_value, new_value, key))
+
+            if len(diff) > 0:
+                self.swap_store(new_store)
+
+        if len(diff) > 0 and self.on_change is not None:
+            self.on_change(diff)
+        return diff
+
+    def _reparse(self, changed_files: Iterable[Path]) -> List[Tuple[str, CFG_T]]:
+        """Parse again the changed files and invalidate the bases that depend on them.
+
+        Args:
+            changed_files: The paths to the files that changed.
+
+        Returns:
+            The dotted keys and the unresolved configs of the subtrees of the run
+            config that must be resolved again.
+        """
+        tracked = {Path(os.path.abspath(f)): f for f in self.get_tracked_files()}
+        changed_paths = {Path(os.path.abspath(f)) for f in changed_files}
+        changed = [tracked[p] for p in changed_paths if p in tracked]
+
+        run_changed = False
+        changed_ids: Set[str] = set()
+        for cfg_file in changed:
+            if cfg_file == self.run_cfg_file:
+                run_changed = True
+            elif self.base_cfgs.reload(cfg_file):
+                changed_ids.update(self.get_base_ids_in(Path(os.path.abspath(cfg_file))))
+
+        affected_ids = self.resolver.get_dependents(changed_ids)
+        self.resolver.invalidate(affected_ids)
+
+        if run_changed:
+            self._raw_cfg = ConfigHandler.load_cfg_file(self.run_cfg_file)
+            return [("", self._raw_cfg)]
+        return ConfigWatcher.find_subtrees(self._raw_cfg, affected_ids)
+
+    def get_base_ids_in(self, cfg_file: Path) -> Set[str]:
+        """Get the resolved bases defined in a given file.
+
+        Args:
+            cfg_file: The absolute path to the file.
+
+        Returns:
+            The ids of the resolved bases defined in the file or in a directory
+            that contains it.
+        """
+        base_ids: Set[str] = set()
+        for base_id in self.resolver.dependencies:
+            path = self.base_cfgs.get_path(base_id)
+            if path is None:
+                continue
+            path = Path(os.path.abspath(path))
+            if path == cfg_file or path in cfg_file.parents:
+                base_ids.add(base_id)
+        return base_ids
+
+    @staticmethod
+    def find_subtrees(
+        cfg: CFG_T,
+        base_ids: Set[str],
+        prefix: str = "",
+        base_key: str = BASE_KEY,
+    ) -> List[Tuple[str, CFG_T]]:
+        """Find the outermost subtrees of a config that reference one of the given bases.
+
+        Args:
+            cfg: The unresolved config.
+            base_ids: The ids of the bases.
+            prefix: The dotted key of the given config ("" for the root).
+            base_key: The string used as base key.
+
+        Returns:
+            The dotted keys and the unresolved configs of the subtrees.
+        """
+        base_id = cfg.get(base_key)
+        if isinstance(base_id, str) and base_id in base_ids:
+            return [(prefix, cfg)]
+
+        subtrees: List[Tuple[str, CFG_T]] = []
+        for k, v in cfg.items():
+            if not isinstance(v, dict):
+                continue
+            if not isinstance(k, str) or KEY_SEP in k:
+                # values under keys that cannot be addressed with dotted keys
+                # are replaced together with the whole config that contains them
+                if not ConfigHandler.get_base_ids(v, base_key).isdisjoint(base_ids):
+                    return [(prefix, cfg)]
+                continue
+            key = f"{prefix}{KEY_SEP}{k}" if prefix else k
+            subtrees.extend(ConfigWatcher.find_subtrees(v, base_ids, key, base_key))
+        return subtrees
@@ -0,0 +1,86 @@
+import atexit
+import threading
+import warnings
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+
+from hesiod.cfg.cfghandler import ConfigHandler
+from hesiod.cfg.cfgparser import CFG_T
+from hesiod.cfg.readonly import thaw
+
+CFG_OR_GETTER_T = Union[CFG_T, Callable[[], CFG_T]]
+
+_PENDING: List[threading.Thread] = []
+_PENDING_LOCK = threading.Lock()
+
+
+def _write(cfg: CFG_OR_GETTER_T, cfg_file: Path, fsync: bool) -> None:
+    """Write a config atomically, warning about failures.
+
+    Args:
+        cfg: The config to be saved (possibly read-only) or a function that returns it.
+        cfg_file: The path to the output file.
+        fsync: A flag that indicates whether the file should be flushed to disk.
+    """
+    try:
+        if callable(cfg):
+            cfg = cfg()
+        ConfigHandler.save_cfg(thaw(cfg), cfg_file, atomic=True, fsync=fsync)
+    except Exception as e:
+        warnings.warn(f"Cannot save {cfg_file}: {e}")
+
+
+def save_cfg_in_background(
+    cfg: CFG_OR_GETTER_T,
+    cfg_file: Path,
+    fsync: bool = False,
+) -> threading.Thread:
+    """Save a config atomically in a background thread.
+
+    The file is written to a temporary file that is then renamed, so it is never seen
+    partially written. Pending writes are completed before the interpreter exits (see
+    ``wait_for_writes``), but not if the process is killed: in that case, the file is
+    just missing. Failures are reported as warnings.
+
+    Args:
+        cfg: The config to be saved or a function that returns it, that is called in
+            the background thread. The config must not be modified while it is being
+            saved (read-only configs are safe).
+        cfg_file: The path to the output file.
+        fsync: A flag that indicates whether the file should be flushed to disk
+            (default: False).
+
+    Returns:
+        The thread that writes the file.
+    """
+    thread = threading.Thread(
+        target=_write,
+        args=(cfg, cfg_file, fsync),
+        name=f"hesiod-save-{cfg_file.name}",
+    )
+    with _PENDING_LOCK:
+        _PENDING[:] = [t for t in _PENDING if t.is_alive()]
+        _PENDING.append(thread)
+    thread.start()
+    return thread
+
+
+def wait_for_writes(timeout: Optional[float] = None) -> bool:
+    """Wait until all the configs being saved in background are written.
+
+    Args:
+        timeout: The maximum time to wait for each write, in seconds (default: no limit).
+
+    Returns:
+        True if all the writes are completed, False otherwise.
+    """
+    with _PENDING_LOCK:
+        pending = list(_PENDING)
+    for thread in pending:
+        thread.join(timeout)
+    with _PENDING_LOCK:
+        _PENDING[:] = [t for t in _PENDING if t.is_alive()]
+        return len(_PENDING) == 0
+
+
+atexit.register(wait_for_writes)
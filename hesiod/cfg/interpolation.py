@@ -0,0 +1,504 @@
+import functools
+import os
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+from hesiod.cfg.cfgparser import CFG_T
+from hesiod.cfg.cfgstore import INTERPOLATION_START, KEY_SEP, get_ancestors
+from hesiod.cfg.layers import parse_value
+from hesiod.cfg.readonly import ReadOnlyDict, freeze
+
+INTERPOLATION_END = "}"
+INTERPOLATION_ESCAPE = "\\"
+RESOLVER_SEP = ":"
+RESOLVER_ARGS_SEP = ","
+
+
+class Reference(NamedTuple):
+    """A reference to another config value, as in ``${key.subkey}``."""
+
+    key: str
+
+
+class ResolverCall(NamedTuple):
+    """A call to a resolver, as in ``${name:arg1,arg2}``.
+
+    Each argument is a template itself, so it can contain other interpolations.
+    """
+
+    name: str
+    args: Tuple[Tuple[Any, ...], ...]
+
+
+TEMPLATE_T = Tuple[Union[str, Reference, ResolverCall], ...]
+LOOKUP_T = Callable[[str], Any]
+
+_MISSING = object()
+
+
+def _env(name: Any, default: Any = _MISSING) -> Any:
+    """Get the value of an environment variable, parsed as python literal or plain string.
+
+    Args:
+        name: The name of the variable.
+        default: The value returned if the variable is not set (optional).
+
+    Raises:
+        ValueError: If the variable is not set and no default is given.
+
+    Returns:
+        The value of the variable.
+    """
+    value = os.environ.get(str(name))
+    if value is not None:
+        return parse_value(value)
+    if default is _MISSING:
+        raise ValueError(f"The environment variable {name} is not set.")
+    return default
+
+
+_RESOLVERS: Dict[str, Callable[..., Any]] = {"env": _env}
+
+
+def register_resolver(name: str, resolver: Callable[..., Any]) -> None:
+    """Register a resolver that computes config values, as in ``${name:arg1,arg2}``.
+
+    The resolver is called with the values of the arguments: arguments that are a single
+    interpolation (as in ``${mul:${net.width},2}``) are passed as they are, while the
+    others are parsed as python literals or plain strings. The resolver is called at
+    most once per config value, the first time that the value is requested.
+
+    Args:
+        name: The name of the resolver.
+        resolver: The function that computes the value.
+
+    Raises:
+        ValueError: If the name is empty or contains one of the chars ":", "{", "}", "$".
+    """
+    if name == "" or any(c in name for c in ":{}$"):
+        raise ValueError(f"Invalid name for a resolver: {name!r}.")
+    _RESOLVERS[name] = resolver
+
+
+def _parse_parts(text: str, pos: int, stops: str) -> Tuple[TEMPLATE_T, int]:
+    """Parse the parts of a template, until the end of the text or one of the given chars.
+
+    Args:
+        text: The text to parse.
+        pos: The position where parsing starts.
+        stops: The chars that end the template.
+
+    Returns:
+        The parsed template and the position where parsing ended.
+    """
+    parts: List[Union[str, Reference, ResolverCall]] = []
+    literal: List[str] = []
+    while pos < len(text) and text[pos] not in stops:
+        if text.startswith(INTERPOLATION_ESCAPE + INTERPOLATION_START, pos):
+            literal.append(INTERPOLATION_START)
+            pos += len(INTERPOLATION_ESCAPE + INTERPOLATION_START)
+        elif text.startswith(INTERPOLATION_START, pos):
+            if len(literal) > 0:
+                parts.append("".join(literal))
+                literal = []
+            node, pos = _parse_node(text, pos + len(INTERPOLATION_START))
+            parts.append(node)
+        else:
+            literal.append(text[pos])
+            pos += 1
+
+    if len(literal) > 0:
+        parts.append("".join(literal))
+    return tuple(parts), pos
+
+
+def _parse_node(text: str, pos: int) -> Tuple[Union[Reference, ResolverCall], int]:
+    """Parse an interpolation, starting right after its opening "${".
+
+    Args:
+        text: The text to parse.
+        pos: The position where parsing starts.
+
+    Raises:
+        ValueError: If the interpolation is not terminated or not valid.
+
+    Returns:
+        The parsed interpolation and the position right after its closing "}".
+    """
+    end = pos
+    while end < len(text) and text[end] not in RESOLVER_SEP + INTERPOLATION_END + "${":
+        end += 1
+    name = text[pos:end].strip()
+
+    if end >= len(text):
+        raise ValueError(f"Unterminated interpolation in {text!r}.")
+    if name == "" or text[end] not in RESOLVER_SEP + INTERPOLATION_END:
+        raise ValueError(f"Invalid interpolation in {text!r}.")
+    if text[end] == INTERPOLATION_END:
+        return Reference(name), end + 1
+
+    args: List[TEMPLATE_T] = []
+    pos = end + 1
+    while True:
+        arg, pos = _parse_parts(text, pos, RESOLVER_ARGS_SEP + INTERPOLATION_END)
+        args.append(arg)
+        if pos >= len(text):
+            raise ValueError(f"Unterminated interpolation in {text!r}.")
+        pos += 1
+        if text[pos - 1] == INTERPOLATION_END:
+            return ResolverCall(name, tuple(args)), pos
+
+
+def parse_template(text: str) -> TEMPLATE_T:
+    """Parse a string with interpolations.
+
+    Interpolations are either references to other config values, as in ``${key.subkey}``,
+    or calls to resolvers, as in ``${env:HOME}`` or ``${env:DATA_DIR,/data}``. The chars
+    "${" can be escaped as "\\${".
+
+    Args:
+        text: The string to parse.
+
+    Raises:
+        ValueError: If one of the interpolations is not valid.
+
+    Returns:
+        The parsed template, as a sequence of literal strings and interpolations.
+    """
+    template, _ = _parse_parts(text, 0, "")
+    return template
+
+
+def get_references(template: TEMPLATE_T) -> Iterator[str]:
+    """Get the keys referenced by a template, including those in resolver arguments.
+
+    Args:
+        template: The template.
+
+    Returns:
+        An iterator over the referenced keys.
+    """
+    for part in template:
+        if isinstance(part, Reference):
+            yield part.key
+        elif isinstance(part, ResolverCall):
+            for arg in part.args:
+                yield from get_references(arg)
+
+
+def _evaluate_node(node: Union[Reference, ResolverCall], lookup: LOOKUP_T) -> Any:
+    """Evaluate a single interpolation.
+
+    A reference to a key that is not in the config is left as it is, so that strings
+    such as shell commands (``echo ${HOME}``) keep their text.
+
+    Args:
+        node: The interpolation.
+        lookup: The function that gets the (resolved) value for a referenced key,
+            or ``_MISSING`` if the key is not in the config.
+
+    Raises:
+        ValueError: If the interpolation calls an unknown resolver.
+
+    Returns:
+        The value of the interpolation.
+    """
+    if isinstance(node, Reference):
+        value = lookup(node.key)
+        if value is _MISSING:
+            return f"{INTERPOLATION_START}{node.key}{INTERPOLATION_END}"
+        return value
+
+    resolver = _RESOLVERS.get(node.name)
+    if resolver is None:
+        raise ValueError(f"Unknown resolver {node.name!r}.")
+
+    args = []
+    for arg in node.args:
+        if len(arg) == 1 and not isinstance(arg[0], str):
+            args.append(_evaluate_node(arg[0], lookup))
+        else:
+            args.append(parse_value(str(evaluate(arg, lookup)).strip()))
+    return resolver(*args)
+
+
+def evaluate(template: TEMPLATE_T, lookup: LOOKUP_T) -> Any:
+    """Evaluate a template.
+
+    A template made of a single interpolation evaluates to the value of the
+    interpolation, whatever its type. Otherwise, the values of the interpolations
+    are formatted as strings and joined with the literal parts.
+
+    Args:
+        template: The template.
+        lookup: The function that gets the (resolved) value for a referenced key,
+            or ``_MISSING`` if the key is not in the config.
+
+    Returns:
+        The value of the template.
+    """
+    if len(template) == 1 and not isinstance(template[0], str):
+        return _evaluate_node(template[0], lookup)
+    return "".join(p if isinstance(p, str) else str(_evaluate_node(p, lookup)) for p in template)
+
+
+def _discard(dependents: Dict[str, Set[str]], key: str, dependent: str) -> None:
+    """Remove a dependent from the dependents of a key.
+
+    Args:
+        dependents: The dependents, indexed by key.
+        key: The key.
+        dependent: The dependent to remove.
+    """
+    keys = dependents.get(key)
+    if keys is not None:
+        keys.discard(dependent)
+        if len(keys) == 0:
+            del dependents[key]
+
+
+class InterpolationGraph:
+    def __init__(self, load: Optional[Callable[[str], None]] = None) -> None:
+        """Create the dependency graph of the interpolated values of a config.
+
+        For each config value with interpolations, the graph keeps the parsed template
+        and the keys that it references, so that each value is parsed once, evaluated
+        once on first access and cached. When a value is set, only the cached values
+        that depend on it (directly or through other interpolated values) are dropped.
+
+        A reference to a dictionary depends on all the values in it, while a reference
+        to a value depends also on the dictionaries that contain it.
+
+        Args:
+            load: A function called with each referenced key before looking it up,
+                to load it if the config is lazy (optional).
+        """
+        self.load = load
+        self.templates: Dict[str, TEMPLATE_T] = {}
+        self.references: Dict[str, Set[str]] = {}
+        self._dependents: Dict[str, Set[str]] = {}
+        self._dependents_under: Dict[str, Set[str]] = {}
+        self._prefixes: Dict[str, int] = {}
+        self._resolved: Dict[str, Any] = {}
+
+    def track(self, key: str, text: str) -> None:
+        """Add a value with interpolations to the graph.
+
+        Args:
+            key: The dotted key of the value.
+            text: The value.
+
+        Raises:
+            ValueError: If one of the interpolations is not valid.
+        """
+        try:
+            template = parse_template(text)
+        except ValueError as e:
+            raise ValueError(f"Invalid interpolation for the key {key}: {e}") from e
+
+        references = set(get_references(template))
+        self.templates[key] = template
+        self.references[key] = references
+        for ref in references:
+            self._dependents.setdefault(ref, set()).add(key)
+            for prefix in (*get_ancestors(ref), ref):
+                self._dependents_under.setdefault(prefix, set()).add(key)
+        for prefix in ("", *get_ancestors(key)):
+            self._prefixes[prefix] = self._prefixes.get(prefix, 0) + 1
+
+    def untrack(self, key: str) -> None:
+        """Remove a value from the graph, if it is in it.
+
+        Args:
+            key: The dotted key of the value.
+        """
+        if self.templates.pop(key, None) is None:
+            return
+
+        for ref in self.references.pop(key):
+            _discard(self._dependents, ref, key)
+            for prefix in (*get_ancestors(ref), ref):
+                _discard(self._dependents_under, prefix, key)
+        for prefix in ("", *get_ancestors(key)):
+            self._prefixes[prefix] -= 1
+            if self._prefixes[prefix] == 0:
+                del self._prefixes[prefix]
+
+    def invalidate(self, key: str) -> Set[str]:
+        """Drop the cached values that depend on a value that changed.
+
+        Args:
+            key: The dotted key of the value that changed.
+
+        Returns:
+            The dotted keys whose cached values were dropped.
+        """
+        stale: Set[str] = set()
+        frontier = [key]
+        while len(frontier) > 0:
+            changed = frontier.pop()
+            dependents = set(self._dependents_under.get(changed, ()))
+            for ancestor in get_ancestors(changed):
+                dependents.update(self._dependents.get(ancestor, ()))
+            for dependent in dependents - stale:
+                stale.add(dependent)
+                frontier.append(dependent)
+
+        dropped = {"", key}
+        for k in stale | {key}:
+            dropped.add(k)
+            dropped.update(get_ancestors(k))
+        dropped.update(k for k in self._resolved if k.startswith(key + KEY_SEP))
+        for k in dropped:
+            self._resolved.pop(k, None)
+        return dropped
+
+    def check_cycles(self) -> None:
+        """Check that interpolated values do not depend on themselves.
+
+        Raises:
+            ValueError: If some interpolated values depend on each other in a cycle.
+        """
+        done: Set[str] = set()
+        for key in self.templates:
+            self._visit(key, [], done)
+
+    def _visit(self, key: str, path: List[str], done: Set[str]) -> None:
+        """Visit the interpolated values that a value depends on, depth first.
+
+        Args:
+            key: The dotted key of the value.
+            path: The values visited to reach this one.
+            done: The values whose dependencies have been visited already.
+
+        Raises:
+            ValueError: If the value depends on itself.
+        """
+        if key in done:
+            return
+        if key in path:
+            cycle = " -> ".join(path[path.index(key) :] + [key])
+            raise ValueError(f"Config interpolations have a cycle: {cycle}.")
+
+        path.append(key)
+        for ref in self.references[key]:
+            if ref in self.templates:
+                self._visit(ref, path, done)
+            elif ref in self._prefixes:
+                for k in [k for k in self.templates if k.startswith(ref + KEY_SEP)]:
+                    self._visit(k, path, done)
+        path.pop()
+        done.add(key)
+
+    def resolve(self, key: str, value: Any, index: Dict[str, Any]) -> Any:
+        """Resolve a config value.
+
+        Args:
+            key: The dotted key of the value.
+            value: The value, as stored in the index of the config.
+            index: The index of the config.
+
+        Raises:
+            ValueError: If an interpolation calls an unknown resolver or depends on itself.
+
+        Returns:
+            The resolved value (the given value, if it has no interpolations).
+        """
+        if key not in self.templates and key not in self._prefixes:
+            return value
+        return self._resolve(key, value, index, ())
+
+    def resolve_cfg(self, cfg: ReadOnlyDict, index: Dict[str, Any]) -> ReadOnlyDict:
+        """Resolve a whole config.
+
+        Args:
+            cfg: The config.
+            index: The index of the config.
+
+        Raises:
+            ValueError: If an interpolation calls an unknown resolver or depends on itself.
+
+        Returns:
+            The resolved config.
+        """
+        return self.resolve("", cfg, index)
+
+    def _resolve(self, key: str, value: Any, index: Dict[str, Any], stack: Tuple[str, ...]) -> Any:
+        """Resolve a value that has interpolations or contains values with interpolations.
+
+        Args:
+            key: The dotted key of the value ("" for the root).
+            value: The value, as stored in the index of the config.
+            index: The index of the config.
+            stack: The values being resolved, to detect cycles.
+
+        Raises:
+            ValueError: If an interpolation calls an unknown resolver or depends on itself.
+
+        Returns:
+            The resolved value.
+        """
+        resolved = self._resolved.get(key, _MISSING)
+        if resolved is not _MISSING:
+            return resolved
+
+        if key in stack:
+            cycle = " -> ".join(stack[stack.index(key) :] + (key,))
+            raise ValueError(f"Config interpolations have a cycle: {cycle}.")
+        stack = stack + (key,)
+
+        if key in self.templates:
+            lookup = functools.partial(self._lookup, index, stack)
+            resolved = freeze(evaluate(self.templates[key], lookup))
+        else:
+            resolved = ReadOnlyDict(self._resolve_children(key, value, index, stack))
+
+        self._resolved[key] = resolved
+        return resolved
+
+    def _lookup(self, index: Dict[str, Any], stack: Tuple[str, ...], ref: str) -> Any:
+        """Get the resolved value referenced by an interpolation.
+
+        Args:
+            index: The index of the config.
+            stack: The values being resolved, to detect cycles.
+            ref: The referenced dotted key.
+
+        Returns:
+            The resolved value or ``_MISSING`` if the referenced key is not in the config.
+        """
+        if self.load is not None:
+            self.load(ref)
+        if ref not in index:
+            return _MISSING
+        value = index[ref]
+        if ref not in self.templates and ref not in self._prefixes:
+            return value
+        return self._resolve(ref, value, index, stack)
+
+    def _resolve_children(
+        self,
+        prefix: str,
+        cfg: CFG_T,
+        index: Dict[str, Any],
+        stack: Tuple[str, ...],
+    ) -> Iterator[Tuple[Any, Any]]:
+        """Resolve the values of a dictionary.
+
+        Args:
+            prefix: The dotted key of the dictionary ("" for the root).
+            cfg: The dictionary.
+            index: The index of the config.
+            stack: The values being resolved, to detect cycles.
+
+        Returns:
+            An iterator over the keys and the resolved values of the dictionary.
+        """
+        for k, v in cfg.items():
+            if not isinstance(k, str) or KEY_SEP in k:
+                yield k, v
+                continue
+            key = f"{prefix}{KEY_SEP}{k}" if prefix else k
+            if key in self.templates or key in self._prefixes:
+                yield k, self._resolve(key, v, index, stack)
+            else:
+                yield k, v
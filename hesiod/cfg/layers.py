@@ -0,0 +1,159 @@
+import os
+import re
+from ast import literal_eval
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from hesiod.cfg.cfgparser import CFG_T
+from hesiod.cfg.cfgstore import KEY_SEP
+from hesiod.cfg.readonly import ReadOnlyDict, freeze
+
+ARG_PATTERN = re.compile(r"^-*(?P<key>[^-=:]+)[=:]{1}(?P<value>.+)$")
+ENV_KEY_SEP = "__"
+
+
+def parse_value(value: str) -> Any:
+    """Parse a value given as string, as a python literal or as a plain string.
+
+    Args:
+        value: The value to parse.
+
+    Returns:
+        The parsed value.
+    """
+    try:
+        return literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+
+def parse_args(args: Iterable[str]) -> Dict[str, Any]:
+    """Parse config values given as command line args.
+
+    Each arg is expected with the format "{prefix}{key}{sep}{value}".
+    {prefix} is optional and can be any amount of the char "-".
+    {key} is a string but cannot contain the chars "-", "=" and ":".
+    {sep} is mandatory and can be one of "=", ":".
+    {value} is a string that can contain everything.
+
+    Args:
+        args: The args to be parsed.
+
+    Raises:
+        ValueError: If one of the given args is a not supported format.
+
+    Returns:
+        The parsed values, indexed by dotted key.
+    """
+    parsed: Dict[str, Any] = {}
+    for arg in args:
+        match = ARG_PATTERN.match(arg)
+        if match is None:
+            raise ValueError(f"One of the arg is in a not supported format {arg}.")
+        parsed[match.group("key")] = parse_value(match.group("value"))
+    return parsed
+
+
+def parse_env(prefix: str, environ: Optional[Mapping[str, str]] = None) -> Dict[str, Any]:
+    """Parse config values given as environment variables.
+
+    Variables are expected with the format "{prefix}{key}", where nested keys are
+    separated by a double underscore (as in ``HESIOD_net__lr`` for ``net.lr`` with
+    prefix ``HESIOD_``). Keys are case-sensitive. Values are parsed as python
+    literals or plain strings, as for command line args.
+
+    Args:
+        prefix: The prefix of the variables to parse.
+        environ: The environment variables (default: ``os.environ``).
+
+    Returns:
+        The parsed values, indexed by dotted key.
+    """
+    environ = os.environ if environ is None else environ
+    parsed: Dict[str, Any] = {}
+    for name, value in environ.items():
+        if name.startswith(prefix) and len(name) > len(prefix):
+            key = name[len(prefix) :].replace(ENV_KEY_SEP, KEY_SEP)
+            parsed[key] = parse_value(value)
+    return parsed
+
+
+def unflatten(values: Mapping[str, Any]) -> CFG_T:
+    """Build a nested config from values indexed by dotted key.
+
+    Later values take precedence: a value replaces the one set before for the same key
+    and, if needed, the values that are in the way of its path.
+
+    Args:
+        values: The values, indexed by dotted key.
+
+    Returns:
+        The nested config.
+    """
+    cfg: CFG_T = {}
+    for key, value in values.items():
+        *parents, last = key.split(KEY_SEP)
+        node = cfg
+        for k in parents:
+            if not isinstance(node.get(k), dict):
+                node[k] = {}
+            node = node[k]
+        node[last] = value
+    return cfg
+
+
+def flatten(cfg: Mapping[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Index the leaf values of a nested config by dotted key.
+
+    Args:
+        cfg: The nested config.
+        prefix: The prefix for the keys (default: "").
+
+    Returns:
+        The leaf values, indexed by dotted key.
+    """
+    values: Dict[str, Any] = {}
+    for key, value in cfg.items():
+        full_key = f"{prefix}{key}"
+        if isinstance(value, dict) and len(value) > 0:
+            values.update(flatten(value, f"{full_key}{KEY_SEP}"))
+        else:
+            values[full_key] = value
+    return values
+
+
+def merge_layers(layers: Sequence[Mapping[str, Any]]) -> ReadOnlyDict:
+    """Deep-merge config layers, with later layers taking precedence over earlier ones.
+
+    Dictionaries that are found at the same path in consecutive layers are merged key by
+    key; any other value replaces the values of the lower layers. Layers are merged in a
+    single pass, visiting each key of each layer once, and the merged config is built
+    directly as read-only: values that come from a single layer are frozen (or shared,
+    if they are already read-only) rather than copied and merged again.
+
+    Args:
+        layers: The layers, from the lowest to the highest precedence.
+
+    Returns:
+        The merged config.
+    """
+    layers = [layer for layer in layers if len(layer) > 0]
+    if len(layers) == 0:
+        return ReadOnlyDict()
+    if len(layers) == 1:
+        return freeze(layers[0])
+
+    merged: Dict[str, Any] = {}
+    for key in dict.fromkeys(k for layer in layers for k in layer):
+        values = [layer[key] for layer in layers if key in layer]
+        if not isinstance(values[-1], dict):
+            merged[key] = freeze(values[-1])
+            continue
+
+        dicts: List[Mapping[str, Any]] = []
+        for value in reversed(values):
+            if not isinstance(value, dict):
+                break
+            dicts.append(value)
+        merged[key] = merge_layers(dicts[::-1])
+
+    return ReadOnlyDict(merged)
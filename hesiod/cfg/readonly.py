@@ -0,0 +1,153 @@
+from copy import deepcopy
+from typing import Any, Dict, List, NoReturn, Sequence, Set, Tuple
+
+READ_ONLY_MSG = (
+    "Config values are read-only: use set_cfg() to change them or ask for a mutable copy."
+)
+
+
+def _read_only(*args: Any, **kwargs: Any) -> NoReturn:
+    raise TypeError(READ_ONLY_MSG)
+
+
+class ReadOnlyDict(Dict[str, Any]):
+    """A dictionary that cannot be modified.
+
+    ``ReadOnlyDict`` is a subclass of ``dict``, so it can be used wherever a dictionary
+    is expected (including type checks), but every method that would modify it raises
+    a ``TypeError``. Since it cannot change, copying it returns the dictionary itself.
+    """
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = __ior__ = _read_only
+
+    def __copy__(self) -> "ReadOnlyDict":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "ReadOnlyDict":
+        return self
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (ReadOnlyDict, (dict(self),))
+
+
+class ReadOnlyList(List[Any]):
+    """A list that cannot be modified.
+
+    ``ReadOnlyList`` is a subclass of ``list``, so it can be used wherever a list
+    is expected (including type checks), but every method that would modify it raises
+    a ``TypeError``. Since it cannot change, copying it returns the list itself.
+    """
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __copy__(self) -> "ReadOnlyList":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "ReadOnlyList":
+        return self
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (ReadOnlyList, (list(self),))
+
+
+class ReadOnlySet(Set[Any]):
+    """A set that cannot be modified.
+
+    ``ReadOnlySet`` is a subclass of ``set``, so it can be used wherever a set
+    is expected (including type checks), but every method that would modify it raises
+    a ``TypeError``. Since it cannot change, copying it returns the set itself.
+    """
+
+    add = discard = remove = pop = clear = update = _read_only
+    intersection_update = difference_update = symmetric_difference_update = _read_only
+    __ior__ = __iand__ = __isub__ = __ixor__ = _read_only
+
+    def __copy__(self) -> "ReadOnlySet":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "ReadOnlySet":
+        return self
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (ReadOnlySet, (set(self),))
+
+
+READ_ONLY_TYPES = (ReadOnlyDict, ReadOnlyList, ReadOnlySet)
+
+
+def freeze(value: Any) -> Any:
+    """Get a read-only version of the given value.
+
+    Dictionaries, lists and sets are converted recursively to their read-only
+    counterparts, while tuples are rebuilt with read-only items. Values that are
+    already read-only are returned as they are, without copying them.
+
+    Args:
+        value: The value to freeze.
+
+    Returns:
+        The read-only value.
+    """
+    if isinstance(value, READ_ONLY_TYPES):
+        return value
+    if isinstance(value, dict):
+        return ReadOnlyDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return ReadOnlyList(freeze(v) for v in value)
+    if isinstance(value, set):
+        return ReadOnlySet(value)
+    if type(value) is tuple:
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Get a mutable deep copy of the given value.
+
+    Read-only dictionaries, lists and sets are converted recursively to plain
+    dictionaries, lists and sets.
+
+    Args:
+        value: The value to thaw.
+
+    Returns:
+        The mutable copy of the value.
+    """
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [thaw(v) for v in value]
+    if isinstance(value, set):
+        return set(value)
+    if type(value) is tuple:
+        return tuple(thaw(v) for v in value)
+    return deepcopy(value)
+
+
+def replace_in(cfg: Dict[str, Any], keys: Sequence[str], value: Any) -> ReadOnlyDict:
+    """Get a read-only copy of a config with the value at the given path replaced.
+
+    Only the dictionaries along the path are copied: all the other values are
+    shared between the given config and the returned one. Missing dictionaries
+    along the path (or values that are not dictionaries) are replaced by new ones.
+
+    Args:
+        cfg: The config.
+        keys: The path to the value to replace, as a sequence of keys.
+        value: The new value (it should already be read-only).
+
+    Returns:
+        The new config.
+    """
+    new_cfg = dict(cfg)
+    key = keys[0]
+    if len(keys) == 1:
+        new_cfg[key] = value
+    else:
+        child = cfg.get(key)
+        if not isinstance(child, dict):
+            child = {}
+        new_cfg[key] = replace_in(child, keys[1:], value)
+    return ReadOnlyDict(new_cfg)
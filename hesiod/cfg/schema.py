@@ -0,0 +1,277 @@
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    get_type_hints,
+)
+
+from hesiod.cfg import cfgstore
+from hesiod.cfg.cfgstore import KEY_SEP, ConfigStore
+from hesiod.cfg.readonly import READ_ONLY_MSG
+
+_MISSING = object()
+
+
+class SchemaObject:
+    """The base class of the read-only objects built from configs validated with a schema.
+
+    A subclass with ``__slots__`` is generated for each schema, with one attribute per
+    field of the schema, so that values are read with plain attribute access.
+    """
+
+    __slots__: Tuple[str, ...] = ()
+
+    def __init__(self, *values: Any) -> None:
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise TypeError(READ_ONLY_MSG)
+
+    def __delattr__(self, name: str) -> None:
+        raise TypeError(READ_ONLY_MSG)
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, n) == getattr(other, n) for n in self.__slots__)
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{n}={getattr(self, n)!r}" for n in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+
+class SchemaField(NamedTuple):
+    """A field of a compiled schema."""
+
+    name: str
+    type: Any
+    schema: Optional["CompiledSchema"]
+    optional: bool
+    default: Any
+    default_factory: Optional[Callable[[], Any]]
+
+
+def _is_typed_dict(schema_type: Any) -> bool:
+    """Check whether a type is a ``TypedDict``.
+
+    Args:
+        schema_type: The type.
+
+    Returns:
+        True if the type is a ``TypedDict``, False otherwise.
+    """
+    return (
+        isinstance(schema_type, type)
+        and issubclass(schema_type, dict)
+        and hasattr(schema_type, "__total__")
+    )
+
+
+def _is_schema(schema_type: Any) -> bool:
+    """Check whether a type can be used as schema, i.e. it is a dataclass or a ``TypedDict``.
+
+    Args:
+        schema_type: The type.
+
+    Returns:
+        True if the type can be used as schema, False otherwise.
+    """
+    if _is_typed_dict(schema_type):
+        return True
+    try:
+        import dataclasses
+    except ImportError:  # python < 3.7 without the dataclasses backport
+        return False
+    return isinstance(schema_type, type) and dataclasses.is_dataclass(schema_type)
+
+
+def _unwrap_optional(field_type: Any) -> Tuple[Any, bool]:
+    """Get the type wrapped by ``Optional``, if the given type is optional.
+
+    Args:
+        field_type: The type.
+
+    Returns:
+        The wrapped type (or the type itself) and a flag that indicates whether
+        the type is optional.
+    """
+    if getattr(field_type, "__origin__", None) is Union:
+        args = [a for a in field_type.__args__ if a is not type(None)]  # noqa: E721
+        if len(args) == 1 and len(args) < len(field_type.__args__):
+            return args[0], True
+    return field_type, False
+
+
+def _get_fields(schema_type: Any) -> List[Tuple[str, Any, Any, Optional[Callable[[], Any]]]]:
+    """Get the fields of a schema with their types and default values.
+
+    Args:
+        schema_type: The schema.
+
+    Returns:
+        The name, the type, the default value and the default factory of each field.
+    """
+    hints = get_type_hints(schema_type)
+    if _is_typed_dict(schema_type):
+        required = getattr(schema_type, "__required_keys__", None)
+        if required is None:
+            required = set(hints) if schema_type.__total__ else set()
+        return [(n, t, _MISSING if n in required else None, None) for n, t in hints.items()]
+
+    import dataclasses
+
+    fields = []
+    for f in dataclasses.fields(schema_type):
+        default = _MISSING if f.default is dataclasses.MISSING else f.default
+        factory = None if f.default_factory is dataclasses.MISSING else f.default_factory
+        fields.append((f.name, hints[f.name], default, factory))
+    return fields
+
+
+class CompiledSchema:
+    def __init__(self, schema_type: Any) -> None:
+        """Create an empty compiled schema, whose fields are set by ``compile_schema``.
+
+        Args:
+            schema_type: The schema, a dataclass or a ``TypedDict``.
+        """
+        self.schema_type = schema_type
+        self.fields: List[SchemaField] = []
+        self.field_names: Set[str] = set()
+        self.cls: type = SchemaObject
+
+    def load(self, store: ConfigStore) -> Any:
+        """Validate the config in a store and build the corresponding object.
+
+        Only the values of the fields of the schema are read from the store (so lazy
+        subtrees are loaded only if needed), with their interpolations resolved. Values
+        that are not in the schema are ignored.
+
+        Args:
+            store: The store.
+
+        Raises:
+            ValueError: If the config does not match the schema, with all the errors.
+
+        Returns:
+            The object built from the config.
+        """
+        cfg = {f.name: store.get(f.name) for f in self.fields if f.name in store}
+        errors: List[str] = []
+        obj = self.build(cfg, "", errors)
+        if len(errors) > 0:
+            msg = "\n".join(f"  - {e}" for e in errors)
+            raise ValueError(f"The config does not match {self.schema_type.__name__}:\n{msg}")
+        return obj
+
+    def build(self, cfg: Mapping[str, Any], prefix: str, errors: List[str]) -> Any:
+        """Validate a config and build the corresponding object, collecting errors.
+
+        Args:
+            cfg: The config.
+            prefix: The dotted key of the config ("" for the root).
+            errors: The errors found so far, that is updated.
+
+        Returns:
+            The object built from the config (with None for the values with errors).
+        """
+        values = []
+        for field in self.fields:
+            key = f"{prefix}{KEY_SEP}{field.name}" if prefix else field.name
+            if field.name in cfg:
+                values.append(_build_value(field, cfg[field.name], key, errors))
+            elif field.default_factory is not None:
+                values.append(field.default_factory())
+            elif field.default is not _MISSING:
+                values.append(field.default)
+            else:
+                errors.append(f"{key}: missing value")
+                values.append(None)
+        return self.cls(*values)
+
+
+def _build_value(field: SchemaField, value: Any, key: str, errors: List[str]) -> Any:
+    """Validate the value of a field and build the corresponding object, collecting errors.
+
+    Args:
+        field: The field.
+        value: The value.
+        key: The dotted key of the value.
+        errors: The errors found so far, that is updated.
+
+    Returns:
+        The value or the object built from it (None if the value is not valid).
+    """
+    if value is None and field.optional:
+        return None
+
+    if field.schema is not None:
+        if isinstance(value, dict):
+            return field.schema.build(value, key, errors)
+        schema_name = field.schema.schema_type.__name__
+        errors.append(f"{key}: expected a config for {schema_name}, got {type(value).__name__}")
+        return None
+
+    try:
+        cfgstore.check_type(key, value, field.type)
+    except TypeError as e:
+        errors.append(str(e))
+        return None
+    return value
+
+
+_COMPILED: Dict[Any, CompiledSchema] = {}
+_COMPILED_LOCK = threading.RLock()
+
+
+def compile_schema(schema_type: Any) -> CompiledSchema:
+    """Compile a schema, so that configs can be validated against it in a single pass.
+
+    The schema can be a dataclass or a ``TypedDict``. Fields whose type is another
+    dataclass or ``TypedDict`` (possibly ``Optional``) are compiled recursively, while
+    the values of the other fields are checked with ``typeguard``. Missing values take
+    the default values of dataclass fields, while missing keys that are not required
+    by a ``TypedDict`` are None. Schemas are compiled once and cached.
+
+    Args:
+        schema_type: The schema.
+
+    Raises:
+        TypeError: If the schema is not a dataclass or a ``TypedDict``.
+
+    Returns:
+        The compiled schema.
+    """
+    with _COMPILED_LOCK:
+        compiled = _COMPILED.get(schema_type)
+        if compiled is not None:
+            return compiled
+
+        if not _is_schema(schema_type):
+            raise TypeError(f"{schema_type!r} is not a dataclass or a TypedDict.")
+
+        compiled = CompiledSchema(schema_type)
+        _COMPILED[schema_type] = compiled
+        try:
+            for name, field_type, default, factory in _get_fields(schema_type):
+                inner_type, optional = _unwrap_optional(field_type)
+                schema = compile_schema(inner_type) if _is_schema(inner_type) else None
+                field = SchemaField(name, field_type, schema, optional, default, factory)
+                compiled.fields.append(field)
+        except BaseException:
+            del _COMPILED[schema_type]
+            raise
+
+        compiled.field_names = {f.name for f in compiled.fields}
+        namespace = {"__slots__": tuple(f.name for f in compiled.fields)}
+        compiled.cls = type(schema_type.__name__, (SchemaObject,), namespace)
+        return compiled
@@ -0,0 +1,249 @@
+import itertools
+import math
+import random
+import re
+from ast import literal_eval
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from hesiod.cfg.cfghandler import BASE_KEY, BaseResolver, ConfigHandler, LazyBaseConfigs
+from hesiod.cfg.cfgparser import CFG_T
+from hesiod.cfg.cfgstore import KEY_SEP
+from hesiod.cfg.readonly import ReadOnlyDict, freeze, replace_in
+
+GRID_PATTERN = r"^@GRID\((.+)\)$"
+RANGE_PATTERN = r"^@RANGE\((.+)\)$"
+CHOICE_PATTERN = r"^@CHOICE\((.+)\)$"
+SWEEP_SEP = ";"
+
+KEYS_T = Tuple[Any, ...]
+AXIS_T = Tuple[KEYS_T, List[Any]]
+
+
+def _parse_value(value: str) -> Any:
+    """Parse a value of a sweep, as a python literal or as a plain string.
+
+    Args:
+        value: The value to parse.
+
+    Returns:
+        The parsed value.
+    """
+    value = value.strip()
+    try:
+        return literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+
+def _get_range(args: List[Any], marker: str) -> List[Any]:
+    """Get the values of a ``@RANGE`` sweep.
+
+    Args:
+        args: The arguments of the range (stop, start and stop or start, stop and step).
+        marker: The whole marker, used in error messages.
+
+    Raises:
+        ValueError: If the arguments are not valid.
+
+    Returns:
+        The values of the range.
+    """
+    if not 1 <= len(args) <= 3 or not all(isinstance(a, (int, float)) for a in args):
+        raise ValueError(f"Config error: invalid range {marker}")
+
+    start, stop, step = (0, args[0], 1) if len(args) == 1 else (list(args) + [1])[:3]
+    if step == 0:
+        raise ValueError(f"Config error: invalid range {marker}")
+
+    if all(isinstance(a, int) for a in (start, stop, step)):
+        return list(range(start, stop, step))
+    num_values = max(0, math.ceil((stop - start) / step))
+    return [start + i * step for i in range(num_values)]
+
+
+def parse_sweep(value: Any) -> Optional[Tuple[str, List[Any]]]:
+    """Parse a sweep marker.
+
+    Args:
+        value: The config value.
+
+    Raises:
+        ValueError: If the value is a sweep marker, but it is not valid.
+
+    Returns:
+        The kind of sweep ("grid" or "choice") and its values or None if the value
+        is not a sweep marker.
+    """
+    if not isinstance(value, str) or not value.startswith("@"):
+        return None
+
+    for kind, pattern in (("grid", GRID_PATTERN), ("choice", CHOICE_PATTERN)):
+        match = re.match(pattern, value)
+        if match is not None:
+            return kind, [_parse_value(v) for v in match.group(1).split(SWEEP_SEP)]
+
+    match = re.match(RANGE_PATTERN, value)
+    if match is not None:
+        args = [_parse_value(v) for v in match.group(1).split(SWEEP_SEP)]
+        return "grid", _get_range(args, value)
+
+    return None
+
+
+def find_sweeps(
+    cfg: CFG_T,
+    prefix: KEYS_T = (),
+) -> Tuple[List[AXIS_T], List[AXIS_T]]:
+    """Find the sweep markers in a config, recursively.
+
+    Args:
+        cfg: The config.
+        prefix: The keys of the given config ("()" for the root).
+
+    Returns:
+        The grid and the choice sweeps, as lists of paths to the markers
+        with the corresponding values.
+    """
+    grids: List[AXIS_T] = []
+    choices: List[AXIS_T] = []
+    for k, v in cfg.items():
+        keys = prefix + (k,)
+        if isinstance(v, dict):
+            sub_grids, sub_choices = find_sweeps(v, keys)
+            grids.extend(sub_grids)
+            choices.extend(sub_choices)
+            continue
+        sweep = parse_sweep(v)
+        if sweep is not None:
+            kind, values = sweep
+            (grids if kind == "grid" else choices).append((keys, values))
+    return grids, choices
+
+
+class Sweep:
+    def __init__(
+        self,
+        cfg: CFG_T,
+        base_cfgs: Any,
+        num_samples: int = 1,
+        seed: Optional[int] = None,
+        base_key: str = BASE_KEY,
+    ) -> None:
+        """Create a sweep over the values of a config.
+
+        Values of the config can be replaced by sweep markers:
+
+        - ``@GRID(a;b;c)`` takes every value in the list;
+        - ``@RANGE(stop)``, ``@RANGE(start;stop)`` or ``@RANGE(start;stop;step)`` takes
+          every value in the range, as with python ``range`` (floats are allowed);
+        - ``@CHOICE(a;b;c)`` takes one value at random.
+
+        The sweep generates one config for every combination of grid and range values,
+        drawing new random choices for each of them. The whole grid is generated
+        ``num_samples`` times.
+
+        Markers can also be used as the value of a base key of the given config, to sweep
+        over bases. Bases are resolved once for each combination of base values and
+        shared by all the configs generated with it: configs only copy the dictionaries
+        along the paths to the swept values, so generating many variants does not resolve
+        or copy the whole config again.
+
+        Args:
+            cfg: The unresolved config with sweep markers.
+            base_cfgs: The base configs.
+            num_samples: The number of times the grid is generated (default: 1).
+            seed: The seed for random choices (optional).
+            base_key: The string used as base key.
+        """
+        self.cfg = cfg
+        self.resolver = BaseResolver(base_cfgs, base_key)
+        self.num_samples = num_samples
+        self.seed = seed
+        self.base_key = base_key
+
+        base_grids, base_choices = find_sweeps(cfg)
+        self.base_grids = [axis for axis in base_grids if axis[0][-1] == base_key]
+        self.base_choices = [axis for axis in base_choices if axis[0][-1] == base_key]
+        self._skeletons: Dict[Tuple[Any, ...], Tuple[ReadOnlyDict, List[AXIS_T], List[AXIS_T]]] = {}
+
+    def get_skeleton(
+        self,
+        base_values: Tuple[Any, ...],
+    ) -> Tuple[ReadOnlyDict, List[AXIS_T], List[AXIS_T]]:
+        """Get the resolved config for a combination of swept bases.
+
+        Resolved configs are cached, so each combination is resolved once.
+
+        Args:
+            base_values: The values of the swept bases, in the order of
+                ``base_grids + base_choices``.
+
+        Returns:
+            The resolved config and its grid and choice sweeps.
+        """
+        if base_values not in self._skeletons:
+            cfg: CFG_T = self.cfg
+            for (keys, _), value in zip(self.base_grids + self.base_choices, base_values):
+                cfg = replace_in(cfg, keys, value)
+            skeleton = freeze(self.resolver.resolve(cfg))
+            grids, choices = find_sweeps(skeleton)
+            self._skeletons[base_values] = (skeleton, grids, choices)
+        return self._skeletons[base_values]
+
+    def variants(self) -> Iterator[Tuple[Dict[str, Any], ReadOnlyDict]]:
+        """Generate the configs of the sweep lazily.
+
+        Returns:
+            An iterator over the pairs (swept values, config), where the swept values are
+            indexed by dotted key. Configs are read-only and share unchanged values.
+        """
+        rng = random.Random(self.seed)
+        base_axes = self.base_grids + self.base_choices
+        for _ in range(self.num_samples):
+            for base_grid_values in itertools.product(*[v for _, v in self.base_grids]):
+                base_choice_values = tuple(rng.choice(v) for _, v in self.base_choices)
+                base_values = base_grid_values + base_choice_values
+                skeleton, grids, choices = self.get_skeleton(base_values)
+                base_params = {
+                    KEY_SEP.join(map(str, keys[:-1] + (self.base_key,))): value
+                    for (keys, _), value in zip(base_axes, base_values)
+                }
+
+                for grid_values in itertools.product(*[v for _, v in grids]):
+                    params = dict(base_params)
+                    cfg = skeleton
+                    for (keys, _), value in zip(grids, grid_values):
+                        cfg = replace_in(cfg, keys, freeze(value))
+                        params[KEY_SEP.join(map(str, keys))] = value
+                    for keys, values in choices:
+                        value = rng.choice(values)
+                        cfg = replace_in(cfg, keys, freeze(value))
+                        params[KEY_SEP.join(map(str, keys))] = value
+                    yield params, cfg
+
+    def __iter__(self) -> Iterator[ReadOnlyDict]:
+        return (cfg for _, cfg in self.variants())
+
+
+def load_sweep(
+    cfg_file: Union[str, Path],
+    base_cfg_dir: Union[str, Path],
+    num_samples: int = 1,
+    seed: Optional[int] = None,
+) -> Sweep:
+    """Load a run or template file with sweep markers.
+
+    Base configs are loaded lazily, only when they are referenced.
+
+    Args:
+        cfg_file: The path to the run or template file.
+        base_cfg_dir: The path to the base configs directory.
+        num_samples: The number of times the grid is generated (default: 1).
+        seed: The seed for random choices (optional).
+
+    Returns:
+        The sweep, that can be iterated to generate the configs.
+    """
+    cfg = ConfigHandler.load_cfg_file(Path(cfg_file))
+    return Sweep(cfg, LazyBaseConfigs(Path(base_cfg_dir)), num_samples, seed)
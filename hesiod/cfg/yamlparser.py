@@ -1,5 +1,8 @@
+import os
+import threading
+from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Type
 
 from ruamel.yaml import YAML
 from ruamel.yaml.constructor import SafeConstructor
@@ -7,26 +10,189 @@ from ruamel.yaml.representer import Representer, SafeRepresenter
 
 from hesiod.cfg.cfgparser import CFG_T, ConfigParser
 
+try:
+    from _ruamel_yaml import CParser  # type: ignore # noqa: F401
+
+    RUAMEL_HAS_C = True
+except ImportError:
+    RUAMEL_HAS_C = False
+
+YAML_BACKEND_ENV_VAR = "HESIOD_YAML_BACKEND"
+TUPLE_TAG = "tag:yaml.org,2002:python/tuple"
+
 
 def construct_python_tuple(constructor: SafeConstructor, node: Any) -> Tuple:
     return tuple(constructor.construct_sequence(node))
 
 
-SafeConstructor.add_constructor("tag:yaml.org,2002:python/tuple", construct_python_tuple)
+SafeConstructor.add_constructor(TUPLE_TAG, construct_python_tuple)
 SafeRepresenter.add_representer(tuple, Representer.represent_tuple)
 
 
+class YAMLBackend(ABC):
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """The name of the backend, including whether it is C-accelerated."""
+
+    @abstractmethod
+    def load(self, cfg_file: Path) -> Any:
+        """Load the content of a YAML file.
+
+        Args:
+            cfg_file: The path to the file to be read.
+
+        Returns:
+            The content of the file.
+        """
+
+    @abstractmethod
+    def dump(self, cfg: CFG_T, cfg_file: Path) -> None:
+        """Dump a config into a YAML file.
+
+        Args:
+            cfg: The config to be saved.
+            cfg_file: The path to the output file.
+        """
+
+
+class RuamelYAMLBackend(YAMLBackend):
+    def __init__(self) -> None:
+        """Create a backend based on ruamel.yaml.
+
+        The C-accelerated parser and emitter are used if ``ruamel.yaml.clib`` is
+        installed. A ``YAML`` instance is created once per thread and reused for
+        all the files loaded or dumped by that thread.
+        """
+        self._local = threading.local()
+
+    @property
+    def name(self) -> str:
+        return "ruamel.yaml (C)" if RUAMEL_HAS_C else "ruamel.yaml (pure Python)"
+
+    def get_yaml(self) -> YAML:
+        """Get the ``YAML`` instance for the current thread.
+
+        Returns:
+            The ``YAML`` instance.
+        """
+        yaml: Optional[YAML] = getattr(self._local, "yaml", None)
+        if yaml is None:
+            yaml = YAML(typ="safe", pure=not RUAMEL_HAS_C)
+            self._local.yaml = yaml
+        return yaml
+
+    def load(self, cfg_file: Path) -> Any:
+        return self.get_yaml().load(cfg_file)
+
+    def dump(self, cfg: CFG_T, cfg_file: Path) -> None:
+        self.get_yaml().dump(cfg, cfg_file)
+
+
+class PyYAMLBackend(YAMLBackend):
+    def __init__(self) -> None:
+        """Create a backend based on PyYAML.
+
+        The C-accelerated loader and dumper are used if PyYAML was built with
+        libyaml. Please note that PyYAML implements YAML 1.1, so some values may be
+        parsed differently than with ruamel.yaml (e.g. ``1e-3`` is a string).
+
+        Raises:
+            ImportError: If PyYAML is not installed.
+        """
+        import yaml  # type: ignore
+
+        self.has_c = hasattr(yaml, "CSafeLoader")
+        base_loader = yaml.CSafeLoader if self.has_c else yaml.SafeLoader
+        base_dumper = yaml.CSafeDumper if self.has_c else yaml.SafeDumper
+
+        class Loader(base_loader):  # type: ignore
+            pass
+
+        class Dumper(base_dumper):  # type: ignore
+            pass
+
+        def construct_tuple(loader: Any, node: Any) -> Tuple:
+            return tuple(loader.construct_sequence(node))
+
+        def represent_tuple(dumper: Any, data: Tuple) -> Any:
+            return dumper.represent_sequence(TUPLE_TAG, data)
+
+        Loader.add_constructor(TUPLE_TAG, construct_tuple)
+        Dumper.add_representer(tuple, represent_tuple)
+
+        self._yaml = yaml
+        self._loader = Loader
+        self._dumper = Dumper
+
+    @property
+    def name(self) -> str:
+        return "PyYAML (C)" if self.has_c else "PyYAML (pure Python)"
+
+    def load(self, cfg_file: Path) -> Any:
+        with open(cfg_file, "rb") as f:
+            return self._yaml.load(f, Loader=self._loader)
+
+    def dump(self, cfg: CFG_T, cfg_file: Path) -> None:
+        with open(cfg_file, "w") as f:
+            self._yaml.dump(cfg, f, Dumper=self._dumper)
+
+
 class YAMLConfigParser(ConfigParser):
+    BACKENDS: Dict[str, Type[YAMLBackend]] = {
+        "ruamel": RuamelYAMLBackend,
+        "pyyaml": PyYAMLBackend,
+    }
+    DEFAULT_BACKEND = "ruamel"
+    backend: Optional[YAMLBackend] = None
+
+    @staticmethod
+    def set_backend(name: str) -> None:
+        """Select the backend used to read and write YAML files.
+
+        Args:
+            name: The name of the backend (available options: "ruamel", "pyyaml").
+
+        Raises:
+            ValueError: If the given backend is not available.
+            ImportError: If the library needed by the backend is not installed.
+        """
+        if name not in YAMLConfigParser.BACKENDS:
+            raise ValueError(f"Unknown YAML backend {name}.")
+        YAMLConfigParser.backend = YAMLConfigParser.BACKENDS[name]()
+
+    @staticmethod
+    def get_backend() -> YAMLBackend:
+        """Get the backend used to read and write YAML files.
+
+        If no backend was selected with ``set_backend``, the one specified by
+        the environment variable ``HESIOD_YAML_BACKEND`` is used (default: "ruamel").
+
+        Returns:
+            The backend.
+        """
+        if YAMLConfigParser.backend is None:
+            name = os.environ.get(YAML_BACKEND_ENV_VAR, YAMLConfigParser.DEFAULT_BACKEND)
+            YAMLConfigParser.set_backend(name)
+        return YAMLConfigParser.backend  # type: ignore
+
+    @staticmethod
+    def get_backend_name() -> str:
+        """Get the name of the active backend.
+
+        Returns:
+            The name of the backend, including whether it is C-accelerated.
+        """
+        return YAMLConfigParser.get_backend().name
+
     @staticmethod
     def get_managed_extensions() -> List[str]:
         return ["yaml"]
 
     @staticmethod
     def read_cfg_file(cfg_file: Path) -> CFG_T:
-        yaml = YAML(typ="safe")
-        return yaml.load(cfg_file)
+        return YAMLConfigParser.get_backend().load(cfg_file)
 
     @staticmethod
     def write_cfg(cfg: CFG_T, cfg_file: Path) -> None:
-        yaml = YAML(typ="safe")
-        yaml.dump(cfg, cfg_file)
+        YAMLConfigParser.get_backend().dump(cfg, cfg_file)
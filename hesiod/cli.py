@@ -0,0 +1,96 @@
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from hesiod.cfg.bundle import compile_bundle
+from hesiod.registry import RunRegistry
+
+
+def _compile(args: argparse.Namespace) -> None:
+    """Run the command "compile".
+
+    Args:
+        args: The parsed command line arguments.
+    """
+    bundle_path = compile_bundle(args.base_cfg_dir, args.cfg_files, args.output, args.num_workers)
+    print(f"Bundle saved in {bundle_path}")
+
+
+def _runs(args: argparse.Namespace) -> None:
+    """Run the command "runs".
+
+    Args:
+        args: The parsed command line arguments.
+    """
+    registry = RunRegistry(args.out_dir_root)
+    if args.sync:
+        registry.sync()
+
+    for run_name in registry.find(args.query):
+        if len(args.show) > 0:
+            values = registry.get_values(run_name, args.show)
+            shown = " ".join(f"{k}={values[k]}" for k in args.show if k in values)
+            print(f"{run_name} {shown}")
+        else:
+            print(run_name)
+
+
+def get_arg_parser() -> argparse.ArgumentParser:
+    """Create the parser for the hesiod command line interface.
+
+    Returns:
+        The parser.
+    """
+    parser = argparse.ArgumentParser(prog="hesiod", description="Hesiod command line interface.")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    compile_parser = subparsers.add_parser(
+        "compile",
+        help="compile base configs and run/template files into a single bundle",
+    )
+    compile_parser.add_argument("base_cfg_dir", type=Path, help="the base configs directory")
+    compile_parser.add_argument(
+        "cfg_files", type=Path, nargs="*", help="the run/template files to compile"
+    )
+    compile_parser.add_argument(
+        "-o", "--output", type=Path, required=True, help="the output bundle (.hbundle)"
+    )
+    compile_parser.add_argument(
+        "-j", "--num-workers", type=int, default=1, help="the number of workers (default: 1)"
+    )
+    compile_parser.set_defaults(func=_compile)
+
+    runs_parser = subparsers.add_parser(
+        "runs",
+        help='find runs by config values (e.g. "net.name == resnet18 and lr < 0.01")',
+    )
+    runs_parser.add_argument("query", nargs="?", help="the query (default: all the runs)")
+    runs_parser.add_argument(
+        "-r",
+        "--out-dir-root",
+        type=Path,
+        default=Path("logs"),
+        help="the output root (default: logs)",
+    )
+    runs_parser.add_argument(
+        "-s", "--show", nargs="*", default=[], help="the keys of the values to show for each run"
+    )
+    runs_parser.add_argument(
+        "--sync", action="store_true", help="register run directories that are not registered yet"
+    )
+    runs_parser.set_defaults(func=_runs)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Entry point of the hesiod command line interface.
+
+    Args:
+        argv: The command line arguments (default: ``sys.argv[1:]``).
+    """
+    parser = get_arg_parser()
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    args.func(args)
@@ -1,66 +1,226 @@
 import functools
-import re
+import inspect
 import sys
-from ast import literal_eval
-from copy import deepcopy
-from datetime import datetime
+import threading
+from contextvars import ContextVar, copy_context
 from pathlib import Path
-from typing import Any, Callable, List, Optional, Type, TypeVar, Union, cast
-
-from typeguard import check_type
-
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+)
+
+from hesiod.cfg.bundle import BUNDLE_EXT, ConfigBundle
+from hesiod.cfg.cfgcache import ConfigCache
+from hesiod.cfg.cfgdirindex import ConfigDirIndex
 from hesiod.cfg.cfghandler import CFG_T, RUN_NAME_KEY, ConfigHandler
-from hesiod.ui import TUI
+from hesiod.cfg.cfgstore import KEY_SEP, LAZY_LOADERS_T, ConfigStore
+from hesiod.cfg.cfgwatcher import CFG_DIFF_T, ConfigWatcher
+from hesiod.cfg.cfgwriter import save_cfg_in_background
+from hesiod.cfg.layers import flatten, merge_layers, parse_args, parse_env, unflatten
+from hesiod.cfg.readonly import thaw
+from hesiod.cfg.schema import compile_schema
+from hesiod.registry import RUN_FILE_NAME, RunRegistry
+from hesiod.runname import (
+    RUN_NAME_STRATEGY_DATE,
+    RUN_NAME_STRATEGY_HASH,
+    claim_run_dir,
+    get_default_run_name,
+)
+from hesiod.stats import RunStats, collecting, phase
 
 T = TypeVar("T")
 FUNCTION_T = Callable[..., Any]
-_CFG: CFG_T = {}
-RUN_FILE_NAME = "run.yaml"
 OUT_DIR_KEY = "***hesiod_out_dir***"
-RUN_NAME_STRATEGY_DATE = "date"
-RUN_NAME_DATE_FORMAT = "%Y-%m-%d-%H-%M-%S"
+HMAIN_OPTIONS_ATTR = "hmain_options"
+
+
+class HmainOptions(NamedTuple):
+    """The options given to ``hmain`` (see ``hmain`` for their meaning)."""
+
+    base_cfg_dir: Union[str, Path]
+    template_cfg_file: Optional[Union[str, Path]]
+    run_cfg_file: Optional[Union[str, Path]]
+    create_out_dir: bool
+    out_dir_root: str
+    run_name_strategy: Optional[str]
+    parse_cmd_line: bool
+    cfg_cache_dir: Optional[Union[str, Path]]
+    cfg_cache_max_size: Optional[int]
+    num_workers: int
+    watch_cfg: bool
+    on_cfg_change: Optional[Callable[[CFG_DIFF_T], None]]
+    watch_interval: float
+    run_registry: bool
+    on_stats: Optional[Callable[[RunStats], None]]
+    save_stats: bool
+    background_run_file: bool
+    fsync_run_file: bool
+    override_cfg_files: Sequence[Union[str, Path]]
+    env_prefix: Optional[str]
+    lazy_cfg: bool
+    schema: Optional[Any]
+
+
+class _RunContext:
+    __slots__ = ("store", "typed_cfgs", "watcher")
+
+    def __init__(self, store: ConfigStore) -> None:
+        """Create the context of a run.
+
+        The context holds the store with the config of the run. It is shared by all the
+        code that runs in the context of the run, so replacing its store (e.g. when the
+        config is reloaded) is visible to all of them at once.
+
+        The context also caches the objects built from the config for each schema, until
+        a value of the schema is set or the store is replaced.
+
+        Args:
+            store: The store with the config of the run.
+        """
+        self.store = store
+        self.typed_cfgs: Dict[Any, Any] = {}
+        self.watcher: Optional[ConfigWatcher] = None
+
+    def get_store(self) -> ConfigStore:
+        """Get the store of the run.
+
+        Returns:
+            The store.
+        """
+        return self.store
+
+    def swap_store(self, store: ConfigStore) -> None:
+        """Replace the store of the run.
+
+        Args:
+            store: The new store.
+        """
+        self.store = store
+        self.typed_cfgs = {}
+
+    def get_typed_cfg(self, schema: Any) -> Any:
+        """Get the object built from the config of the run for a given schema.
+
+        Args:
+            schema: The schema.
+
+        Raises:
+            ValueError: If the config does not match the schema.
+
+        Returns:
+            The object built from the config.
+        """
+        typed_cfg = self.typed_cfgs.get(schema)
+        if typed_cfg is None:
+            typed_cfg = compile_schema(schema).load(self.store)
+            self.typed_cfgs[schema] = typed_cfg
+        return typed_cfg
+
+    def invalidate_typed_cfgs(self, key: str) -> None:
+        """Drop the cached objects built for the schemas that include a given key.
+
+        Args:
+            key: The dotted key of a value that changed.
+        """
+        name = key.split(KEY_SEP, 1)[0]
+        for schema in list(self.typed_cfgs):
+            if name in compile_schema(schema).field_names:
+                self.typed_cfgs.pop(schema, None)
+
+
+_DEFAULT_CONTEXT = _RunContext(ConfigStore())
+_CONTEXT: ContextVar[Optional[_RunContext]] = ContextVar("hesiod_run_context", default=None)
+_ACTIVE_RUNS: List[_RunContext] = []
+_ACTIVE_RUNS_LOCK = threading.Lock()
+
+
+def _get_context() -> _RunContext:
+    """Get the context of the current run.
+
+    Code that is not executed in the context of a run (e.g. in threads started with
+    ``threading.Thread`` or after the run ends) gets the context of the only active run
+    or, if no run is active, of the most recently started run of the process (the module
+    default context if no run was started).
+
+    Raises:
+        ValueError: If the code is not executed in the context of a run and several
+            runs are active, since it cannot be told which one it belongs to.
+
+    Returns:
+        The context.
+    """
+    run_context = _CONTEXT.get()
+    if run_context is not None:
+        return run_context
+
+    with _ACTIVE_RUNS_LOCK:
+        if len(_ACTIVE_RUNS) > 1:
+            msg = (
+                "Cannot tell which run the config belongs to: several runs are active and"
+                " this code is not executed in the context of any of them. Execute it with"
+                " contextvars.copy_context().run in the thread of its run."
+            )
+            raise ValueError(msg)
+        return _ACTIVE_RUNS[0] if len(_ACTIVE_RUNS) == 1 else _DEFAULT_CONTEXT
 
 
-def _parse_args(args: List[str]) -> None:
-    """Parse the given args and add them to the global config.
+def _enter_run(run_context: _RunContext) -> None:
+    """Make the given context the context of the current run.
 
-    Each arg is expected with the format "{prefix}{key}{sep}{value}".
-    {prefix} is optional and can be any amount of the char "-".
-    {key} is a string but cannot contain the chars "-", "=" and ":".
-    {sep} is mandatory and can be one of "=", ":".
-    {value} is a string that can contain everything.
+    The run is active until ``_exit_run`` is called. The context also becomes the
+    fallback used by code that is not executed in the context of any run, once no
+    run is active.
 
     Args:
-        args: The list of args to be parsed.
+        run_context: The context of the run.
+    """
+    global _DEFAULT_CONTEXT
 
-    Raises:
-        ValueError: If one of the given args is a not supported format.
+    _CONTEXT.set(run_context)
+    with _ACTIVE_RUNS_LOCK:
+        _ACTIVE_RUNS.append(run_context)
+        _DEFAULT_CONTEXT = run_context
+
+
+def _exit_run(run_context: _RunContext) -> None:
+    """Mark the run with the given context as no longer active.
+
+    Args:
+        run_context: The context of the run.
     """
-    for arg in args:
-        pattern = r"^-*(?P<key>[^-=:]+)[=:]{1}(?P<value>.+)$"
-        match = re.match(pattern, arg)
+    with _ACTIVE_RUNS_LOCK:
+        _ACTIVE_RUNS.remove(run_context)
 
-        if match is None:
-            raise ValueError(f"One of the arg is in a not supported format {arg}.")
-        else:
-            while arg[0] == "-":
-                arg = arg[1:]
 
-            key = match.group("key")
-            value = match.group("value")
+def _set_cfg_cache(options: HmainOptions) -> None:
+    """Set the persistent cache of parsed config files for the current run.
 
-            try:
-                value = literal_eval(value)
-            except (ValueError, SyntaxError):
-                pass
+    The cache is set in the context of the run, so it is not used by other runs.
 
-            set_cfg(key, value)
+    Args:
+        options: The options given to ``hmain``.
+    """
+    cfg_cache = None
+    if options.cfg_cache_dir is not None:
+        cfg_cache = ConfigCache(options.cfg_cache_dir, options.cfg_cache_max_size)
+    ConfigHandler.set_cache(cfg_cache)
 
 
 def _get_cfg(
     base_cfg_path: Path,
     template_cfg_path: Optional[Path],
     run_cfg_path: Optional[Path],
+    num_workers: int = 1,
 ) -> CFG_T:
     """Load config either from template file or from run file.
 
@@ -71,56 +231,522 @@ def _get_cfg(
         base_cfg_path: The path to the directory with all the config files.
         template_cfg_path: The path to the template config file for this run.
         run_cfg_path: The path to the config file created by the user for this run.
+        num_workers: The number of workers used to parse base config files (default: 1).
 
     Returns:
         The loaded config.
     """
     if run_cfg_path is not None:
-        return ConfigHandler.load_cfg(run_cfg_path, base_cfg_path)
+        return ConfigHandler.load_cfg(run_cfg_path, base_cfg_path, num_workers)
     elif template_cfg_path is not None:
-        template_cfg = ConfigHandler.load_cfg(template_cfg_path, base_cfg_path)
+        from hesiod.ui import TUI
+
+        template_cfg = ConfigHandler.load_cfg(template_cfg_path, base_cfg_path, num_workers)
         tui = TUI(template_cfg, base_cfg_path)
         return tui.show()
     else:
         return {}
 
 
-def _get_default_run_name(strategy: str) -> str:
-    """Get a run name according the given strategy.
+def _build_store(
+    cfg: CFG_T,
+    layers: Sequence[CFG_T],
+    lazy: Optional[LAZY_LOADERS_T] = None,
+) -> ConfigStore:
+    """Build the store for a config with the given layers merged on top of it.
 
     Args:
-        strategy: The strategy to use to create the run name.
+        cfg: The config.
+        layers: The layers, from the lowest to the highest precedence.
+        lazy: The functions that load the lazy subtrees of the config (optional).
 
     Returns:
-        The created run name.
+        The store with the merged config.
     """
-    run_name = ""
-    if strategy == RUN_NAME_STRATEGY_DATE:
-        now = datetime.now()
-        run_name = now.strftime(RUN_NAME_DATE_FORMAT)
+    if len(layers) == 0:
+        return ConfigStore(cfg, lazy=lazy)
+    return ConfigStore(merge_layers([cfg, *layers]), lazy=lazy)
 
-    return run_name
+
+def _get_store(
+    base_cfg_path: Path,
+    template_cfg_path: Optional[Path],
+    run_cfg_path: Optional[Path],
+    num_workers: int = 1,
+    watcher: Optional[ConfigWatcher] = None,
+    layers: Sequence[CFG_T] = (),
+    lazy: bool = False,
+    bundle: Optional[ConfigBundle] = None,
+) -> ConfigStore:
+    """Load config either from a bundle or from the base configs directory.
+
+    If ``base_cfg_path`` is a bundle (i.e. a file with extension ``.hbundle``),
+    run and template configs are taken from the bundle if they were compiled in it,
+    otherwise they are loaded and resolved with the base configs in the bundle.
+    If a watcher is given, the run config is loaded by the watcher, so that it can
+    track the loaded files.
+
+    If layers are given, they are deep-merged on top of the loaded config in a single
+    pass, before the store is built.
+
+    If ``lazy`` is True, the subtrees of the run config that have a base are resolved
+    only when they are used (see ``ConfigHandler.load_cfg_lazy``). Configs loaded from
+    bundles, templates or by watchers are never lazy.
+
+    Args:
+        base_cfg_path: The path to the directory with all the config files or to a bundle.
+        template_cfg_path: The path to the template config file for this run.
+        run_cfg_path: The path to the config file created by the user for this run.
+        num_workers: The number of workers used to parse base config files (default: 1).
+        watcher: The watcher used to load the run config (optional).
+        layers: The layers to merge on top of the config, from the lowest to the
+            highest precedence (optional).
+        lazy: A flag that indicates whether the subtrees of the run config should be
+            resolved lazily (default: False).
+        bundle: The bundle already loaded from ``base_cfg_path`` (optional). If not given,
+            it is loaded when needed.
+
+    Returns:
+        The store with the loaded config.
+    """
+    if watcher is not None:
+        return _build_store(watcher.load(), layers)
+
+    if base_cfg_path.suffix != BUNDLE_EXT:
+        if lazy and run_cfg_path is not None:
+            cfg, loaders = ConfigHandler.load_cfg_lazy(run_cfg_path, base_cfg_path, layers)
+            return _build_store(cfg, layers, loaders)
+        cfg = _get_cfg(base_cfg_path, template_cfg_path, run_cfg_path, num_workers)
+        return _build_store(cfg, layers)
+
+    if bundle is None:
+        bundle = ConfigBundle.load(base_cfg_path)
+    if run_cfg_path is not None:
+        store = bundle.get_store(run_cfg_path)
+        return _build_store(store.cfg, layers) if len(layers) > 0 else store
+    elif template_cfg_path is not None:
+        from hesiod.ui import TUI
+
+        template_cfg = thaw(bundle.get_store(template_cfg_path).cfg)
+        tui = TUI(template_cfg, Path(bundle.base_cfg_dir))
+        return _build_store(tui.show(), layers)
+    else:
+        return _build_store({}, layers)
+
+
+def _get_layers(
+    base_cfg_path: Path,
+    options: HmainOptions,
+    bundle: Optional[ConfigBundle] = None,
+) -> List[CFG_T]:
+    """Load the layers of config values that override the run config.
+
+    Layers are, from the lowest to the highest precedence: the override files (in the
+    given order, with their bases resolved), the environment variables with the given
+    prefix and the command line args.
+
+    Args:
+        base_cfg_path: The path to the directory with all the config files or to a bundle.
+        options: The options given to ``hmain``.
+        bundle: The bundle already loaded from ``base_cfg_path`` (optional). If not given,
+            it is loaded when needed.
+
+    Raises:
+        ValueError: If one of the command line args is in a not supported format.
+
+    Returns:
+        The non-empty layers, from the lowest to the highest precedence.
+    """
+    layers: List[CFG_T] = []
+    for override_file in options.override_cfg_files:
+        override_path = Path(override_file)
+        if base_cfg_path.suffix == BUNDLE_EXT:
+            if bundle is None:
+                bundle = ConfigBundle.load(base_cfg_path)
+            layers.append(bundle.get_store(override_path).cfg)
+        else:
+            layers.append(ConfigHandler.load_cfg(override_path, base_cfg_path))
+
+    if options.env_prefix is not None:
+        layers.append(unflatten(parse_env(options.env_prefix)))
+
+    if options.parse_cmd_line and len(sys.argv) > 1:
+        with phase("parse_args"):
+            layers.append(unflatten(parse_args(sys.argv[1:])))
+
+    return [layer for layer in layers if len(layer) > 0]
+
+
+def _get_cfg_run_name() -> str:
+    """Get the run name from the config of the current run, with its interpolations resolved.
+
+    Returns:
+        The run name ("" if the config has no run name).
+    """
+    store = _get_context().store
+    return store.get(RUN_NAME_KEY) if RUN_NAME_KEY in store else ""
+
+
+def _get_cfg_for_name(run_name_strategy: Optional[str]) -> Optional[CFG_T]:
+    """Get the config of the current run, if it is needed to name the run.
+
+    Only the "hash" strategy needs the config, which is loaded completely if it is lazy.
+
+    Args:
+        run_name_strategy: The strategy used to name the run.
+
+    Returns:
+        The config or None if the strategy does not need it.
+    """
+    if run_name_strategy != RUN_NAME_STRATEGY_HASH:
+        return None
+    return _get_context().store.cfg
+
+
+def _get_watcher(
+    base_cfg_path: Path,
+    run_cfg_path: Optional[Path],
+    on_change: Optional[Callable[[CFG_DIFF_T], None]],
+    interval: float,
+    run_context: _RunContext,
+) -> ConfigWatcher:
+    """Create a watcher that reloads the config of a run when its files change.
+
+    Args:
+        base_cfg_path: The path to the directory with all the config files.
+        run_cfg_path: The path to the config file created by the user for this run.
+        on_change: A function called with the changed values (optional).
+        interval: The interval between checks for changes, when polling.
+        run_context: The context of the run.
+
+    Raises:
+        ValueError: If no run file is given or the base path is a bundle.
+
+    Returns:
+        The watcher.
+    """
+    if run_cfg_path is None or base_cfg_path.suffix == BUNDLE_EXT:
+        msg = "Watching configs requires a run file and a base configs directory."
+        raise ValueError(msg)
+
+    return ConfigWatcher(
+        run_cfg_path,
+        base_cfg_path,
+        run_context.get_store,
+        run_context.swap_store,
+        on_change,
+        interval,
+    )
+
+
+def _start_watching(watcher: ConfigWatcher, overrides: Dict[str, Any]) -> None:
+    """Start watching config files.
+
+    The run name and the output directory are kept as overrides, together with
+    the given ones, so that they are not changed by reloads. From now on, values set
+    with ``set_cfg`` are recorded as overrides too.
+
+    Args:
+        watcher: The watcher.
+        overrides: The values to apply again on top of reloaded configs.
+    """
+    run_context = _get_context()
+    run_context.watcher = watcher
+    store = run_context.store
+    for key in (RUN_NAME_KEY, OUT_DIR_KEY):
+        if key in store:
+            overrides[key] = store.get(key)
+
+    watcher.overrides = overrides
+    watcher.start()
+
+
+def _setup_run(
+    run_context: _RunContext,
+    options: HmainOptions,
+    cfg: Optional[CFG_T] = None,
+) -> Tuple[Optional[ConfigWatcher], Dict[str, Any]]:
+    """Set up a run, collecting the stats of its setup if they are requested.
+
+    The setup itself is done by ``_prepare_run``. If stats are requested (with
+    ``on_stats`` or ``save_stats``), the timings of its phases and the related
+    counters are collected and reported when the setup is completed.
+
+    Args:
+        run_context: The context of the run.
+        options: The options given to ``hmain``.
+        cfg: The config of the run (optional). If given, config files are not loaded
+            and the command line is not parsed.
+
+    Returns:
+        The watcher for the config files (if requested) and the values parsed
+        from the command line.
+    """
+    stats = None
+    if options.on_stats is not None or options.save_stats:
+        stats = RunStats()
+
+    with collecting(stats), phase("setup"):
+        watcher, overrides = _prepare_run(run_context, options, cfg)
+
+    if stats is not None:
+        _report_stats(stats, run_context.store, options)
+
+    return watcher, overrides
+
+
+def _report_stats(stats: RunStats, store: ConfigStore, options: HmainOptions) -> None:
+    """Save the stats of a run in its output directory and pass them to the user callback.
+
+    Args:
+        stats: The stats of the run.
+        store: The store with the config of the run.
+        options: The options given to ``hmain``.
+    """
+    if options.save_stats and OUT_DIR_KEY in store:
+        stats.save(Path(store.get(OUT_DIR_KEY)))
+    if options.on_stats is not None:
+        options.on_stats(stats)
+
+
+def _load_run_cfg(
+    run_context: _RunContext,
+    options: HmainOptions,
+) -> Tuple[Optional[ConfigWatcher], Dict[str, Any]]:
+    """Load the config of a run from its files and from the other config sources.
+
+    Args:
+        run_context: The context of the run.
+        options: The options given to ``hmain``.
+
+    Returns:
+        The watcher for the config files (if requested) and the values parsed
+        from the command line.
+    """
+    bcfg_path = Path(options.base_cfg_dir)
+    run_cfg_path = Path(options.run_cfg_file) if options.run_cfg_file else None
+    template_cfg_path = Path(options.template_cfg_file) if options.template_cfg_file else None
+
+    ConfigDirIndex.clear_cache()
+
+    watcher = None
+    if options.watch_cfg:
+        watcher = _get_watcher(
+            bcfg_path,
+            run_cfg_path,
+            options.on_cfg_change,
+            options.watch_interval,
+            run_context,
+        )
+
+    bundle = None
+    if bcfg_path.suffix == BUNDLE_EXT:
+        with phase("load_cfg"):
+            bundle = ConfigBundle.load(bcfg_path)
+
+    layers = _get_layers(bcfg_path, options, bundle)
+    num_workers = options.num_workers
+    with phase("load_cfg"):
+        store = _get_store(
+            bcfg_path,
+            template_cfg_path,
+            run_cfg_path,
+            num_workers,
+            watcher,
+            layers,
+            options.lazy_cfg,
+            bundle,
+        )
+    run_context.swap_store(store)
+
+    overrides: Dict[str, Any] = {}
+    if watcher is not None and len(layers) > 0:
+        overrides.update(flatten(merge_layers(layers)))
+
+    return watcher, overrides
+
+
+def _prepare_run(
+    run_context: _RunContext,
+    options: HmainOptions,
+    cfg: Optional[CFG_T] = None,
+) -> Tuple[Optional[ConfigWatcher], Dict[str, Any]]:
+    """Load the config of a run, name the run and create its output directory.
+
+    Unless it is given, the config is loaded from its files and from the other config
+    sources. Then, it is validated against the schema (if any) and the run is set up
+    by ``_init_run``. No stats are collected here (see ``_setup_run``).
+
+    Args:
+        run_context: The context of the run.
+        options: The options given to ``hmain``.
+        cfg: The config of the run (optional). If given, config files are not loaded
+            and the command line is not parsed.
+
+    Returns:
+        The watcher for the config files (if requested) and the values parsed
+        from the command line.
+    """
+    run_cfg_path = None
+    watcher: Optional[ConfigWatcher] = None
+    overrides: Dict[str, Any] = {}
+    if cfg is None:
+        run_cfg_path = Path(options.run_cfg_file) if options.run_cfg_file else None
+        watcher, overrides = _load_run_cfg(run_context, options)
+    else:
+        run_context.swap_store(ConfigStore(cfg))
+
+    if options.schema is not None:
+        with phase("validate_schema"):
+            run_context.get_typed_cfg(options.schema)
+
+    _init_run(
+        options.run_name_strategy,
+        options.create_out_dir,
+        options.out_dir_root,
+        run_cfg_path,
+        options.run_registry,
+        options.background_run_file,
+        options.fsync_run_file,
+    )
+
+    return watcher, overrides
+
+
+def _run(
+    fn: FUNCTION_T,
+    options: HmainOptions,
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    cfg: Optional[CFG_T] = None,
+    run_context: Optional[_RunContext] = None,
+) -> Any:
+    """Run a function decorated with ``hmain``.
+
+    This is expected to be called in a new context, that is assigned to the run.
+
+    Args:
+        fn: The decorated function.
+        options: The options given to ``hmain``.
+        args: The positional arguments for the function.
+        kwargs: The keyword arguments for the function.
+        cfg: The config of the run (optional). If given, config files are not loaded
+            and the command line is not parsed.
+        run_context: The context of the run (default: a new context).
+
+    Returns:
+        The value returned by the function.
+    """
+    if run_context is None:
+        run_context = _RunContext(ConfigStore())
+    _enter_run(run_context)
+    try:
+        if cfg is None:
+            _set_cfg_cache(options)
+
+        watcher, overrides = _setup_run(run_context, options, cfg)
+        if watcher is None:
+            return fn(*args, **kwargs)
+
+        _start_watching(watcher, overrides)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            watcher.stop()
+    finally:
+        _exit_run(run_context)
+
+
+async def _run_async(
+    fn: FUNCTION_T,
+    options: HmainOptions,
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    cfg: Optional[CFG_T] = None,
+    run_context: Optional[_RunContext] = None,
+) -> Any:
+    """Run a coroutine function decorated with ``hmain``.
+
+    This is expected to be run as a new task, so that the run gets its own context.
+    Blocking operations (loading the config, creating the output directory and saving
+    the run file) are executed in the default executor of the event loop, unless a
+    template file is given: the TUI is run in the thread of the event loop.
+
+    Args:
+        fn: The decorated coroutine function.
+        options: The options given to ``hmain``.
+        args: The positional arguments for the function.
+        kwargs: The keyword arguments for the function.
+        cfg: The config of the run (optional). If given, config files are not loaded
+            and the command line is not parsed.
+        run_context: The context of the run (default: a new context).
+
+    Returns:
+        The value returned by the function.
+    """
+    import asyncio
+
+    if run_context is None:
+        run_context = _RunContext(ConfigStore())
+    _enter_run(run_context)
+    try:
+        if cfg is None:
+            _set_cfg_cache(options)
+
+        loop = asyncio.get_event_loop()
+        if cfg is None and options.template_cfg_file is not None:
+            # the TUI must run in the thread of the loop (e.g. to install signal handlers)
+            watcher, overrides = _setup_run(run_context, options)
+        else:
+            setup = functools.partial(copy_context().run, _setup_run, run_context, options, cfg)
+            watcher, overrides = await loop.run_in_executor(None, setup)
+        if watcher is None:
+            return await fn(*args, **kwargs)
+
+        _start_watching(watcher, overrides)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            await loop.run_in_executor(None, watcher.stop)
+    finally:
+        _exit_run(run_context)
 
 
 def _create_out_dir_and_save_run_file(
-    cfg: CFG_T,
     out_dir_root: str,
     run_cfg_path: Optional[Path],
+    register_run: bool = False,
+    background: bool = False,
+    fsync: bool = False,
+    name_strategy: Optional[str] = None,
 ) -> None:
     """Create output directory for the current run.
 
     A new directory is created for the current run
     and the run file is saved in it (if needed).
+    The run file is written atomically.
+
+    The directory is claimed atomically: if the run name was generated with
+    a strategy and the directory already exists, a new name is chosen.
 
     Args:
-        cfg: The loaded config.
         out_dir_root: The root for output directories.
         run_cfg_path: The path to the config file created by the user for this run.
+        register_run: A flag that indicates whether the new run should be added
+            to the run registry of ``out_dir_root`` (default: False).
+        background: A flag that indicates whether the run file should be saved
+            in a background thread (default: False).
+        fsync: A flag that indicates whether the run file should be flushed
+            to disk (default: False).
+        name_strategy: The strategy used to generate the run name or None if
+            the name was given by the user (default: None).
 
     Raises:
         ValueError: If the run name is not specified in the given config.
+        FileExistsError: If the name was given by the user and the directory
+            already exists.
     """
-    run_name = cfg.get(RUN_NAME_KEY, "")
+    run_name = _get_cfg_run_name()
     if run_name == "":
         msg = f"The config must contain a valid name for the run (key={RUN_NAME_KEY})."
         raise ValueError(msg)
@@ -133,9 +759,80 @@ def _create_out_dir_and_save_run_file(
         create_dir = run_file.absolute() != run_cfg_path.absolute()
 
     if create_dir:
-        run_dir.mkdir(parents=True, exist_ok=False)
-        cfg[OUT_DIR_KEY] = str(run_dir.absolute())
-        ConfigHandler.save_cfg(cfg, run_file)
+        with phase("create_out_dir"):
+            claimed_name, run_dir = claim_run_dir(
+                Path(out_dir_root), run_name, name_strategy, _get_cfg_for_name(name_strategy)
+            )
+        if claimed_name != run_name:
+            run_name = claimed_name
+            set_cfg(RUN_NAME_KEY, run_name)
+        run_file = run_dir / RUN_FILE_NAME
+        set_cfg(OUT_DIR_KEY, str(run_dir.absolute()))
+        store = _get_context().store
+        with phase("save_run_file"):
+            if background:
+                save_cfg_in_background(store.copy().get_resolved_cfg, run_file, fsync)
+            else:
+                cfg = store.get_resolved_cfg()
+                ConfigHandler.save_cfg(thaw(cfg), run_file, atomic=True, fsync=fsync)
+        if register_run:
+            with phase("register_run"):
+                RunRegistry(out_dir_root).register(run_name, store.get_resolved_cfg())
+
+
+def _init_run(
+    run_name_strategy: Optional[str],
+    create_out_dir: bool,
+    out_dir_root: str,
+    run_cfg_path: Optional[Path],
+    run_registry: bool = False,
+    background_run_file: bool = False,
+    fsync_run_file: bool = False,
+) -> None:
+    """Name the current run and create its output directory (if needed).
+
+    Args:
+        run_name_strategy: The strategy to assign a default run name if this is
+            not specified by user (optional).
+        create_out_dir: A flag that indicates whether an output directory
+            should be created for the run.
+        out_dir_root: The root for output directories.
+        run_cfg_path: The path to the config file created by the user for this run.
+        run_registry: A flag that indicates whether the new run should be added
+            to the run registry of ``out_dir_root`` (default: False).
+        background_run_file: A flag that indicates whether the run file should be saved
+            in a background thread (default: False).
+        fsync_run_file: A flag that indicates whether the run file should be flushed
+            to disk (default: False).
+
+    Raises:
+        ValueError: If the run name is not specified in the config
+            and no default strategy is specified.
+    """
+    run_name = _get_cfg_run_name()
+    name_strategy = None
+    if run_name == "" and run_name_strategy is not None:
+        run_name = get_default_run_name(run_name_strategy, _get_cfg_for_name(run_name_strategy))
+        set_cfg(RUN_NAME_KEY, run_name)
+        name_strategy = run_name_strategy
+
+    if run_name == "":
+        msg = (
+            f"A valid name must be provided for the run. Provide one "
+            f"by setting a value for the key {RUN_NAME_KEY} or "
+            f'selecting a default strategy (e.g. "date")'
+        )
+        raise ValueError(msg)
+
+    if create_out_dir:
+        _create_out_dir_and_save_run_file(
+            out_dir_root,
+            run_cfg_path,
+            run_registry,
+            background_run_file,
+            fsync_run_file,
+            name_strategy,
+        )
 
 
 def hmain(
@@ -146,6 +843,21 @@ def hmain(
     out_dir_root: str = "logs",
     run_name_strategy: Optional[str] = RUN_NAME_STRATEGY_DATE,
     parse_cmd_line: bool = True,
+    cfg_cache_dir: Optional[Union[str, Path]] = None,
+    cfg_cache_max_size: Optional[int] = None,
+    num_workers: int = 1,
+    watch_cfg: bool = False,
+    on_cfg_change: Optional[Callable[[CFG_DIFF_T], None]] = None,
+    watch_interval: float = 1.0,
+    run_registry: bool = False,
+    on_stats: Optional[Callable[[RunStats], None]] = None,
+    save_stats: bool = False,
+    background_run_file: bool = False,
+    fsync_run_file: bool = False,
+    override_cfg_files: Sequence[Union[str, Path]] = (),
+    env_prefix: Optional[str] = None,
+    lazy_cfg: bool = False,
+    schema: Optional[Any] = None,
 ) -> Callable[[FUNCTION_T], FUNCTION_T]:
     """Hesiod decorator for a given function (typically the main).
 
@@ -162,17 +874,101 @@ def hmain(
     Before giving the control back to the decorated function, Hesiod creates a directory named as
     the run inside ``out_dir_root`` and saves the loaded config in a single file in it. This can be
     disabled with the argument ``create_out_dir``. The default value for ``out_dir_root`` is ``logs``.
+    The run file is written to a temporary file that is atomically renamed, so it is never left
+    partially written. With ``fsync_run_file`` it is also flushed to disk, while with
+    ``background_run_file`` it is saved in a background thread, so that the decorated function
+    starts immediately: pending run files are completed before the interpreter exits.
 
     If the run has no name (either because it is not provided in the run file or it is not inserted
     by the user in the TUI), Hesiod will try to name it according to the ``run_name_strategy``, if
     given. ``run_name_strategy`` default is "date", meaning that runs will be named with the date
-    and time formatted as "YYYY-MM-DD-hh-mm-ss".
+    and time formatted as "YYYY-MM-DD-hh-mm-ss". Other strategies are "ulid", that names runs with
+    ids unique across processes and hosts and sortable by time, and "hash", that names runs with a
+    hash of their config followed by a random nonce. The output directory of a run is claimed
+    atomically: if the directory of a run named with a strategy already exists (e.g. because many
+    runs start in the same second), the run is renamed ("YYYY-MM-DD-hh-mm-ss_1" and so on for dates,
+    a new id for "ulid" and a new nonce for "hash"). Names given by the user are never changed.
+
+    With ``lazy_cfg``, the subtrees of the run file that have a base are resolved only when
+    they are used for the first time (e.g. by ``hcfg``), so that the files of the bases that
+    are never used are not parsed at all. The run file is always saved with the whole config:
+    to keep this off the critical path, combine ``lazy_cfg`` with ``background_run_file``, so
+    that the config is loaded completely (on a copy) in the background thread that saves it.
+    Naming runs with the "hash" strategy or adding them to the run registry loads the whole
+    config before the decorated function is called.
+
+    The config can be validated against a ``schema``, that is a dataclass or a ``TypedDict``
+    (see ``get_typed_cfg``). The schema is compiled when the function is decorated and the
+    config is validated in a single pass, after it is loaded and before the output directory
+    of the run is created: all the values that do not match the schema are reported at once.
+    The object built from the config can then be retrieved with ``get_typed_cfg(schema)``.
+
+    ``base_cfg_dir`` can also be the path to a bundle compiled with ``hesiod compile``
+    (a file with extension ``.hbundle``). In this case, configs are loaded from the bundle,
+    without globbing the base directory or parsing base config files.
 
     By default, Hesiod parses command line arguments to add/override config values. This can be
-    disabled with the argument ``parse_cmd_line``.
+    disabled with the argument ``parse_cmd_line``. Config values can also be overridden by the
+    files given with ``override_cfg_files`` (that can have bases, as run files) and by the
+    environment variables that start with ``env_prefix``, where nested keys are separated by
+    a double underscore (e.g. ``HESIOD_net__lr=0.1`` with prefix ``HESIOD_``). Config sources
+    are deep-merged in a single pass, with the following precedence (from the lowest):
+    base configs, run file (or template), override files (in the given order), environment
+    variables and command line arguments. Bases are not deep-merged: they only fill in the
+    keys that are missing where they are used.
+
+    ``hmain`` can also decorate coroutine functions (``async def``). In this case, loading the
+    config, creating the output directory and saving the run file are executed in the default
+    executor of the event loop, so that the loop is not blocked. With ``template_cfg_file``,
+    the setup of the run is executed in the thread of the event loop instead, since the TUI
+    cannot run in other threads. Coroutine functions are supported only on Python 3.7+: with the
+    ``contextvars`` backport used on Python 3.6, asyncio tasks do not get their own context, so
+    concurrent runs would share their config.
+
+    Each call of the decorated function runs in its own config context (see ``contextvars``):
+    ``hcfg``, ``set_cfg`` and the other functions of Hesiod refer to the config of the run in
+    which they are called, so several runs can be executed at the same time by different threads.
+    Asyncio tasks created during a run inherit its context automatically. Code that is not executed
+    in the context of any run, such as threads started with ``threading.Thread`` or code executed
+    after the run ends, refers to the only active run or, if no run is active, to the most recently
+    started run of the process. When several runs are active, such code raises ``ValueError``
+    instead: threads started during a run must execute their code with
+    ``contextvars.copy_context().run`` to refer to their run (e.g. with
+    ``loop.run_in_executor(None, functools.partial(copy_context().run, fn))``).
+
+    Parsed config files can be cached on disk by passing a directory with the argument
+    ``cfg_cache_dir``: following runs will load unchanged files from the cache instead
+    of parsing them again. The size of the cache can be limited with ``cfg_cache_max_size``.
+    Base config files can also be parsed in parallel, by setting ``num_workers`` to the
+    desired size of the pool of workers.
+
+    Long-running runs can pick up changes to their config files without restarting by
+    setting ``watch_cfg``: while the decorated function runs, the run file and the base
+    files it was resolved from are watched and, when one of them changes, the global
+    config is reloaded and swapped atomically. Only the changed file is parsed again and
+    only the parts of the config that depend on it are resolved again. Values given with
+    override files, environment variables or on the command line, as well as values set with
+    ``set_cfg`` during the run, still override the reloaded ones. The keys that changed are
+    passed to ``on_cfg_change``, if given, as a dictionary that maps each dotted key to the pair
+    (old value, new value).
+
+    Runs can be added to a registry stored in ``out_dir_root`` by setting ``run_registry``.
+    The registry indexes the config values of each run, so that past runs can be found
+    by config values (e.g. with ``hesiod runs "net.name == resnet18 and lr < 0.01"``)
+    without parsing their run files.
+
+    The setup of a run can be profiled by passing a function with ``on_stats``, that
+    receives the stats of the run before the decorated function is called, or by setting
+    ``save_stats``, to save them in the file ``stats.json`` of the output directory.
+    Stats include the time spent in each phase of the setup (``load_cfg``, with the time
+    spent parsing files in ``parse_files``, ``parse_args``, ``validate_schema``,
+    ``create_out_dir``, ``save_run_file``, ``register_run`` and the whole ``setup``) and
+    counters such as ``files_parsed``, ``bytes_read``, ``cache_hits``, ``bases_resolved``
+    and ``resolution_steps``. Stats are not collected at all if they are not requested.
 
     Args:
-        base_cfg_dir: The path to the directory with all the base config files.
+        base_cfg_dir: The path to the directory with all the base config files
+            or to a compiled bundle.
         template_cfg_file: The path to the template config file (optional).
         run_cfg_file: The path to the run config file created by the user
             for this run (optional).
@@ -180,99 +976,178 @@ def hmain(
             an output directory for the run or not (default: True).
         out_dir_root: The root for output directories (default: "logs").
         run_name_strategy: The strategy to assign a default run name if this is
-            not specified by user (available options: "date", default: "date").
+            not specified by user (available options: "date", "ulid", "hash",
+            default: "date").
         parse_cmd_line: A flag that indicates whether hesiod should parse args
             from the command line or not (default: True).
+        cfg_cache_dir: The path to the directory for the persistent cache of
+            parsed config files (optional, default: caching disabled).
+        cfg_cache_max_size: The maximum size in bytes of the persistent cache
+            (optional, default: no limit).
+        num_workers: The number of workers used to parse base config files in
+            parallel (default: 1).
+        watch_cfg: A flag that indicates whether hesiod should reload the config
+            when the run file or its base files change (default: False).
+        on_cfg_change: A function called with the changed values every time that
+            the config is reloaded (optional). It is called from a background thread.
+        watch_interval: The interval in seconds between checks for changes, when
+            inotify is not available (default: 1.0).
+        run_registry: A flag that indicates whether the run should be added to the
+            run registry of ``out_dir_root``, when its directory is created (default: False).
+        on_stats: A function called with the stats of the setup of the run (optional).
+        save_stats: A flag that indicates whether the stats of the setup of the run should
+            be saved in its output directory (default: False).
+        background_run_file: A flag that indicates whether the run file should be saved
+            in a background thread (default: False).
+        fsync_run_file: A flag that indicates whether the run file should be flushed
+            to disk (default: False).
+        override_cfg_files: The paths to config files whose values override the ones
+            of the run config, from the lowest to the highest precedence (optional).
+        env_prefix: The prefix of the environment variables that override config
+            values (optional, default: environment variables are not used).
+        lazy_cfg: A flag that indicates whether the subtrees of the run config with
+            a base should be resolved only when they are used (default: False).
+        schema: A dataclass or a ``TypedDict`` used to validate the config (optional).
 
     Raises:
         ValueError: If hesiod is asked to parse the command line and one
             of the args is in a not supported format.
         ValueError: If the run name is not specified in the run file
             and no default strategy is specified.
+        ValueError: If ``watch_cfg`` is True and no run file is given or
+            ``base_cfg_dir`` is a bundle.
+        ValueError: If the config does not match ``schema``.
+        TypeError: If ``schema`` is not a dataclass or a ``TypedDict``.
+        TypeError: If the decorated function is a coroutine function and Python is older
+            than 3.7.
 
     Returns:
         The given function wrapped in hesiod decorator.
     """
+    if schema is not None:
+        compile_schema(schema)
+
+    hmain_options = HmainOptions(
+        base_cfg_dir=base_cfg_dir,
+        template_cfg_file=template_cfg_file,
+        run_cfg_file=run_cfg_file,
+        create_out_dir=create_out_dir,
+        out_dir_root=out_dir_root,
+        run_name_strategy=run_name_strategy,
+        parse_cmd_line=parse_cmd_line,
+        cfg_cache_dir=cfg_cache_dir,
+        cfg_cache_max_size=cfg_cache_max_size,
+        num_workers=num_workers,
+        watch_cfg=watch_cfg,
+        on_cfg_change=on_cfg_change,
+        watch_interval=watch_interval,
+        run_registry=run_registry,
+        on_stats=on_stats,
+        save_stats=save_stats,
+        background_run_file=background_run_file,
+        fsync_run_file=fsync_run_file,
+        override_cfg_files=override_cfg_files,
+        env_prefix=env_prefix,
+        lazy_cfg=lazy_cfg,
+        schema=schema,
+    )
 
     def decorator(fn: FUNCTION_T) -> FUNCTION_T:
-        @functools.wraps(fn)
-        def decorated_fn(*args: Any, **kwargs: Any) -> Any:
-            global _CFG
+        if inspect.iscoroutinefunction(fn):
+            if sys.version_info < (3, 7):
+                raise TypeError(
+                    "hmain can decorate coroutine functions only on Python 3.7+, since asyncio "
+                    "tasks do not have their own config context on older versions."
+                )
 
-            bcfg_path = Path(base_cfg_dir)
-            run_cfg_path = Path(run_cfg_file) if run_cfg_file else None
-            template_cfg_path = Path(template_cfg_file) if template_cfg_file else None
+            @functools.wraps(fn)
+            async def async_decorated_fn(*args: Any, **kwargs: Any) -> Any:
+                import asyncio
 
-            _CFG = _get_cfg(bcfg_path, template_cfg_path, run_cfg_path)
+                loop = asyncio.get_event_loop()
+                return await loop.create_task(_run_async(fn, hmain_options, args, kwargs))
 
-            if parse_cmd_line and len(sys.argv) > 1:
-                _parse_args(sys.argv[1:])
+            decorated_fn: FUNCTION_T = async_decorated_fn
+        else:
 
-            run_name = _CFG.get(RUN_NAME_KEY, "")
-            if run_name == "" and run_name_strategy is not None:
-                run_name = _get_default_run_name(run_name_strategy)
-                _CFG[RUN_NAME_KEY] = run_name
+            @functools.wraps(fn)
+            def sync_decorated_fn(*args: Any, **kwargs: Any) -> Any:
+                return copy_context().run(_run, fn, hmain_options, args, kwargs)
 
-            if run_name == "":
-                msg = (
-                    f"A valid name must be provided for the run. Provide one "
-                    f"by setting a value for the key {RUN_NAME_KEY} or "
-                    f'selecting a default strategy (e.g. "date")'
-                )
-                raise ValueError(msg)
-
-            if create_out_dir:
-                _create_out_dir_and_save_run_file(_CFG, out_dir_root, run_cfg_path)
-
-            return fn(*args, **kwargs)
+            decorated_fn = sync_decorated_fn
 
+        setattr(decorated_fn, HMAIN_OPTIONS_ATTR, hmain_options)
         return decorated_fn
 
     return decorator
 
 
-def hcfg(name: str, t: Optional[Type[T]] = None) -> T:
+def hcfg(name: str, t: Optional[Type[T]] = None, mutable: bool = False) -> T:
     """Get the requested parameter from the global configuration.
 
     The ``name`` argument is used to identify the requested parameter.
     It can be a composition of keys and subkeys separated by dots
     (as in ``key.subkey.subsubkey...``), if the requested parameter comes
-    from nested config dictionaries.
+    from nested config dictionaries. Parameters are looked up in a flat index
+    of dotted keys, so the cost of the lookup does not depend on the depth.
 
     The ``t`` argument is optional and represents the expected Type of the
     requested parameter. If given, it allows Hesiod to check that the requested
     parameter is of the expected type. Furthermore, it enables proper code
-    completion, static type checking and similar stuff.
+    completion, static type checking and similar stuff. Successful checks are
+    cached until the parameter is changed with ``set_cfg``, so repeated typed
+    reads of an unchanged parameter do not check it again.
+
+    The requested parameter is returned without copying it: dictionaries, lists
+    and sets are read-only views of the global configuration (they raise ``TypeError``
+    when modified). Pass ``mutable=True`` to get a mutable deep copy instead.
+
+    String parameters can reference other parameters, as in ``${dataset.root}/train``,
+    or compute their value with a resolver, as in ``${env:DATA_DIR}`` (see
+    ``register_resolver``). Interpolations are evaluated the first time that the
+    parameter is requested and cached until one of the parameters they depend on is
+    changed with ``set_cfg``.
 
     Args:
         name: The name of the required parameter.
         t: The expected type of the required parameter (optional).
+        mutable: A flag that indicates whether a mutable copy of the parameter
+            should be returned (default: False).
 
     Raises:
         TypeError: If ``t`` is not None and the requested parameter is not of the expected type.
+        ValueError: If the requested parameter has interpolations that cannot be resolved.
 
     Returns:
         The requested parameter.
     """
-    value = _CFG
-    for n in name.split("."):
-        value = value[n]
+    value = _get_context().store.get(name, t)
 
-    if t is not None:
-        check_type(name, value, t)
-
-    value = deepcopy(value)
+    if mutable:
+        value = thaw(value)
 
     return cast(T, value)
 
 
-def get_cfg_copy() -> CFG_T:
+def get_cfg_copy(mutable: bool = False) -> CFG_T:
     """Return a copy of the global configuration.
 
+    By default, the returned configuration is a read-only view of the global one,
+    obtained without copying it. Pass ``mutable=True`` to get a mutable deep copy.
+    Interpolations are resolved in the returned configuration.
+
+    Args:
+        mutable: A flag that indicates whether a mutable copy of the global
+            configuration should be returned (default: False).
+
+    Raises:
+        ValueError: If some interpolations cannot be resolved.
+
     Returns:
         A copy of the global configuration.
     """
-    return deepcopy(_CFG)
+    cfg = _get_context().store.get_resolved_cfg()
+    return thaw(cfg) if mutable else cfg
 
 
 def get_out_dir() -> Path:
@@ -281,8 +1156,7 @@ def get_out_dir() -> Path:
     Returns:
         The path to the output directory.
     """
-    out_dir = deepcopy(_CFG[OUT_DIR_KEY])
-    return Path(out_dir)
+    return Path(_get_context().store.get(OUT_DIR_KEY))
 
 
 def get_run_name() -> str:
@@ -296,7 +1170,7 @@ def get_run_name() -> str:
     Returns:
         The name of the current run.
     """
-    run_name = _CFG.get(RUN_NAME_KEY, "")
+    run_name = _get_cfg_run_name()
     if run_name == "":
         raise ValueError("Something went wrong: current run has no name.")
 
@@ -311,16 +1185,45 @@ def set_cfg(key: str, value: Any) -> None:
     case, each subkey corresponds to a config dictionary. If the given key (or one
     of the subkeys) doesn't exist, Hesiod will create it properly.
 
+    The global configuration is never modified in place: only the dictionaries along
+    the path to the given key are copied, so values previously returned by ``hcfg``
+    are not affected.
+
     Args:
         key: The name of the config to be set.
         value: The value to set.
     """
-    key_splits = key.split(".")
-    cfg = _CFG
-    for k in key_splits[:-1]:
-        if k not in cfg or type(cfg[k]) != dict:
-            cfg[k] = {}
-        cfg = cfg[k]
-
-    last_key = key_splits[-1]
-    cfg[last_key] = value
+    run_context = _get_context()
+    if run_context.watcher is not None:
+        run_context.watcher.set_value(key, value)
+    else:
+        run_context.store.set(key, value)
+    if run_context.typed_cfgs:
+        run_context.invalidate_typed_cfgs(key)
+
+
+def get_typed_cfg(schema: Type[T]) -> T:
+    """Get the config of the current run as an object built with the given schema.
+
+    The schema is a dataclass or a ``TypedDict``, possibly with fields whose type is
+    another dataclass or ``TypedDict``. It is compiled once, then the config is validated
+    against it in a single pass and all the errors are reported together. The returned
+    object has one read-only attribute for each field of the schema (with ``__slots__``),
+    as well as its nested objects, so values are read with plain attribute access
+    (e.g. ``cfg.net.num_layers``) without further lookups or type checks. Values of the
+    config that are not in the schema are ignored.
+
+    The object is cached until one of the values in it is changed with ``set_cfg``.
+    Schemas passed to ``hmain`` are validated before the decorated function is called.
+
+    Args:
+        schema: The schema.
+
+    Raises:
+        TypeError: If the schema is not a dataclass or a ``TypedDict``.
+        ValueError: If the config does not match the schema.
+
+    Returns:
+        The object built from the config.
+    """
+    return cast(T, _get_context().get_typed_cfg(schema))
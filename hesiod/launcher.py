@@ -0,0 +1,207 @@
+import functools
+import inspect
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from contextvars import copy_context
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, cast
+
+import hesiod.core as hcore
+from hesiod.cfg.cfgdirindex import ConfigDirIndex
+from hesiod.cfg.cfghandler import RUN_NAME_KEY
+from hesiod.cfg.cfgparser import CFG_T
+from hesiod.cfg.cfgstore import ConfigStore
+from hesiod.cfg.cfgwriter import wait_for_writes
+
+TASK_T = Tuple[int, CFG_T]
+
+_WORKER_FN: Optional[Callable[..., Any]] = None
+_WORKER_OPTIONS: Optional["hcore.HmainOptions"] = None
+_WORKER_ARGS: Tuple[Tuple[Any, ...], Dict[str, Any]] = ((), {})
+
+
+class RunResult(NamedTuple):
+    """The outcome of a run executed by ``launch``.
+
+    Attributes:
+        cfg_index: The position of the config of the run in the given configs.
+        run_name: The name of the run.
+        out_dir: The output directory of the run (None if it was not created).
+        result: The value returned by the function (None if the run failed).
+        error: The formatted traceback of the exception raised by the run
+            (None if the run succeeded).
+        duration: The time spent by the run, including its setup, in seconds.
+        worker_pid: The pid of the worker process that executed the run.
+    """
+
+    cfg_index: int
+    run_name: str
+    out_dir: Optional[str]
+    result: Any
+    error: Optional[str]
+    duration: float
+    worker_pid: int
+
+    @property
+    def ok(self) -> bool:
+        """Whether the run succeeded."""
+        return self.error is None
+
+
+def _init_worker(
+    fn: Callable[..., Any],
+    options: "hcore.HmainOptions",
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+) -> None:
+    """Initialize hesiod in a worker process.
+
+    This is done once per worker: the function, its arguments and the ``hmain``
+    options are kept for all the runs executed by the worker.
+
+    Args:
+        fn: The function decorated with ``hmain``.
+        options: The options given to ``hmain``.
+        args: The positional arguments for the function.
+        kwargs: The keyword arguments for the function.
+    """
+    global _WORKER_FN, _WORKER_OPTIONS, _WORKER_ARGS
+
+    _WORKER_FN = fn.__wrapped__  # type: ignore
+    _WORKER_OPTIONS = options
+    _WORKER_ARGS = (args, kwargs)
+
+    ConfigDirIndex.clear_cache()
+
+
+def _run_task(task: TASK_T) -> RunResult:
+    """Execute a single run in a worker process.
+
+    The run is set up as any other run of the function, in its own context, except
+    that its config is the given one instead of being loaded from files.
+
+    Args:
+        task: The index of the run and its config.
+
+    Returns:
+        The outcome of the run.
+    """
+    index, cfg = task
+    fn = cast(Callable[..., Any], _WORKER_FN)
+    options = cast(hcore.HmainOptions, _WORKER_OPTIONS)
+    args, kwargs = _WORKER_ARGS
+
+    run_context = hcore._RunContext(ConfigStore(cfg))
+    result = None
+    error = None
+    start = time.perf_counter()
+    try:
+        if inspect.iscoroutinefunction(fn):
+            import asyncio
+
+            loop = asyncio.new_event_loop()
+            try:
+                run = hcore._run_async(fn, options, args, kwargs, cfg, run_context)
+                result = loop.run_until_complete(run)
+            finally:
+                loop.close()
+        else:
+            run_fn = functools.partial(hcore._run, fn, options, args, kwargs, cfg, run_context)
+            result = copy_context().run(run_fn)
+    except Exception:
+        error = traceback.format_exc()
+    duration = time.perf_counter() - start
+    wait_for_writes()
+
+    run_name = run_context.store.index.get(RUN_NAME_KEY) or ""
+    out_dir = run_context.store.index.get(hcore.OUT_DIR_KEY)
+    return RunResult(index, run_name, out_dir, result, error, duration, os.getpid())
+
+
+def launch(
+    fn: Callable[..., Any],
+    cfgs: Iterable[CFG_T],
+    *args: Any,
+    num_workers: Optional[int] = None,
+    on_result: Optional[Callable[[RunResult], None]] = None,
+    **kwargs: Any,
+) -> List[RunResult]:
+    """Run a function decorated with ``hmain`` once for each of the given configs.
+
+    Runs are executed in a pool of processes. Each run gets its own config context and is
+    set up as a run of the decorated function (naming the run, validating the schema,
+    creating the output directory and reporting stats according to the options given to
+    ``hmain``), except that config files are not loaded and the command line is not parsed.
+    The name of each run is the one in its config, if any, that is used unchanged, or the
+    one given by the run name strategy of ``hmain``, that is changed if already taken
+    (e.g. by another run started in the same second).
+
+    Workers are initialized once: the function and its arguments are sent to each worker
+    only when it is started, while each run receives only its config. Configs are consumed
+    lazily, so they can be generated on the fly (e.g. by a sweep).
+
+    Coroutine functions are supported as well: each run is executed in a new event loop.
+
+    Results are collected in the calling process. Exceptions raised by a run do not stop
+    the other runs: they are reported in the result of the failed run.
+
+    Args:
+        fn: The function decorated with ``hmain``. It must be picklable, i.e. defined at
+            the top level of a module.
+        cfgs: The configs of the runs.
+        args: The positional arguments for the function.
+        num_workers: The number of worker processes (default: the number of CPUs).
+        on_result: A function called in the calling process with the outcome of each run,
+            as soon as it is available (optional).
+        kwargs: The keyword arguments for the function.
+
+    Raises:
+        ValueError: If the given function is not decorated with ``hmain``.
+
+    Returns:
+        The outcomes of the runs, in the same order of the given configs.
+    """
+    options = getattr(fn, hcore.HMAIN_OPTIONS_ATTR, None)
+    if options is None:
+        raise ValueError("The launched function must be decorated with hmain.")
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    num_workers = num_workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(
+        max_workers=num_workers,
+        initializer=_init_worker,
+        initargs=(fn, options, args, kwargs),
+    )
+    max_pending = 2 * num_workers
+
+    results: List[RunResult] = []
+    pending: Set[Future] = set()
+    tasks: Dict[Future, TASK_T] = {}
+
+    def collect(done: Iterable[Future]) -> None:
+        for future in done:
+            index, cfg = tasks.pop(future)
+            try:
+                run_result = future.result()
+            except Exception:
+                run_name = cfg.get(RUN_NAME_KEY) or ""
+                run_result = RunResult(index, run_name, None, None, traceback.format_exc(), 0.0, 0)
+            results.append(run_result)
+            if on_result is not None:
+                on_result(run_result)
+
+    with executor:
+        for index, cfg in enumerate(cfgs):
+            task = (index, cfg)
+            future = executor.submit(_run_task, task)
+            tasks[future] = task
+            pending.add(future)
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        done, _ = wait(pending)
+        collect(done)
+
+    return sorted(results, key=lambda r: r.cfg_index)
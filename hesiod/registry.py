@@ -0,0 +1,304 @@
+import json
+import os
+import re
+import time
+from ast import literal_eval
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from hesiod.cfg.cfghandler import ConfigHandler
+from hesiod.cfg.cfgparser import CFG_T
+from hesiod.cfg.cfgstore import ConfigStore
+
+if TYPE_CHECKING:
+    import sqlite3
+
+REGISTRY_FILE_NAME = "hesiod_runs.db"
+REGISTRY_TIMEOUT = 30.0
+RUN_FILE_NAME = "run.yaml"
+
+QUERY_OPS = {"==": "=", "!=": "!=", "<=": "<=", ">=": ">=", "<": "<", ">": ">"}
+QUERY_TOKEN_RE = re.compile(
+    r"""\s*(?:(?P<paren>[()])|(?P<op>==|!=|<=|>=|<|>)|"""
+    r"""(?P<word>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|[^\s()=!<>]+))"""
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS params (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value,
+    PRIMARY KEY (run_id, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS params_key_value ON params (key, value);
+"""
+
+
+class RunRegistry:
+    def __init__(self, out_dir_root: Union[str, Path]) -> None:
+        """Create the registry of the runs saved in a given output root.
+
+        The registry is an SQLite database stored in the output root, that indexes
+        every value of the config of each run by its dotted key. It is updated
+        incrementally when runs are registered, so that runs can be filtered by
+        config values without parsing their run files.
+
+        Args:
+            out_dir_root: The root for output directories.
+        """
+        self.out_dir_root = Path(out_dir_root)
+        self.db_file = self.out_dir_root / REGISTRY_FILE_NAME
+
+    def connect(self) -> "sqlite3.Connection":
+        """Open a connection to the registry, creating it if needed.
+
+        The database uses the default rollback journal of SQLite, that relies only on file
+        locks: the WAL journal would need shared memory, that is not available when the
+        output root is on a network filesystem (e.g. NFS) shared by several machines.
+
+        Returns:
+            The connection.
+        """
+        import sqlite3
+
+        self.out_dir_root.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_file), timeout=REGISTRY_TIMEOUT)
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.executescript(SCHEMA)
+        return conn
+
+    @staticmethod
+    def to_db_value(value: Any) -> Any:
+        """Convert a config value to a value that can be stored in the registry.
+
+        Args:
+            value: The config value.
+
+        Returns:
+            The value itself for numbers, strings and None, its JSON representation otherwise.
+        """
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        return json.dumps(value, default=str)
+
+    @staticmethod
+    def get_params(cfg: CFG_T) -> Iterator[Tuple[str, Any]]:
+        """Get the values of a config that are stored in the registry.
+
+        Args:
+            cfg: The config.
+
+        Returns:
+            An iterator over the dotted keys and the values of the leaves of the config.
+        """
+        for key, value in ConfigStore(cfg).index.items():
+            if not isinstance(value, dict):
+                yield key, RunRegistry.to_db_value(value)
+
+    def register(self, run_name: str, cfg: CFG_T) -> None:
+        """Add a run to the registry or update it if it is already registered.
+
+        Args:
+            run_name: The name of the run, i.e. the name of its directory in the output root.
+            cfg: The config of the run.
+        """
+        params = list(RunRegistry.get_params(cfg))
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO runs (name, created) VALUES (?, ?) "
+                    "ON CONFLICT (name) DO UPDATE SET created = excluded.created",
+                    (run_name, time.time()),
+                )
+                (run_id,) = conn.execute(
+                    "SELECT id FROM runs WHERE name = ?", (run_name,)
+                ).fetchone()
+                conn.execute("DELETE FROM params WHERE run_id = ?", (run_id,))
+                conn.executemany(
+                    "INSERT INTO params (run_id, key, value) VALUES (?, ?, ?)",
+                    ((run_id, key, value) for key, value in params),
+                )
+        finally:
+            conn.close()
+
+    def sync(self) -> int:
+        """Update the registry with the run directories in the output root.
+
+        Runs whose directory contains a run file but that are not registered are added,
+        while registered runs whose directory was removed are forgotten.
+
+        Returns:
+            The number of runs added.
+        """
+        run_names = set()
+        with os.scandir(self.out_dir_root) as it:
+            for entry in it:
+                if entry.is_dir() and os.path.isfile(os.path.join(entry.path, RUN_FILE_NAME)):
+                    run_names.add(entry.name)
+
+        conn = self.connect()
+        try:
+            registered = {name for (name,) in conn.execute("SELECT name FROM runs")}
+            with conn:
+                conn.executemany(
+                    "DELETE FROM runs WHERE name = ?",
+                    ((name,) for name in registered - run_names),
+                )
+        finally:
+            conn.close()
+
+        new_names = sorted(run_names - registered)
+        for run_name in new_names:
+            run_file = self.out_dir_root / run_name / RUN_FILE_NAME
+            self.register(run_name, ConfigHandler.load_cfg_file(run_file))
+        return len(new_names)
+
+    def find(self, query: Optional[str] = None) -> List[str]:
+        """Find the runs whose config satisfies a given query.
+
+        A query is made of predicates with the format "{key} {op} {value}", combined
+        with ``and``, ``or``, ``not`` and parentheses, as in
+        ``net.name == resnet18 and (params.lr < 0.01 or not params.wd == 0)``.
+        {key} is a dotted key, {op} is one of ``==``, ``!=``, ``<``, ``<=``, ``>``, ``>=``
+        and {value} is a python literal or a plain string. Predicates on keys that
+        are missing in the config of a run are false.
+
+        Args:
+            query: The query (default: all the runs).
+
+        Raises:
+            ValueError: If the query is not valid.
+
+        Returns:
+            The names of the matching runs, sorted by registration time.
+        """
+        where, params = _QueryParser(query).parse() if query else ("1", [])
+        sql = f"SELECT name FROM runs WHERE {where} ORDER BY created, name"
+        conn = self.connect()
+        try:
+            return [name for (name,) in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def get_values(self, run_name: str, keys: List[str]) -> Dict[str, Any]:
+        """Get some of the config values of a registered run.
+
+        Args:
+            run_name: The name of the run.
+            keys: The dotted keys of the values.
+
+        Returns:
+            The values, indexed by key. Missing keys are omitted.
+        """
+        marks = ", ".join("?" for _ in keys)
+        sql = (
+            "SELECT key, value FROM params JOIN runs ON params.run_id = runs.id "
+            f"WHERE runs.name = ? AND key IN ({marks})"
+        )
+        conn = self.connect()
+        try:
+            return dict(conn.execute(sql, [run_name, *keys]).fetchall())
+        finally:
+            conn.close()
+
+
+class _QueryParser:
+    def __init__(self, query: str) -> None:
+        """Create a parser that translates a run query into an SQL condition.
+
+        Args:
+            query: The query.
+
+        Raises:
+            ValueError: If the query contains invalid characters.
+        """
+        self.query = query
+        self.tokens: List[Tuple[str, str]] = []
+        pos = 0
+        query = query.rstrip()
+        while pos < len(query):
+            match = QUERY_TOKEN_RE.match(query, pos)
+            if match is None or match.end() == pos:
+                raise ValueError(f"Invalid query {self.query}.")
+            kind = match.lastgroup
+            self.tokens.append((kind, match.group(kind)))  # type: ignore
+            pos = match.end()
+        self.pos = 0
+        self.params: List[Any] = []
+
+    def parse(self) -> Tuple[str, List[Any]]:
+        """Parse the query.
+
+        Raises:
+            ValueError: If the query is not valid.
+
+        Returns:
+            The SQL condition and its parameters.
+        """
+        where = self._parse_or()
+        if self.pos < len(self.tokens):
+            raise ValueError(f"Invalid query {self.query}.")
+        return where, self.params
+
+    def _peek(self) -> Tuple[str, str]:
+        """Get the current token without consuming it ("" as kind at the end)."""
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else ("", "")
+
+    def _next(self) -> Tuple[str, str]:
+        """Consume the current token and return it."""
+        token = self._peek()
+        if token[0] == "":
+            raise ValueError(f"Invalid query {self.query}: unexpected end.")
+        self.pos += 1
+        return token
+
+    def _parse_or(self) -> str:
+        """Parse a sequence of conditions separated by ``or``."""
+        terms = [self._parse_and()]
+        while self._peek() == ("word", "or"):
+            self.pos += 1
+            terms.append(self._parse_and())
+        return terms[0] if len(terms) == 1 else "(" + " OR ".join(terms) + ")"
+
+    def _parse_and(self) -> str:
+        """Parse a sequence of conditions separated by ``and``."""
+        factors = [self._parse_not()]
+        while self._peek() == ("word", "and"):
+            self.pos += 1
+            factors.append(self._parse_not())
+        return factors[0] if len(factors) == 1 else "(" + " AND ".join(factors) + ")"
+
+    def _parse_not(self) -> str:
+        """Parse a negated condition, a condition in parentheses or a predicate."""
+        if self._peek() == ("word", "not"):
+            self.pos += 1
+            return f"NOT {self._parse_not()}"
+        if self._peek() == ("paren", "("):
+            self.pos += 1
+            where = self._parse_or()
+            if self._next() != ("paren", ")"):
+                raise ValueError(f"Invalid query {self.query}: missing parenthesis.")
+            return where
+        return self._parse_predicate()
+
+    def _parse_predicate(self) -> str:
+        """Parse a predicate with the format "{key} {op} {value}"."""
+        kind_key, key = self._next()
+        kind_op, op = self._next()
+        kind_value, value = self._next()
+        if kind_key != "word" or kind_op != "op" or kind_value != "word":
+            raise ValueError(f"Invalid query {self.query}: expected key, operator and value.")
+
+        try:
+            parsed_value = literal_eval(value)
+        except (ValueError, SyntaxError):
+            parsed_value = value
+
+        self.params.extend([key, RunRegistry.to_db_value(parsed_value)])
+        return "id IN (SELECT run_id FROM params " f"WHERE key = ? AND value {QUERY_OPS[op]} ?)"
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+from hesiod.cfg.cfghandler import RUN_NAME_KEY
+from hesiod.cfg.cfgparser import CFG_T
+from hesiod.cfg.readonly import thaw
+
+RUN_NAME_STRATEGY_DATE = "date"
+RUN_NAME_STRATEGY_ULID = "ulid"
+RUN_NAME_STRATEGY_HASH = "hash"
+RUN_NAME_STRATEGIES = [RUN_NAME_STRATEGY_DATE, RUN_NAME_STRATEGY_ULID, RUN_NAME_STRATEGY_HASH]
+RUN_NAME_DATE_FORMAT = "%Y-%m-%d-%H-%M-%S"
+RUN_NAME_SEQ_SEP = "_"
+
+ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ULID_RANDOM_BITS = 80
+CFG_HASH_LENGTH = 10
+NONCE_BYTES = 3
+MAX_CLAIM_ATTEMPTS = 10_000
+
+_ULID_LOCK = threading.Lock()
+_LAST_ULID: Tuple[int, int] = (0, 0)
+
+
+def new_ulid() -> str:
+    """Create a new ULID (Universally Unique Lexicographically Sortable Identifier).
+
+    A ULID is made of a timestamp in milliseconds and 80 random bits, encoded in 26
+    characters with Crockford's base32, so that ids sort by creation time. Ids created
+    by the same process in the same millisecond are made monotonic by incrementing the
+    random part of the previous one.
+
+    Returns:
+        The ULID.
+    """
+    global _LAST_ULID
+
+    with _ULID_LOCK:
+        timestamp = int(time.time() * 1000)
+        last_timestamp, last_random = _LAST_ULID
+        if timestamp <= last_timestamp:
+            timestamp = last_timestamp
+            randomness = last_random + 1
+            if randomness >> ULID_RANDOM_BITS:
+                timestamp, randomness = timestamp + 1, 0
+        else:
+            randomness = int.from_bytes(os.urandom(ULID_RANDOM_BITS // 8), "big")
+        _LAST_ULID = (timestamp, randomness)
+
+    value = (timestamp << ULID_RANDOM_BITS) | randomness
+    chars = []
+    for _ in range(26):
+        chars.append(ULID_ALPHABET[value & 0x1F])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def get_cfg_hash(cfg: CFG_T) -> str:
+    """Get a short hash of a config, that does not depend on the order of its keys.
+
+    The run name is not part of the hash.
+
+    Args:
+        cfg: The config.
+
+    Returns:
+        The hash, as hex string.
+    """
+    cfg = {k: v for k, v in thaw(cfg).items() if k != RUN_NAME_KEY}
+    content = json.dumps(cfg, sort_keys=True, default=repr)
+    return hashlib.sha256(content.encode()).hexdigest()[:CFG_HASH_LENGTH]
+
+
+def get_default_run_name(strategy: str, cfg: Optional[CFG_T] = None) -> str:
+    """Get a run name according the given strategy.
+
+    Available strategies are:
+
+    - "date": the current date and time, as in "YYYY-MM-DD-hh-mm-ss";
+    - "ulid": a ULID, unique across processes and hosts and sortable by time;
+    - "hash": a hash of the config followed by a random nonce, as in "{hash}-{nonce}",
+      so that runs with the same config share the prefix of their names.
+
+    Args:
+        strategy: The strategy to use to create the run name.
+        cfg: The config of the run, used by the "hash" strategy (default: empty config).
+
+    Returns:
+        The created run name ("" for unknown strategies).
+    """
+    if strategy == RUN_NAME_STRATEGY_DATE:
+        return datetime.now().strftime(RUN_NAME_DATE_FORMAT)
+    elif strategy == RUN_NAME_STRATEGY_ULID:
+        return new_ulid()
+    elif strategy == RUN_NAME_STRATEGY_HASH:
+        nonce = os.urandom(NONCE_BYTES).hex()
+        return f"{get_cfg_hash(cfg if cfg is not None else {})}-{nonce}"
+    return ""
+
+
+def _get_last_seq(out_dir_root: Path, run_name: str) -> int:
+    """Get the highest sequence number used as suffix for a given run name.
+
+    Args:
+        out_dir_root: The root for output directories.
+        run_name: The run name without suffix.
+
+    Returns:
+        The highest sequence number (0 if there are no suffixed names).
+    """
+    pattern = re.compile(re.escape(run_name + RUN_NAME_SEQ_SEP) + r"(\d+)$")
+    last_seq = 0
+    with os.scandir(out_dir_root) as it:
+        for entry in it:
+            match = pattern.match(entry.name)
+            if match is not None:
+                last_seq = max(last_seq, int(match.group(1)))
+    return last_seq
+
+
+def claim_run_dir(
+    out_dir_root: Path,
+    run_name: str,
+    strategy: Optional[str] = None,
+    cfg: Optional[CFG_T] = None,
+) -> Tuple[str, Path]:
+    """Create the output directory of a run, choosing another name if it is taken.
+
+    The directory is claimed atomically by creating it, so that concurrent runs (also
+    on different hosts that share the file system) never get the same directory. If
+    the name is already taken and the run name was generated with a strategy, a new
+    name is tried: date names get a sequence number as suffix, as in
+    "YYYY-MM-DD-hh-mm-ss_1", ULID names get a new ULID and hash names get a new nonce.
+
+    Sequence numbers follow the highest one found in the output root, which is scanned
+    again after every collision, so that runs started at the same time skip the numbers
+    claimed in the meantime instead of trying them one by one. After repeated collisions,
+    a random offset is added as well, so that these runs stop contending for the same
+    number.
+
+    Args:
+        out_dir_root: The root for output directories.
+        run_name: The run name.
+        strategy: The strategy used to generate the run name or None if the name
+            was given by the user (in which case it is never changed).
+        cfg: The config of the run, used by the "hash" strategy (optional).
+
+    Raises:
+        FileExistsError: If the directory already exists and the name cannot be changed.
+
+    Returns:
+        The claimed run name and the corresponding directory.
+    """
+    candidate = run_name
+    seq = 0
+    for attempt in range(MAX_CLAIM_ATTEMPTS):
+        run_dir = out_dir_root / candidate
+        try:
+            run_dir.mkdir(parents=True, exist_ok=False)
+            return candidate, run_dir
+        except FileExistsError:
+            if strategy is None or strategy not in RUN_NAME_STRATEGIES:
+                raise
+
+        if strategy == RUN_NAME_STRATEGY_DATE:
+            seq = max(seq, _get_last_seq(out_dir_root, run_name)) + 1
+            if attempt > 1:
+                seq += random.randrange(attempt)
+            candidate = f"{run_name}{RUN_NAME_SEQ_SEP}{seq}"
+        else:
+            candidate = get_default_run_name(strategy, cfg)
+
+    raise FileExistsError(f"Cannot find an available name for the run {run_name}.")
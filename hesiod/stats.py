@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, Optional
+
+STATS_FILE_NAME = "stats.json"
+
+
+class RunStats:
+    __slots__ = ("timings", "counters", "_lock")
+
+    def __init__(self) -> None:
+        """Create a collector for the timings and the counters of the setup of a run.
+
+        Timings are the seconds spent in each phase (e.g. ``load_cfg``, ``parse_args``,
+        ``create_out_dir``), summed over all the times the phase was entered. Counters
+        are the number of events of each kind (e.g. ``files_parsed``, ``bytes_read``).
+        Stats can be updated concurrently by the threads that work for the run.
+        """
+        self.timings: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Increment a counter.
+
+        Args:
+            name: The name of the counter.
+            n: The increment (default: 1).
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_time(self, name: str, seconds: float) -> None:
+        """Add time to a phase.
+
+        Args:
+            name: The name of the phase.
+            seconds: The time to add.
+        """
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a phase.
+
+        Args:
+            name: The name of the phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the stats as a dictionary.
+
+        Returns:
+            The timings (in seconds) and the counters.
+        """
+        with self._lock:
+            return {"timings": dict(self.timings), "counters": dict(self.counters)}
+
+    def save(self, out_dir: Path) -> None:
+        """Save the stats as JSON in a given directory.
+
+        Args:
+            out_dir: The directory where the stats file is saved.
+        """
+        with open(out_dir / STATS_FILE_NAME, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+class _NoPhase:
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+_NO_PHASE = _NoPhase()
+_STATS: ContextVar[Optional[RunStats]] = ContextVar("hesiod_run_stats", default=None)
+
+
+def get_stats() -> Optional[RunStats]:
+    """Get the stats collected for the current run.
+
+    Returns:
+        The stats or None if stats are not being collected.
+    """
+    return _STATS.get()
+
+
+@contextmanager
+def collecting(stats: Optional[RunStats]) -> Iterator[Optional[RunStats]]:
+    """Collect stats in the current context.
+
+    Args:
+        stats: The stats to update or None to disable stats.
+    """
+    token = _STATS.set(stats)
+    try:
+        yield stats
+    finally:
+        _STATS.reset(token)
+
+
+def count(name: str, n: int = 1) -> None:
+    """Increment a counter of the current run, if stats are being collected.
+
+    Args:
+        name: The name of the counter.
+        n: The increment (default: 1).
+    """
+    stats = _STATS.get()
+    if stats is not None:
+        stats.count(name, n)
+
+
+def phase(name: str) -> ContextManager[None]:
+    """Time a phase of the current run, if stats are being collected.
+
+    Args:
+        name: The name of the phase.
+
+    Returns:
+        A context manager that times the code it wraps.
+    """
+    stats = _STATS.get()
+    if stats is None:
+        return _NO_PHASE
+    return stats.phase(name)
@@ -7,6 +7,7 @@ from typing import Any, List, Optional, Tuple, Type
 
 from asciimatics.widgets import Label, Text, Widget  # type: ignore
 
+from hesiod.cfg.cfgdirindex import ConfigDirIndex
 from hesiod.cfg.cfghandler import CFG_T
 from hesiod.ui.tui.widgets.custom.datepicker import CustomDatePicker
 from hesiod.ui.tui.widgets.custom.dropdown import CustomDropdownList
@@ -231,14 +232,7 @@ class BaseWidgetParser(WidgetParser):
         Returns:
             The list of files.
         """
-        files: List[Path] = []
-        children = [p for p in dir_path.glob("*")]
-        for p in children:
-            if p.is_file():
-                files.append(p)
-            elif p.is_dir():
-                files.extend(BaseWidgetParser.get_files_list(p))
-        return files
+        return ConfigDirIndex.get(dir_path).get_all_files()
 
     @staticmethod
     def parse(cfg_key: str, label_prefix: str, cfg_value: Any, base_cfg_dir: Path) -> List[WGT_T]:
@@ -250,14 +244,13 @@ class BaseWidgetParser(WidgetParser):
             base_key = cfg_value.split("(")[-1].split(")")[0]
             base_keys = base_key.split(".")
 
-        root = base_cfg_dir
+        root = ConfigDirIndex.get(base_cfg_dir)
         for k in base_keys:
-            subdirs = [d for d in root.glob(k) if d.is_dir()]
-            if len(subdirs) != 1:
+            if k not in root.subdirs:
                 raise ValueError(f"Cannot find base key {base_key}")
-            root = subdirs[0]
+            root = root.subdirs[k]
 
-        files = sorted(BaseWidgetParser.get_files_list(root))
+        files = sorted(BaseWidgetParser.get_files_list(root.path))
         values = [(f.stem, i) for i, f in enumerate(files)]
         if len(values) == 0:
             raise ValueError(f"Cannot find any option for the base key {base_key}")
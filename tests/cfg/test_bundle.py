@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import pytest
+
+from hesiod.cfg.bundle import ConfigBundle, compile_bundle
+from hesiod.cfg.cfghandler import ConfigHandler
+from hesiod.cfg.cfgstore import ConfigStore
+from hesiod.cli import main
+
+
+def test_bundle(
+    tmp_path: Path,
+    base_cfg_dir: Path,
+    complex_run_file: Path,
+    simple_run_file: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    bundle_file = tmp_path / "cfg.hbundle"
+    compile_bundle(base_cfg_dir, [complex_run_file], bundle_file)
+    expected_complex = ConfigHandler.load_cfg(complex_run_file, base_cfg_dir)
+    expected_simple = ConfigHandler.load_cfg(simple_run_file, base_cfg_dir)
+
+    bundle = ConfigBundle.load(bundle_file)
+    assert bundle.base_cfgs == ConfigHandler.load_base_cfgs(base_cfg_dir)
+
+    monkeypatch.setattr(ConfigHandler, "load_cfg_file", None)
+    store = bundle.get_store(complex_run_file)
+    assert store.cfg == expected_complex
+    assert store.index == ConfigStore(expected_complex).index
+    assert store.get("dataset") is store.cfg["dataset"]
+    monkeypatch.undo()
+
+    assert bundle.get_store(simple_run_file).cfg == expected_simple
+
+
+def test_bundle_relative_path(
+    tmp_path: Path,
+    base_cfg_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    for name, value in [("a", 1), ("b", 2)]:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "run.yaml").write_text(f"x: {value}\n")
+
+    monkeypatch.chdir(tmp_path / "a")
+    bundle_file = tmp_path / "cfg.hbundle"
+    compile_bundle(base_cfg_dir, [Path("run.yaml")], bundle_file)
+    bundle = ConfigBundle.load(bundle_file)
+    assert bundle.get_store(Path("run.yaml")).cfg == {"x": 1}
+    assert bundle.get_store(tmp_path / "a" / ".." / "a" / "run.yaml").cfg == {"x": 1}
+
+    monkeypatch.chdir(tmp_path / "b")
+    assert bundle.get_store(Path("run.yaml")).cfg == {"x": 2}
+
+
+def test_bundle_wrong_file(tmp_path: Path) -> None:
+    bundle_file = tmp_path / "wrong.hbundle"
+    bundle_file.write_bytes(b"not a bundle")
+    with pytest.raises(ValueError):
+        ConfigBundle.load(bundle_file)
+
+
+def test_cli_compile(tmp_path: Path, base_cfg_dir: Path, complex_run_file: Path) -> None:
+    bundle_file = tmp_path / "cfg.hbundle"
+    main(["compile", str(base_cfg_dir), str(complex_run_file), "-o", str(bundle_file), "-j", "2"])
+
+    bundle = ConfigBundle.load(bundle_file)
+    expected_cfg = ConfigHandler.load_cfg(complex_run_file, base_cfg_dir)
+    assert bundle.get_store(complex_run_file).cfg == expected_cfg
@@ -0,0 +1,84 @@
+from pathlib import Path
+
+from hesiod.cfg.cfgcache import CACHE_ENTRY_EXT, ConfigCache
+from hesiod.cfg.cfghandler import ConfigHandler
+
+
+def test_cfg_cache(tmp_path: Path) -> None:
+    cfg_file = tmp_path / "cfg.yaml"
+    cfg_file.write_text("a: 1\nb: [1, 2]\n")
+    cache = ConfigCache(tmp_path / "cache")
+
+    assert cache.get(cfg_file) is None
+
+    cache.put(cfg_file, {"a": 1, "b": [1, 2]})
+    assert cache.get(cfg_file) == {"a": 1, "b": [1, 2]}
+
+    cfg_file.write_text("a: 2\nb: [1, 2]\n")
+    assert cache.get(cfg_file) is None
+
+
+def test_cfg_cache_eviction(tmp_path: Path) -> None:
+    cache = ConfigCache(tmp_path / "cache")
+    for i in range(5):
+        cfg_file = tmp_path / f"cfg{i}.yaml"
+        cfg_file.write_text(f"a: {i}\n")
+        cache.put(cfg_file, {"a": i})
+
+    entries = list(cache.cache_dir.glob(f"*{CACHE_ENTRY_EXT}"))
+    assert len(entries) == 5
+
+    entry_size = entries[0].stat().st_size
+    cache.evict(2 * entry_size)
+    assert len(list(cache.cache_dir.glob(f"*{CACHE_ENTRY_EXT}"))) == 2
+
+    cache.clear()
+    assert len(list(cache.cache_dir.glob(f"*{CACHE_ENTRY_EXT}"))) == 0
+
+
+def test_load_cfg_with_cache(tmp_path: Path, base_cfg_dir: Path, complex_run_file: Path) -> None:
+    expected_cfg = ConfigHandler.load_cfg(complex_run_file, base_cfg_dir)
+
+    ConfigHandler.set_cache(ConfigCache(tmp_path))
+    try:
+        cfg = ConfigHandler.load_cfg(complex_run_file, base_cfg_dir)
+        assert cfg == expected_cfg
+        assert len(list(tmp_path.glob(f"*{CACHE_ENTRY_EXT}"))) == 6
+
+        cfg = ConfigHandler.load_cfg(complex_run_file, base_cfg_dir)
+        assert cfg == expected_cfg
+    finally:
+        ConfigHandler.set_cache(None)
+
+
+def test_cfg_cache_state(tmp_path: Path) -> None:
+    cfg_file = tmp_path / "cfg.yaml"
+    cfg_file.write_text("a: 1\n")
+    cache = ConfigCache(tmp_path / "cache")
+
+    state = ConfigCache.get_file_state(cfg_file)
+    cfg_file.write_text("a: 22\n")
+    cache.put(cfg_file, {"a": 1}, state)
+    assert cache.get(cfg_file) is None
+
+    state = ConfigCache.get_file_state(cfg_file)
+    cache.put(cfg_file, {"a": 22}, state)
+    assert cache.get(cfg_file, state) == {"a": 22}
+
+
+def test_cfg_cache_size(tmp_path: Path) -> None:
+    cfg_file = tmp_path / "cfg0.yaml"
+    cfg_file.write_text("a: 0\n")
+    ConfigCache(tmp_path / "cache").put(cfg_file, {"a": 0})
+    entry_size = next((tmp_path / "cache").glob(f"*{CACHE_ENTRY_EXT}")).stat().st_size
+
+    cache = ConfigCache(tmp_path / "cache", max_size=3 * entry_size)
+    for i in range(1, 6):
+        cfg_file = tmp_path / f"cfg{i}.yaml"
+        cfg_file.write_text(f"a: {i}\n")
+        cache.put(cfg_file, {"a": i})
+        cache.put(cfg_file, {"a": i})
+        assert cache.size == min(i + 1, 3) * entry_size
+
+    entries = list(cache.cache_dir.glob(f"*{CACHE_ENTRY_EXT}"))
+    assert sum(e.stat().st_size for e in entries) == cache.size
@@ -0,0 +1,75 @@
+import os
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from hesiod.cfg.cfgdirindex import INODE_T, LISTING_T, ConfigDirIndex
+from hesiod.cfg.cfghandler import ConfigHandler
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> None:
+    ConfigDirIndex.clear_cache()
+
+
+def test_cfg_dir_index(base_cfg_dir: Path) -> None:
+    dir_index = ConfigDirIndex.get(base_cfg_dir)
+
+    assert dir_index is ConfigDirIndex.get(base_cfg_dir)
+    assert [f.name for f in dir_index.cfg_files] == [f.name for f in base_cfg_dir.glob("*.yaml")]
+    assert set(dir_index.subdirs.keys()) == set(["dataset", "net", "params"])
+    assert dir_index.subdirs["dataset"] is ConfigDirIndex.get(base_cfg_dir / "dataset")
+
+    all_files = [p for p in base_cfg_dir.glob("**/*") if p.is_file()]
+    assert sorted(dir_index.get_all_files()) == sorted(all_files)
+
+    with pytest.raises(NotADirectoryError):
+        ConfigDirIndex.get(base_cfg_dir / "var.yaml")
+
+
+def test_cfg_dir_index_symlinks(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / "a" / "b" / "cfg.yaml").write_text("x: 1\n")
+    (tmp_path / "a" / ".hidden.yaml").write_text("x: 2\n")
+    os.symlink(tmp_path / "a" / "b", tmp_path / "a" / "link_to_b")
+    os.symlink(tmp_path / "a", tmp_path / "a" / "b" / "link_to_a")
+
+    listed: List[Path] = []
+    list_dir = ConfigDirIndex.list_dir
+
+    def list_and_track(path: Path, inode: INODE_T) -> LISTING_T:
+        listed.append(path)
+        return list_dir(path, inode)
+
+    monkeypatch.setattr(ConfigDirIndex, "list_dir", list_and_track)
+
+    dir_index = ConfigDirIndex.get(tmp_path / "a")
+    assert dir_index.files == []
+    assert set(dir_index.subdirs.keys()) == set(["b", "link_to_b"])
+    assert dir_index.subdirs["b"].subdirs == {}
+    assert dir_index.subdirs["link_to_b"].cfg_files == [tmp_path / "a" / "link_to_b" / "cfg.yaml"]
+    assert len(listed) == 2
+
+    cfg = ConfigHandler.load_cfg_dir(tmp_path / "a")
+    assert cfg == {"b": {"cfg": {"x": 1}}, "link_to_b": {"cfg": {"x": 1}}}
+    assert len(listed) == 2
+
+
+def test_cfg_dir_index_changes(tmp_path: Path) -> None:
+    (tmp_path / "net").mkdir()
+    (tmp_path / "net" / "a.yaml").write_text("x: 1\n")
+    dir_index = ConfigDirIndex.get(tmp_path)
+    assert ConfigHandler.load_base_cfgs(tmp_path) == {"net": {"a": {"x": 1}}}
+
+    (tmp_path / "net" / "b.yaml").write_text("x: 2\n")
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "c.yaml").write_text("x: 3\n")
+    assert set(dir_index.subdirs.keys()) == set(["net", "data"])
+    assert ConfigHandler.load_base_cfgs(tmp_path) == {
+        "net": {"a": {"x": 1}, "b": {"x": 2}},
+        "data": {"c": {"x": 3}},
+    }
+
+    (tmp_path / "net" / "a.yaml").unlink()
+    assert [f.name for f in ConfigDirIndex.get(tmp_path / "net").cfg_files] == ["b.yaml"]
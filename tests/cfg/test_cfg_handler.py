@@ -1,8 +1,11 @@
 from pathlib import Path
+from typing import List
 
 import pytest
 
-from hesiod.cfg.cfghandler import ConfigHandler
+from hesiod.cfg.cfghandler import CFG_T, BaseResolver, ConfigHandler, LazyBaseConfigs
+from hesiod.cfg.cfgstore import ConfigStore
+from hesiod.stats import RunStats, collecting
 
 
 def test_load_cfg_file(cifar100_cfg_file: Path) -> None:
@@ -180,6 +183,24 @@ def test_replace_base_exception() -> None:
         ConfigHandler.replace_base(cfg, base_cfgs)
 
 
+def test_replace_bases_top_level() -> None:
+    cfg = {"base": "bases.a", "opt": {"name": "sgd"}}
+    base_cfgs = {
+        "bases": {
+            "a": {"base": "bases.b", "opt": {"name": "adam", "lr": 0.1}},
+            "b": {"opt": {"momentum": 0.9}, "p": 1},
+        }
+    }
+
+    new_cfg = ConfigHandler.replace_bases(cfg, base_cfgs)
+
+    assert new_cfg == {"opt": {"name": "sgd"}, "p": 1}
+    assert ConfigHandler.replace_bases({"base": "bases.a"}, base_cfgs)["opt"] == {
+        "name": "adam",
+        "lr": 0.1,
+    }
+
+
 def test_replace_bases() -> None:
     cfg = {"base": "bases.a", "p1": 1}
     base_cfgs = {
@@ -207,3 +228,121 @@ def test_replace_bases() -> None:
     assert new_cfg["p2"] == 1.23
     assert new_cfg["p3"] is True
     assert new_cfg["p4"] == (1, 2, 3)
+
+
+def test_load_cfg_lazy(
+    base_cfg_dir: Path, complex_run_file: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    loaded_files: List[str] = []
+    load_cfg_file = ConfigHandler.load_cfg_file
+
+    def load_and_track(cfg_file: Path) -> CFG_T:
+        loaded_files.append(cfg_file.stem)
+        return load_cfg_file(cfg_file)
+
+    monkeypatch.setattr(ConfigHandler, "load_cfg_file", load_and_track)
+    cfg = ConfigHandler.load_cfg(complex_run_file, base_cfg_dir)
+
+    expected_files = set(["complex", "cifar10", "efficientnet", "var", "train", "default"])
+    assert expected_files == set(loaded_files)
+    assert len(loaded_files) == len(expected_files)
+
+    eager_cfg = ConfigHandler.load_cfg_file(complex_run_file)
+    eager_cfg = ConfigHandler.replace_bases(eager_cfg, ConfigHandler.load_base_cfgs(base_cfg_dir))
+    assert cfg == eager_cfg
+
+
+def test_lazy_base_cfgs(base_cfg_dir: Path) -> None:
+    base_cfgs = LazyBaseConfigs(base_cfg_dir)
+
+    assert set(base_cfgs.keys()) == set(["var", "dataset", "net", "params"])
+    assert "cifar" in base_cfgs["dataset"]
+    assert "mnist" not in base_cfgs["dataset"]
+    assert base_cfgs.to_dict() == ConfigHandler.load_base_cfgs(base_cfg_dir)
+
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_load_base_cfgs_parallel(base_cfg_dir: Path, use_processes: bool) -> None:
+    serial_cfgs = ConfigHandler.load_base_cfgs(base_cfg_dir)
+    parallel_cfgs = ConfigHandler.load_base_cfgs(
+        base_cfg_dir, num_workers=4, use_processes=use_processes
+    )
+
+    assert parallel_cfgs == serial_cfgs
+    assert list(parallel_cfgs.keys()) == list(serial_cfgs.keys())
+    for key in serial_cfgs:
+        assert list(parallel_cfgs[key].keys()) == list(serial_cfgs[key].keys())
+
+
+def test_load_cfg_parallel(base_cfg_dir: Path, complex_run_file: Path) -> None:
+    serial_cfg = ConfigHandler.load_cfg(complex_run_file, base_cfg_dir)
+    parallel_cfg = ConfigHandler.load_cfg(complex_run_file, base_cfg_dir, num_workers=4)
+
+    assert parallel_cfg == serial_cfg
+    assert list(parallel_cfg.keys()) == list(serial_cfg.keys())
+
+
+def test_replace_bases_cycle() -> None:
+    base_cfgs = {"bases": {"a": {"base": "bases.b", "p1": 1}, "b": {"base": "bases.a", "p2": 2}}}
+    with pytest.raises(ValueError):
+        ConfigHandler.replace_bases({"base": "bases.a"}, base_cfgs)
+
+    base_cfgs = {"bases": {"a": {"sub": {"base": "bases.a"}}}}
+    with pytest.raises(ValueError):
+        ConfigHandler.replace_bases({"base": "bases.a"}, base_cfgs)
+
+
+def test_base_resolver() -> None:
+    base_cfgs = {
+        "bases": {
+            "a": {"base": "bases.b", "p1": 1, "sub": {"base": "bases.b"}},
+            "b": {"p2": [1, 2]},
+        }
+    }
+    resolver = BaseResolver(base_cfgs)
+    cfg = {"x": {"base": "bases.a"}, "y": {"base": "bases.a", "p1": 3}}
+    new_cfg = resolver.resolve(cfg)
+
+    assert new_cfg["x"] == {"p1": 1, "sub": {"p2": [1, 2]}, "p2": [1, 2]}
+    assert new_cfg["y"] == {"p1": 3, "sub": {"p2": [1, 2]}, "p2": [1, 2]}
+    assert list(new_cfg["x"].keys()) == ["p1", "sub", "p2"]
+
+    new_cfg["x"]["p2"].append(3)
+    new_cfg["x"]["sub"]["p2"].append(3)
+    assert new_cfg["y"]["p2"] == [1, 2]
+    assert new_cfg["y"]["sub"]["p2"] == [1, 2]
+    assert base_cfgs["bases"]["b"]["p2"] == [1, 2]
+    assert cfg == {"x": {"base": "bases.a"}, "y": {"base": "bases.a", "p1": 3}}
+
+
+def test_load_cfg_lazy_subtrees(base_cfg_dir: Path, complex_run_file: Path) -> None:
+    stats = RunStats()
+    with collecting(stats):
+        cfg, lazy = ConfigHandler.load_cfg_lazy(complex_run_file, base_cfg_dir)
+        assert set(lazy.keys()) == {"dataset", "net", "params"}
+        assert stats.counters["files_parsed"] == 2
+
+        store = ConfigStore(cfg, lazy=lazy)
+        assert store.get("net.name") == "efficientnet"
+        assert stats.counters["files_parsed"] == 3
+
+    assert store.cfg == ConfigHandler.load_cfg(complex_run_file, base_cfg_dir)
+
+    overrides = [{"net": {"name": "resnet"}}, {"params": 1}]
+    cfg, lazy = ConfigHandler.load_cfg_lazy(complex_run_file, base_cfg_dir, overrides)
+    assert set(lazy.keys()) == {"dataset"}
+    assert cfg["net"]["num_layers"] == 20
+
+
+def test_load_cfg_lazy_nested_base(tmp_path: Path) -> None:
+    base_dir = tmp_path / "bases"
+    base_dir.mkdir()
+    ConfigHandler.save_cfg({"x": {"net": {"n": 1}}}, base_dir / "m.yaml")
+    ConfigHandler.save_cfg({"k": 2}, base_dir / "o.yaml")
+    run_file = tmp_path / "run.yaml"
+    ConfigHandler.save_cfg({"g": {"base": "m.x", "net": {"base": "o"}}}, run_file)
+
+    cfg, lazy = ConfigHandler.load_cfg_lazy(run_file, base_dir, [{"g": {"z": 1}}])
+
+    assert lazy == {}
+    assert cfg == {"g": {"net": {"k": 2}}}
@@ -0,0 +1,132 @@
+from typing import Any, Dict, List
+
+import pytest
+from typeguard import check_type
+
+from hesiod.cfg import cfgstore
+from hesiod.cfg.cfgstore import ConfigStore
+
+
+def test_cfg_store() -> None:
+    store = ConfigStore({"a": {"b": {"c": 1, "d": [1, 2]}}, "e": 2, 3: "f", "g.h": 4})
+
+    assert store.get("a.b.c") == 1
+    assert store.get("a.b") == {"c": 1, "d": [1, 2]}
+    assert store.get("a") is store.cfg["a"]
+    assert store.get("e") == 2
+    assert "3" not in store
+    assert "g.h" not in store
+
+    with pytest.raises(KeyError):
+        store.get("a.x")
+
+
+def test_cfg_store_set() -> None:
+    store = ConfigStore({"a": {"b": {"c": 1, "d": [1, 2]}}, "e": 2})
+    old_b = store.get("a.b")
+
+    store.set("a.b.c", 5)
+    assert store.get("a.b.c") == 5
+    assert store.get("a.b") == {"c": 5, "d": [1, 2]}
+    assert store.get("a") is store.cfg["a"]
+    assert old_b["c"] == 1
+
+    store.set("a.b", {"x": {"y": 1}})
+    assert store.get("a.b.x.y") == 1
+    assert "a.b.c" not in store
+    assert "a.b.d" not in store
+
+    store.set("e.f.g", 3)
+    assert store.get("e") == {"f": {"g": 3}}
+    assert store.get("e.f.g") == 3
+
+    expected_index = ConfigStore(store.cfg).index
+    assert store.index == expected_index
+
+
+def test_cfg_store_type_check(monkeypatch: pytest.MonkeyPatch) -> None:
+    store = ConfigStore({"a": {"b": [{"c": 1.0}], "d": "e"}})
+    checks: List[str] = []
+
+    def check_and_track(name: str, value: Any, t: Any) -> None:
+        checks.append(name)
+        check_type(name, value, t)
+
+    monkeypatch.setattr(cfgstore, "check_type", check_and_track)
+
+    for _ in range(3):
+        assert store.get("a.b", List[Dict[str, float]]) == [{"c": 1.0}]
+    assert checks == ["a.b"]
+
+    with pytest.raises(TypeError):
+        store.get("a.b", List[Dict[str, int]])
+    with pytest.raises(TypeError):
+        store.get("a.b", List[Dict[str, int]])
+    assert checks == ["a.b", "a.b", "a.b"]
+
+    store.get("a", Dict[str, Any])
+    store.get("a.d", str)
+    checks.clear()
+
+    store.set("a.d", "f")
+    store.get("a.b", List[Dict[str, float]])
+    store.get("a", Dict[str, Any])
+    store.get("a.d", str)
+    assert checks == ["a", "a.d"]
+
+    checks.clear()
+    store.set("a", {"b": [{"c": "x"}]})
+    with pytest.raises(TypeError):
+        store.get("a.b", List[Dict[str, float]])
+    assert checks == ["a.b"]
+
+
+def test_cfg_store_lazy() -> None:
+    loaded: List[str] = []
+
+    def loader(key: str, cfg: Dict[str, Any]) -> Any:
+        def load() -> Dict[str, Any]:
+            loaded.append(key)
+            return cfg
+
+        return load
+
+    lazy = {
+        "a.b": loader("a.b", {"c": 1, "d": {"e": 2}}),
+        "f": loader("f", {"g": 3}),
+        "h": loader("h", {"i": 4}),
+        "j": loader("j", {"k": 5}),
+        "l.m": loader("l.m", {"n": "${a.b.c}"}),
+    }
+    store = ConfigStore({"a": {"x": 0}, "y": 1, "l": {}}, lazy=lazy)
+
+    assert store.get("y") == 1
+    assert store.get("a.b.d.e") == 2
+    assert loaded == ["a.b"]
+    assert store.get("a") == {"x": 0, "b": {"c": 1, "d": {"e": 2}}}
+    assert "f.g" in store and loaded == ["a.b", "f"]
+
+    store.set("h.z", 6)
+    assert store.get("h") == {"i": 4, "z": 6}
+    store.set("j", 7)
+    assert store.get("j") == 7
+    assert loaded == ["a.b", "f", "h"]
+    assert not store.is_loaded
+
+    copy = store.copy()
+    assert copy.get("l.m.n") == 1
+    assert loaded == ["a.b", "f", "h", "l.m"]
+    assert not store.is_loaded and copy.is_loaded
+
+    assert store.cfg == {
+        "a": {"x": 0, "b": {"c": 1, "d": {"e": 2}}},
+        "y": 1,
+        "l": {"m": {"n": "${a.b.c}"}},
+        "f": {"g": 3},
+        "h": {"i": 4, "z": 6},
+        "j": 7,
+    }
+    assert store.is_loaded
+    assert store.index == ConfigStore(store.cfg).index
+    with pytest.raises(KeyError):
+        store.get("missing")
@@ -0,0 +1,221 @@
+import errno
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+import pytest
+
+from hesiod.cfg.cfghandler import ConfigHandler
+from hesiod.cfg.cfgstore import ConfigStore
+from hesiod.cfg.cfgwatcher import (
+    MISSING,
+    ConfigWatcher,
+    _InotifyMonitor,
+    _PollingMonitor,
+    diff_cfgs,
+)
+
+
+def _write(path: Path, cfg: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ConfigHandler.save_cfg(cfg, path)
+
+
+def _make_watcher(tmp_path: Path, use_inotify: bool = True) -> ConfigWatcher:
+    base_dir = tmp_path / "bases"
+    _write(base_dir / "dataset.yaml", {"cifar": {"name": "cifar", "size": 32}})
+    _write(base_dir / "net" / "resnet.yaml", {"name": "resnet", "layers": 18})
+    _write(base_dir / "net" / "deep.yaml", {"base": "net.resnet", "layers": 50})
+    _write(base_dir / "unused.yaml", {"a": 1})
+    run_file = tmp_path / "run.yaml"
+    _write(
+        run_file,
+        {"dataset": {"base": "dataset.cifar"}, "net": {"base": "net.deep"}, "lr": 0.1},
+    )
+
+    stores: List[ConfigStore] = []
+    watcher = ConfigWatcher(
+        run_file,
+        base_dir,
+        lambda: stores[-1],
+        stores.append,
+        interval=0.05,
+        use_inotify=use_inotify,
+    )
+    stores.append(ConfigStore(watcher.load()))
+    return watcher
+
+
+def test_diff_cfgs() -> None:
+    old = {"a": {"b": 1, "c": 2}, "d": 3, "e": {"f": 1}}
+    new = {"a": {"b": 1, "c": 5}, "d": {"x": 1}, "g": 4}
+
+    assert diff_cfgs(old, new) == {
+        "a.c": (2, 5),
+        "d": (3, {"x": 1}),
+        "e.f": (1, MISSING),
+        "g": (MISSING, 4),
+    }
+    assert diff_cfgs(old, old) == {}
+    assert diff_cfgs({"a": 1}, {"a": True}) == {"a": (1, True)}
+
+
+def test_tracked_files(tmp_path: Path) -> None:
+    watcher = _make_watcher(tmp_path)
+
+    tracked = {f.relative_to(tmp_path).as_posix() for f in watcher.get_tracked_files()}
+    assert tracked == {
+        "run.yaml",
+        "bases/dataset.yaml",
+        "bases/net/deep.yaml",
+        "bases/net/resnet.yaml",
+    }
+    assert watcher.resolver.dependencies["net.deep"] == {"net.resnet"}
+
+
+def test_reload_base(tmp_path: Path) -> None:
+    watcher = _make_watcher(tmp_path)
+    old_store = watcher.get_store()
+    diffs: List[Dict[str, Any]] = []
+    watcher.on_change = diffs.append
+    old_store.set("net.layers", 34)
+    watcher.overrides = {"net.layers": 34}
+
+    resnet_file = tmp_path / "bases" / "net" / "resnet.yaml"
+    _write(resnet_file, {"name": "resnet", "layers": 18, "act": "relu"})
+    diff = watcher.reload([resnet_file])
+
+    assert diff == {"net.act": (MISSING, "relu")}
+    assert diffs == [diff]
+
+    new_store = watcher.get_store()
+    assert new_store is not old_store
+    assert new_store.get("net") == {"name": "resnet", "layers": 34, "act": "relu"}
+    assert new_store.get("net.act") == "relu"
+    assert new_store.get("dataset") is old_store.get("dataset")
+    assert "net.act" not in old_store
+
+
+def test_reload_run_file(tmp_path: Path) -> None:
+    watcher = _make_watcher(tmp_path)
+    watcher.set_value("lr", 0.5)
+    watcher.set_value("extra", {"a": 1})
+    assert watcher.get_store().get("lr") == 0.5
+
+    run_file = tmp_path / "run.yaml"
+    _write(run_file, {"dataset": {"base": "dataset.cifar", "size": 64}, "lr": 0.2})
+    diff = watcher.reload([run_file])
+
+    assert diff == {
+        "dataset.size": (32, 64),
+        "net.name": ("resnet", MISSING),
+        "net.layers": (50, MISSING),
+    }
+    assert watcher.get_store().cfg == {
+        "dataset": {"name": "cifar", "size": 64},
+        "lr": 0.5,
+        "extra": {"a": 1},
+    }
+
+
+def test_reload_nested_base(tmp_path: Path) -> None:
+    base_dir = tmp_path / "bases"
+    _write(base_dir / "root.yaml", {"x": {"net": {"lr": 1, "extra": 5}, "a": {"b": {"c": 1}}}})
+    _write(base_dir / "net" / "y.yaml", {"layers": 2, "lr": 0.1})
+    _write(base_dir / "net" / "z.yaml", {"c": 2, "d": 3})
+    run_file = tmp_path / "run.yaml"
+    _write(
+        run_file,
+        {"base": "root.x", "net": {"base": "net.y"}, "a": {"b": {"base": "net.z"}}},
+    )
+
+    stores: List[ConfigStore] = []
+    watcher = ConfigWatcher(run_file, base_dir, lambda: stores[-1], stores.append)
+    stores.append(ConfigStore(watcher.load()))
+    assert stores[-1].get("net") == {"layers": 2, "lr": 0.1}
+
+    _write(base_dir / "net" / "y.yaml", {"layers": 4})
+    _write(base_dir / "net" / "z.yaml", {"c": 2, "d": 4})
+    diff = watcher.reload([base_dir / "net" / "y.yaml", base_dir / "net" / "z.yaml"])
+
+    assert diff == {"net.layers": (2, 4), "net.lr": (0.1, MISSING), "a.b.d": (3, 4)}
+    assert watcher.get_store().cfg == ConfigHandler.load_cfg(run_file, base_dir)
+
+
+def test_reload_untracked(tmp_path: Path) -> None:
+    watcher = _make_watcher(tmp_path)
+    old_store = watcher.get_store()
+
+    unused_file = tmp_path / "bases" / "unused.yaml"
+    _write(unused_file, {"a": 2})
+    assert watcher.reload([unused_file]) == {}
+
+    dataset_file = tmp_path / "bases" / "dataset.yaml"
+    assert watcher.reload([dataset_file]) == {}
+    assert watcher.get_store() is old_store
+
+
+def test_find_subtrees() -> None:
+    cfg = {
+        "a": {"base": "x", "b": {"base": "y"}},
+        "c": {"d": {"base": "y"}, "e": {"base": "z"}},
+        "f": {1: {"base": "z"}},
+    }
+
+    assert ConfigWatcher.find_subtrees(cfg, {"x", "y"}) == [("a", cfg["a"]), ("c.d", cfg["c"]["d"])]
+    assert ConfigWatcher.find_subtrees(cfg, {"z"}) == [("c.e", cfg["c"]["e"]), ("f", cfg["f"])]
+    assert ConfigWatcher.find_subtrees(cfg, {"w"}) == []
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_watcher_thread(tmp_path: Path, use_inotify: bool) -> None:
+    watcher = _make_watcher(tmp_path, use_inotify)
+    diffs: List[Dict[str, Any]] = []
+    watcher.on_change = diffs.append
+
+    watcher.start()
+    try:
+        time.sleep(0.1)
+        _write(tmp_path / "bases" / "dataset.yaml", {"cifar": {"name": "cifar", "size": 64}})
+        deadline = time.monotonic() + 5
+        while len(diffs) == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        watcher.stop()
+
+    assert diffs == [{"dataset.size": (32, 64)}]
+    assert watcher.get_store().get("dataset.size") == 64
+
+
+@pytest.mark.filterwarnings("ignore:Cannot watch config files with inotify")
+@pytest.mark.parametrize("failing_call", [1, 2])
+def test_watcher_inotify_fallback(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, failing_call: int
+) -> None:
+    watch = _InotifyMonitor.watch
+    calls: List[int] = []
+
+    def failing_watch(self: _InotifyMonitor, files: Iterable[Path]) -> None:
+        calls.append(1)
+        if len(calls) == failing_call:
+            raise OSError(errno.ENOSPC, "No space left on device")
+        watch(self, files)
+
+    monkeypatch.setattr(_InotifyMonitor, "watch", failing_watch)
+    watcher = _make_watcher(tmp_path)
+    diffs: List[Dict[str, Any]] = []
+    watcher.on_change = diffs.append
+
+    watcher.start()
+    try:
+        for size in (64, 128):
+            time.sleep(0.1)
+            _write(tmp_path / "bases" / "dataset.yaml", {"cifar": {"name": "cifar", "size": size}})
+            deadline = time.monotonic() + 5
+            while len(diffs) < size // 64 and time.monotonic() < deadline:
+                time.sleep(0.02)
+    finally:
+        watcher.stop()
+
+    assert diffs == [{"dataset.size": (32, 64)}, {"dataset.size": (64, 128)}]
+    assert isinstance(watcher._monitor, _PollingMonitor)
@@ -0,0 +1,60 @@
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from hesiod.cfg.cfghandler import ConfigHandler
+from hesiod.cfg.cfgwriter import save_cfg_in_background, wait_for_writes
+from hesiod.cfg.readonly import freeze
+from hesiod.cfg.yamlparser import YAMLConfigParser
+
+
+def test_save_cfg_atomic(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cfg_file = tmp_path / "run.yaml"
+    ConfigHandler.save_cfg({"a": 1}, cfg_file, atomic=True, fsync=True)
+    assert ConfigHandler.load_cfg_file(cfg_file) == {"a": 1}
+    assert [p.name for p in tmp_path.iterdir()] == ["run.yaml"]
+
+    def torn_write(cfg: Any, path: Path) -> None:
+        path.write_text("a: ")
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(YAMLConfigParser, "write_cfg", staticmethod(torn_write))
+    with pytest.raises(KeyboardInterrupt):
+        ConfigHandler.save_cfg({"a": 2}, cfg_file, atomic=True)
+
+    assert ConfigHandler.load_cfg_file(cfg_file) == {"a": 1}
+    assert [p.name for p in tmp_path.iterdir()] == ["run.yaml"]
+
+
+def test_save_cfg_in_background(tmp_path: Path) -> None:
+    cfg = freeze({"a": {"b": [1, 2]}, "c": "d"})
+    files = [tmp_path / f"run{i}.yaml" for i in range(5)]
+    threads = [save_cfg_in_background(cfg, f, fsync=(i == 0)) for i, f in enumerate(files)]
+
+    assert wait_for_writes()
+    assert not any(t.is_alive() for t in threads)
+    for f in files:
+        assert ConfigHandler.load_cfg_file(f) == {"a": {"b": [1, 2]}, "c": "d"}
+
+    with pytest.warns(UserWarning):
+        save_cfg_in_background(cfg, tmp_path / "missing" / "run.yaml").join()
+
+
+def test_save_cfg_in_background_at_exit(tmp_path: Path) -> None:
+    cfg_file = tmp_path / "run.yaml"
+    script = (
+        "import sys\n"
+        "from pathlib import Path\n"
+        "from hesiod.cfg.cfgwriter import save_cfg_in_background\n"
+        "cfg = {f'key{i}': list(range(100)) for i in range(200)}\n"
+        "save_cfg_in_background(cfg, Path(sys.argv[1]))\n"
+        "sys.exit(0)\n"
+    )
+    subprocess.run([sys.executable, "-c", script, str(cfg_file)], check=True)
+
+    cfg = ConfigHandler.load_cfg_file(cfg_file)
+    assert len(cfg) == 200
+    assert cfg["key199"] == list(range(100))
@@ -0,0 +1,106 @@
+from typing import List
+
+import pytest
+
+from hesiod.cfg.cfgstore import ConfigStore
+from hesiod.cfg.interpolation import (
+    Reference,
+    ResolverCall,
+    get_references,
+    parse_template,
+    register_resolver,
+)
+
+
+def test_parse_template() -> None:
+    assert parse_template("${a.b}/train") == (Reference("a.b"), "/train")
+    assert parse_template("x\\${a}") == ("x${a}",)
+    template = parse_template("${mul: ${a}, 2}}")
+    assert template == (ResolverCall("mul", ((" ", Reference("a")), (" 2",))), "}")
+    assert set(get_references(parse_template("${a}${f:${b},${g:${c}}}"))) == {"a", "b", "c"}
+
+    for text in ["${a", "${}", "${a${b}}", "${env:X", "${env:${a}"]:
+        with pytest.raises(ValueError):
+            parse_template(text)
+
+
+def test_interpolation(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("HTEST_NUM", "8")
+    register_resolver("htest_mul", lambda a, b: a * b)
+    store = ConfigStore(
+        {
+            "data": {"root": "/data", "train": "${data.root}/train", "num": "${env:HTEST_NUM}"},
+            "size": "${htest_mul:${data.num},4}",
+            "copy": "${data}",
+            "home": "${env:HTEST_MISSING,/home}",
+            "escaped": "\\${data.root}",
+        }
+    )
+
+    assert store.get("data.train") == "/data/train"
+    assert store.get("size") == 32
+    assert store.get("copy") == {"root": "/data", "train": "/data/train", "num": 8}
+    assert store.get("home") == "/home"
+    assert store.get("escaped") == "${data.root}"
+    assert store.get("data") == store.get("copy")
+    assert store.cfg["data"]["train"] == "${data.root}/train"
+    assert store.get_resolved_cfg()["size"] == 32
+
+    with pytest.raises(ValueError):
+        register_resolver("a:b", lambda: None)
+
+
+def test_interpolation_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: List[int] = []
+
+    def count(x: int) -> int:
+        calls.append(x)
+        return x
+
+    register_resolver("htest_count", count)
+    store = ConfigStore({"a": 1, "b": "${htest_count:${a}}", "c": {"d": "${b}"}, "e": 2})
+
+    assert store.get("c.d") == 1
+    assert store.get("b") == 1
+    assert store.get("c") == {"d": 1}
+    assert calls == [1]
+
+    store.set("e", 3)
+    assert store.get("c.d") == 1
+    assert calls == [1]
+
+    store.set("a", 5)
+    assert store.get("c.d") == 5
+    assert store.get("c") == {"d": 5}
+    assert calls == [1, 5]
+
+    store.set("c.d", "${a}-${e}")
+    assert store.get("c.d") == "5-3"
+    store.set("c", {"d": "${e}"})
+    assert store.get("c.d") == 3
+    assert store.get("b", int) == 5
+    store.set("a", "x")
+    with pytest.raises(TypeError):
+        store.get("b", int)
+
+
+def test_interpolation_errors() -> None:
+    with pytest.raises(ValueError, match="a -> b -> c.d -> a"):
+        ConfigStore({"a": "${b}", "b": "${c.d}", "c": {"d": "${a}"}})
+    with pytest.raises(ValueError, match="cycle"):
+        ConfigStore({"a": {"b": "${a}"}})
+    with pytest.raises(ValueError, match="Invalid interpolation"):
+        ConfigStore({"a": "${b"})
+
+    store = ConfigStore({"a": "${b}", "c": "${unknown:1}", "d": "echo ${HOME} ${b}"})
+    assert store.get("a") == "${b}"
+    assert store.get("d") == "echo ${HOME} ${b}"
+    with pytest.raises(ValueError, match="Unknown resolver"):
+        store.get("c")
+
+    store.set("b", 1)
+    assert store.get("a") == 1
+    assert store.get("d") == "echo ${HOME} 1"
+    store.set("b", "${a}")
+    with pytest.raises(ValueError, match="cycle"):
+        store.get("a")
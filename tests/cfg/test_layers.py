@@ -0,0 +1,66 @@
+import pytest
+
+from hesiod.cfg.layers import flatten, merge_layers, parse_args, parse_env, unflatten
+from hesiod.cfg.readonly import ReadOnlyDict, freeze, thaw
+
+
+def test_merge_layers() -> None:
+    base = {"a": {"b": 1, "c": {"d": 2, "e": [1, 2]}}, "f": "f", "g": {"h": 1}}
+    run = {"a": {"c": {"d": 3}}, "g": 4}
+    env = {"a": {"b": 5}, "g": {"i": 6}}
+    args = {"a": {"c": {"e": [3]}}, "j": {"k": None}}
+
+    merged = merge_layers([base, run, env, args])
+
+    assert isinstance(merged, ReadOnlyDict)
+    assert thaw(merged) == {
+        "a": {"b": 5, "c": {"d": 3, "e": [3]}},
+        "f": "f",
+        "g": {"i": 6},
+        "j": {"k": None},
+    }
+    assert base == {"a": {"b": 1, "c": {"d": 2, "e": [1, 2]}}, "f": "f", "g": {"h": 1}}
+
+    assert merge_layers([]) == {}
+    assert merge_layers([{}, {"a": 1}, {}]) == {"a": 1}
+
+
+def test_merge_layers_shares_read_only_values() -> None:
+    frozen = freeze({"a": {"b": 1}, "c": {"d": 2}})
+    merged = merge_layers([frozen, {"c": {"e": 3}}])
+
+    assert merged["a"] is frozen["a"]
+    assert thaw(merged["c"]) == {"d": 2, "e": 3}
+    assert merge_layers([frozen]) is frozen
+
+
+def test_unflatten_flatten() -> None:
+    values = {"a.b": 1, "a.c.d": [1, 2], "e": "e", "f.g": {}, "h": 1, "h.i": 2}
+    cfg = unflatten(values)
+
+    assert cfg == {"a": {"b": 1, "c": {"d": [1, 2]}}, "e": "e", "f": {"g": {}}, "h": {"i": 2}}
+    assert flatten(cfg) == {"a.b": 1, "a.c.d": [1, 2], "e": "e", "f.g": {}, "h.i": 2}
+
+
+def test_parse_env() -> None:
+    environ = {
+        "HESIOD_lr": "1e-3",
+        "HESIOD_net__name": "resnet",
+        "HESIOD_net__layers": "[1, 2]",
+        "HESIOD_": "ignored",
+        "hesiod_lr": "ignored",
+        "PATH": "/usr/bin",
+    }
+
+    assert parse_env("HESIOD_", environ) == {
+        "lr": 1e-3,
+        "net.name": "resnet",
+        "net.layers": [1, 2],
+    }
+
+
+def test_parse_args() -> None:
+    assert parse_args(["--a.b=1", "c:test", "-d=[1, 2]"]) == {"a.b": 1, "c": "test", "d": [1, 2]}
+
+    with pytest.raises(ValueError):
+        parse_args(["a b"])
@@ -0,0 +1,50 @@
+import pickle
+from copy import deepcopy
+
+import pytest
+
+from hesiod.cfg.readonly import ReadOnlyDict, ReadOnlyList, ReadOnlySet, freeze, replace_in, thaw
+
+
+def test_freeze_thaw() -> None:
+    cfg = {"a": 1, "b": [1, {"c": 2}], "d": {3, 4}, "e": (5, [6]), "f": {"g": "h"}}
+    frozen_cfg = freeze(cfg)
+
+    assert frozen_cfg == cfg
+    assert isinstance(frozen_cfg, ReadOnlyDict)
+    assert isinstance(frozen_cfg["b"], ReadOnlyList)
+    assert isinstance(frozen_cfg["b"][1], ReadOnlyDict)
+    assert isinstance(frozen_cfg["d"], ReadOnlySet)
+    assert isinstance(frozen_cfg["e"][1], ReadOnlyList)
+    assert freeze(frozen_cfg) is frozen_cfg
+    assert deepcopy(frozen_cfg) is frozen_cfg
+    assert pickle.loads(pickle.dumps(frozen_cfg)) == cfg
+
+    with pytest.raises(TypeError):
+        frozen_cfg["a"] = 2
+    with pytest.raises(TypeError):
+        frozen_cfg["f"].update({"i": 1})
+    with pytest.raises(TypeError):
+        frozen_cfg["b"].append(2)
+    with pytest.raises(TypeError):
+        frozen_cfg["d"].add(5)
+
+    thawed_cfg = thaw(frozen_cfg)
+    assert thawed_cfg == cfg
+    assert type(thawed_cfg) is dict
+    assert type(thawed_cfg["b"]) is list
+    assert type(thawed_cfg["d"]) is set
+    thawed_cfg["b"].append(2)
+    assert frozen_cfg["b"] == [1, {"c": 2}]
+
+
+def test_replace_in() -> None:
+    cfg = freeze({"a": {"b": {"c": 1}, "d": [1, 2]}, "e": 2})
+
+    new_cfg = replace_in(cfg, ["a", "b", "c"], 3)
+    assert new_cfg == {"a": {"b": {"c": 3}, "d": [1, 2]}, "e": 2}
+    assert cfg["a"]["b"]["c"] == 1
+    assert new_cfg["a"]["d"] is cfg["a"]["d"]
+
+    new_cfg = replace_in(cfg, ["e", "f"], 4)
+    assert new_cfg["e"] == {"f": 4}
@@ -0,0 +1,126 @@
+from dataclasses import dataclass, field
+from typing import List, Optional, TypedDict
+
+import pytest
+
+from hesiod.cfg.cfgstore import ConfigStore
+from hesiod.cfg.schema import SchemaObject, compile_schema
+
+
+@dataclass
+class Net:
+    name: str
+    num_layers: int
+    freeze: bool = False
+
+
+class Dataset(TypedDict, total=False):
+    name: str
+    classes: List[int]
+
+
+@dataclass
+class Train:
+    lr: float
+    net: Net
+    dataset: Dataset
+    ckpt: Optional[Net] = None
+    tags: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Node:
+    value: int
+    child: Optional["Node"] = None
+
+
+def test_schema_load() -> None:
+    store = ConfigStore(
+        {
+            "lr": 0.1,
+            "net": {"name": "resnet", "num_layers": 18, "extra": 1},
+            "dataset": {"name": "mnist"},
+            "unused": {"a": 1},
+        }
+    )
+    cfg = compile_schema(Train).load(store)
+
+    assert isinstance(cfg, SchemaObject)
+    assert type(cfg).__name__ == "Train"
+    assert cfg.lr == 0.1
+    assert cfg.net.name == "resnet"
+    assert cfg.net.num_layers == 18
+    assert cfg.net.freeze is False
+    assert not hasattr(cfg.net, "extra")
+    assert cfg.dataset.name == "mnist"
+    assert cfg.dataset.classes is None
+    assert cfg.ckpt is None
+    assert cfg.tags == []
+    assert cfg == compile_schema(Train).load(store)
+
+    with pytest.raises(AttributeError):
+        cfg.__dict__
+    with pytest.raises(TypeError):
+        cfg.lr = 1.0
+    with pytest.raises(TypeError):
+        del cfg.net.name
+
+
+def test_schema_errors() -> None:
+    store = ConfigStore(
+        {
+            "lr": "high",
+            "net": {"num_layers": "18"},
+            "dataset": 3,
+            "ckpt": {"name": "resnet", "num_layers": 18.5},
+        }
+    )
+
+    with pytest.raises(ValueError) as e:
+        compile_schema(Train).load(store)
+
+    assert str(e.value).splitlines() == [
+        "The config does not match Train:",
+        "  - type of lr must be either float or int; got str instead",
+        "  - net.name: missing value",
+        "  - type of net.num_layers must be int; got str instead",
+        "  - dataset: expected a config for Dataset, got int",
+        "  - type of ckpt.num_layers must be int; got float instead",
+    ]
+
+
+def test_schema_interpolation_and_lazy() -> None:
+    loaded: List[str] = []
+
+    def load(key: str, cfg: dict) -> dict:
+        loaded.append(key)
+        return cfg
+
+    store = ConfigStore(
+        {"layers": 18},
+        lazy={
+            "net": lambda: load("net", {"name": "resnet", "num_layers": "${layers}"}),
+            "dataset": lambda: load("dataset", {"name": "mnist"}),
+        },
+    )
+    cfg = compile_schema(Node).load(ConfigStore({"value": "${x}", "x": 1, "child": {"value": 2}}))
+    assert cfg.value == 1
+    assert cfg.child.value == 2
+    assert cfg.child.child is None
+
+    @dataclass
+    class Model:
+        net: Net
+
+    model = compile_schema(Model).load(store)
+    assert model.net.num_layers == 18
+    assert loaded == ["net"]
+
+
+def test_compile_schema() -> None:
+    assert compile_schema(Train) is compile_schema(Train)
+    assert compile_schema(Train).field_names == {"lr", "net", "dataset", "ckpt", "tags"}
+    assert compile_schema(Node).fields[1].schema is compile_schema(Node)
+
+    with pytest.raises(TypeError):
+        compile_schema(dict)
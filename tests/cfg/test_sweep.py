@@ -0,0 +1,91 @@
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+from hesiod import load_sweep
+from hesiod.cfg.cfghandler import ConfigHandler
+from hesiod.cfg.sweep import Sweep, parse_sweep
+
+
+def test_parse_sweep() -> None:
+    assert parse_sweep("@GRID(1;a; 2.5)") == ("grid", [1, "a", 2.5])
+    assert parse_sweep("@CHOICE(True;None)") == ("choice", [True, None])
+    assert parse_sweep("@RANGE(3)") == ("grid", [0, 1, 2])
+    assert parse_sweep("@RANGE(2;8;3)") == ("grid", [2, 5])
+    assert parse_sweep("@RANGE(0;1;0.25)") == ("grid", [0, 0.25, 0.5, 0.75])
+    assert parse_sweep("@OPTIONS(1;2)") is None
+    assert parse_sweep(3) is None
+
+    for marker in ["@RANGE(1;2;0)", "@RANGE(a;2)", "@RANGE(1;2;3;4)"]:
+        with pytest.raises(ValueError):
+            parse_sweep(marker)
+
+
+def test_sweep_grid() -> None:
+    base_cfgs: Dict[str, Any] = {"opt": {"adam": {"name": "adam", "lr": "@GRID(0.1;0.01)"}}}
+    cfg = {"opt": {"base": "opt.adam"}, "bs": "@RANGE(16;64;16)", "x": {"y": 1}}
+    sweep = Sweep(cfg, base_cfgs)
+
+    variants = list(sweep.variants())
+    assert [params for params, _ in variants] == [
+        {"opt.lr": lr, "bs": bs} for lr in [0.1, 0.01] for bs in [16, 32, 48]
+    ]
+    assert variants[0][1] == {"opt": {"name": "adam", "lr": 0.1}, "bs": 16, "x": {"y": 1}}
+    assert all(cfg["x"] is variants[0][1]["x"] for _, cfg in variants)
+    assert cfg["bs"] == "@RANGE(16;64;16)"
+
+
+def test_sweep_choice() -> None:
+    cfg = {"a": "@CHOICE(1;2;3)", "b": "@GRID(x;y)"}
+
+    cfgs = list(Sweep(cfg, {}, num_samples=10, seed=0))
+    assert len(cfgs) == 20
+    assert [c["b"] for c in cfgs[:4]] == ["x", "y", "x", "y"]
+    assert {c["a"] for c in cfgs} == {1, 2, 3}
+    assert cfgs == list(Sweep(cfg, {}, num_samples=10, seed=0))
+
+
+def test_sweep_bases() -> None:
+    base_cfgs: Dict[str, Any] = {
+        "net": {
+            "resnet": {"name": "resnet", "depth": "@GRID(18;50)"},
+            "vgg": {"name": "vgg"},
+        }
+    }
+    cfg = {"net": {"base": "@GRID(net.resnet;net.vgg)", "width": 2}}
+    sweep = Sweep(cfg, base_cfgs)
+
+    assert list(sweep.variants()) == [
+        (
+            {"net.base": "net.resnet", "net.depth": 18},
+            {"net": {"name": "resnet", "depth": 18, "width": 2}},
+        ),
+        (
+            {"net.base": "net.resnet", "net.depth": 50},
+            {"net": {"name": "resnet", "depth": 50, "width": 2}},
+        ),
+        ({"net.base": "net.vgg"}, {"net": {"name": "vgg", "width": 2}}),
+    ]
+
+    resolved_bases = dict(sweep.resolver._resolved)
+    assert set(resolved_bases) == {"net.resnet", "net.vgg"}
+    list(sweep)
+    assert all(sweep.resolver._resolved[k] is v for k, v in resolved_bases.items())
+
+
+def test_load_sweep(tmp_path: Path, base_cfg_dir: Path, complex_run_file: Path) -> None:
+    cfg = ConfigHandler.load_cfg_file(complex_run_file)
+    cfg["dataset"]["base"] = "@GRID(dataset.cifar.cifar10;dataset.cifar.cifar100)"
+    cfg["lr"] = "@GRID(0.1;0.01)"
+    sweep_file = tmp_path / "sweep.yaml"
+    ConfigHandler.save_cfg(cfg, sweep_file)
+
+    cfgs = list(load_sweep(sweep_file, base_cfg_dir))
+    assert [(c["dataset"]["name"], c["lr"]) for c in cfgs] == [
+        ("cifar10", 0.1),
+        ("cifar10", 0.01),
+        ("cifar100", 0.1),
+        ("cifar100", 0.01),
+    ]
+    assert cfgs[0]["net"] is cfgs[1]["net"]
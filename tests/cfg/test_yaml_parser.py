@@ -1,6 +1,8 @@
 from datetime import date, timedelta
 from pathlib import Path
 
+import pytest
+
 from hesiod.cfg.yamlparser import YAMLConfigParser
 
 
@@ -39,3 +41,34 @@ def test_yaml_parser() -> None:
     assert cfg == read_cfg
 
     test_file.unlink()
+
+
+@pytest.mark.parametrize("backend", ["ruamel", "pyyaml"])
+def test_yaml_backends(backend: str, tmp_path: Path) -> None:
+    if backend == "pyyaml":
+        pytest.importorskip("yaml")
+
+    cfg = {
+        "a": 1,
+        "b": 1.2,
+        "c": [True, "test", date(2021, 1, 1)],
+        "d": (1, 2.5, "x"),
+        "e": {"f": set((1, 2)), "g": {"h": None}},
+    }
+    test_file = tmp_path / "test.yaml"
+
+    YAMLConfigParser.set_backend(backend)
+    try:
+        assert backend.lower() in YAMLConfigParser.get_backend_name().lower().replace(".", "")
+        YAMLConfigParser.write_cfg(cfg, test_file)
+        assert YAMLConfigParser.read_cfg_file(test_file) == cfg
+
+        YAMLConfigParser.set_backend("ruamel")
+        assert YAMLConfigParser.read_cfg_file(test_file) == cfg
+    finally:
+        YAMLConfigParser.set_backend(YAMLConfigParser.DEFAULT_BACKEND)
+
+
+def test_yaml_backend_unknown() -> None:
+    with pytest.raises(ValueError):
+        YAMLConfigParser.set_backend("unknown")
@@ -1,14 +1,33 @@
+import asyncio
+import json
 import shutil
 import sys
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Tuple, TypedDict
 
 import pytest
 
 import hesiod.core as hcore
-from hesiod import get_cfg_copy, get_out_dir, get_run_name, hcfg, hmain, set_cfg
-from hesiod.core import _parse_args
+from hesiod import (
+    RunStats,
+    get_cfg_copy,
+    get_out_dir,
+    get_run_name,
+    get_typed_cfg,
+    hcfg,
+    hmain,
+    set_cfg,
+)
+from hesiod.cfg.bundle import ConfigBundle, compile_bundle
+from hesiod.cfg.cfgcache import CACHE_ENTRY_EXT
+from hesiod.cfg.cfghandler import ConfigHandler
+from hesiod.cfg.cfgwriter import wait_for_writes
+from hesiod.runname import RUN_NAME_DATE_FORMAT
+from hesiod.stats import get_stats
 
 
 def test_args_kwargs(base_cfg_dir: Path, simple_run_file: Path) -> None:
@@ -107,13 +126,40 @@ def test_hcfg(base_cfg_dir: Path, simple_run_file: Path) -> None:
 def test_cfg_copy(base_cfg_dir: Path, complex_run_file: Path) -> None:
     @hmain(base_cfg_dir, run_cfg_file=complex_run_file, create_out_dir=False, parse_cmd_line=False)
     def test() -> None:
-        cfg_copy = get_cfg_copy()
-        assert cfg_copy == hcore._CFG
-        assert id(cfg_copy) != id(hcore._CFG)
+        cfg_view = get_cfg_copy()
+        assert cfg_view is hcore._get_context().store.cfg
+        with pytest.raises(TypeError):
+            cfg_view["dataset"]["name"] = "new_dataset"
+
+        cfg_copy = get_cfg_copy(mutable=True)
+        assert cfg_copy == hcore._get_context().store.cfg
+        assert id(cfg_copy) != id(hcore._get_context().store.cfg)
 
         cfg_copy["dataset"]["name"] = "new_dataset"
-        assert hcore._CFG["dataset"]["name"] == "cifar10"
-        assert cfg_copy != hcore._CFG
+        assert hcore._get_context().store.cfg["dataset"]["name"] == "cifar10"
+        assert cfg_copy != hcore._get_context().store.cfg
+
+    test()
+
+
+def test_hcfg_read_only(base_cfg_dir: Path, complex_run_file: Path) -> None:
+    @hmain(base_cfg_dir, run_cfg_file=complex_run_file, create_out_dir=False, parse_cmd_line=False)
+    def test() -> None:
+        classes = hcfg("dataset.classes", List[int])
+        with pytest.raises(TypeError):
+            classes.append(7)
+
+        dataset = hcfg("dataset", Dict[str, Any])
+        with pytest.raises(TypeError):
+            dataset["name"] = "new_dataset"
+
+        mutable_classes = hcfg("dataset.classes", List[int], mutable=True)
+        mutable_classes.append(7)
+        assert hcfg("dataset.classes") == [1, 5, 6]
+
+        set_cfg("dataset.name", "new_dataset")
+        assert dataset["name"] == "cifar10"
+        assert hcfg("dataset.name") == "new_dataset"
 
     test()
 
@@ -159,7 +205,7 @@ def test_default_run_name(base_cfg_dir: Path, no_run_name_run_file: Path) -> Non
     def test() -> None:
         now = datetime.now()
         run_name = get_run_name()
-        assert run_name == now.strftime(hcore.RUN_NAME_DATE_FORMAT)
+        assert run_name == now.strftime(RUN_NAME_DATE_FORMAT)
 
     test()
 
@@ -173,34 +219,30 @@ def test_run_name(base_cfg_dir: Path, complex_run_file: Path) -> None:
     test()
 
 
-def test_parse_args(base_cfg_dir: Path, simple_run_file: Path) -> None:
-    @hmain(
-        base_cfg_dir=base_cfg_dir,
-        run_cfg_file=simple_run_file,
-        create_out_dir=False,
-        parse_cmd_line=False,
-    )
+def test_parse_args(
+    base_cfg_dir: Path, simple_run_file: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    args = [
+        "group_1.param_a=5",
+        "group_1.param_c=1.2345",
+        "group_1.param_d=1e-4",
+        "group_1.param_e=False",
+        "-group_3.param_e.param_i:this is a test",
+        "--group_5=[1, 2, 3]",
+        '---group_6.subgroup.subsubgroup.subsubsubgroup:(1.2, "test", True)',
+        '----param_7=\\|!"£$%&/()=?^€[]*@#°§<>,;.:-_+=abcABC123àèìòùç',
+        "param_8:{7, 8, 9}",
+        "param_9:=value",
+        "param_10=:value",
+        "param_11==value",
+        "param_12::value",
+        "#param_13:value",
+        "!param_14=value",
+    ]
+    monkeypatch.setattr(sys, "argv", ["test", *args])
+
+    @hmain(base_cfg_dir=base_cfg_dir, run_cfg_file=simple_run_file, create_out_dir=False)
     def test() -> None:
-        args = [
-            "group_1.param_a=5",
-            "group_1.param_c=1.2345",
-            "group_1.param_d=1e-4",
-            "group_1.param_e=False",
-            "-group_3.param_e.param_i:this is a test",
-            "--group_5=[1, 2, 3]",
-            '---group_6.subgroup.subsubgroup.subsubsubgroup:(1.2, "test", True)',
-            '----param_7=\\|!"£$%&/()=?^€[]*@#°§<>,;.:-_+=abcABC123àèìòùç',
-            "param_8:{7, 8, 9}",
-            "param_9:=value",
-            "param_10=:value",
-            "param_11==value",
-            "param_12::value",
-            "#param_13:value",
-            "!param_14=value",
-        ]
-
-        _parse_args(args)
-
         assert hcfg("group_1.param_a") == 5
         assert hcfg("group_1.param_b") == 1.2
         assert hcfg("group_1.param_c") == 1.2345
@@ -224,23 +266,24 @@ def test_parse_args(base_cfg_dir: Path, simple_run_file: Path) -> None:
         assert hcfg("#param_13") == "value"
         assert hcfg("!param_14") == "value"
 
-        wrong_args = [
-            "key value",
-            "keyvalue",
-            "key-value",
-            "key_value",
-            "=",
-            ":",
-            "-=",
-            "-:",
-        ]
-
-        for arg in wrong_args:
-            with pytest.raises(ValueError):
-                _parse_args([arg])
-
     test()
 
+    wrong_args = [
+        "key value",
+        "keyvalue",
+        "key-value",
+        "key_value",
+        "=",
+        ":",
+        "-=",
+        "-:",
+    ]
+
+    for arg in wrong_args:
+        monkeypatch.setattr(sys, "argv", ["test", arg])
+        with pytest.raises(ValueError):
+            test()
+
 
 def test_parse_cmd_line(base_cfg_dir: Path, complex_run_file: Path) -> None:
     sys.argv = ["test"]
@@ -274,6 +317,166 @@ def test_parse_cmd_line(base_cfg_dir: Path, complex_run_file: Path) -> None:
     shutil.rmtree("logs")
 
 
+def test_cfg_layers(
+    tmp_path: Path,
+    base_cfg_dir: Path,
+    complex_run_file: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    override_file1 = tmp_path / "override1.yaml"
+    override_file1.write_text("net:\n  num_layers: 50\n  freeze: true\nlr: 0.1\noptimizer: sgd\n")
+    override_file2 = tmp_path / "override2.yaml"
+    override_file2.write_text("net:\n  base: net.resnet.resnet18\nlr: 0.2\n")
+    monkeypatch.setenv("HTEST_lr", "0.3")
+    monkeypatch.setenv("HTEST_net__num_layers", "101")
+    monkeypatch.setattr(sys, "argv", ["test", "--lr=0.4"])
+
+    @hmain(
+        base_cfg_dir,
+        run_cfg_file=complex_run_file,
+        out_dir_root=str(tmp_path / "logs"),
+        override_cfg_files=[override_file1, str(override_file2)],
+        env_prefix="HTEST_",
+    )
+    def test() -> None:
+        assert hcfg("lr") == 0.4
+        assert hcfg("net.num_layers") == 101
+        assert hcfg("net.name") == "resnet18"
+        assert hcfg("net.freeze") is True
+        assert hcfg("net.use_skip") is True
+        assert hcfg("optimizer") == "sgd"
+        assert hcfg("dataset.name") == "cifar10"
+
+    test()
+
+    run_cfg = ConfigHandler.load_cfg_file(tmp_path / "logs" / "test" / "run.yaml")
+    assert run_cfg["lr"] == 0.4
+    assert run_cfg["net"]["num_layers"] == 101
+
+
+def test_hmain_interpolation(tmp_path: Path, base_cfg_dir: Path) -> None:
+    run_file = tmp_path / "run.yaml"
+    run_file.write_text(
+        "run_name: ${net.name}-${lr}\n"
+        "net:\n  base: net.efficientnet\n"
+        "lr: 0.1\n"
+        "root: /ckpts\n"
+        "ckpt: ${root}/${net.name}.pt\n"
+        "cmd: echo ${HOME}\n"
+    )
+
+    @hmain(base_cfg_dir, run_cfg_file=run_file, out_dir_root=str(tmp_path), parse_cmd_line=False)
+    def test() -> None:
+        assert get_run_name() == "efficientnet-0.1"
+        assert hcfg("ckpt") == "/ckpts/efficientnet.pt"
+        assert get_cfg_copy()["ckpt"] == hcfg("ckpt")
+        assert hcfg("cmd") == "echo ${HOME}"
+        set_cfg("net.name", "resnet")
+        assert hcfg("ckpt") == "/ckpts/resnet.pt"
+
+    test()
+
+    run_cfg = ConfigHandler.load_cfg_file(tmp_path / "efficientnet-0.1" / "run.yaml")
+    assert run_cfg["run_name"] == "efficientnet-0.1"
+    assert run_cfg["ckpt"] == "/ckpts/efficientnet.pt"
+    assert run_cfg["cmd"] == "echo ${HOME}"
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_hmain_lazy_cfg(
+    tmp_path: Path,
+    base_cfg_dir: Path,
+    complex_run_file: Path,
+    background: bool,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(sys, "argv", ["test", "--dataset.name=mnist"])
+
+    @hmain(
+        base_cfg_dir,
+        run_cfg_file=complex_run_file,
+        out_dir_root=str(tmp_path),
+        lazy_cfg=True,
+        background_run_file=background,
+    )
+    def test() -> None:
+        assert hcfg("dataset.name") == "mnist"
+        assert hcfg("net.num_layers") == 20
+        set_cfg("params.new", 1)
+        assert hcfg("params.new") == 1
+        assert get_cfg_copy()["dataset"]["path"] == "/path/to/cifar10"
+
+    test()
+    assert wait_for_writes()
+
+    run_cfg = ConfigHandler.load_cfg_file(tmp_path / "test" / "run.yaml")
+    expected_cfg = ConfigHandler.load_cfg(complex_run_file, base_cfg_dir)
+    expected_cfg["dataset"]["name"] = "mnist"
+    del run_cfg[hcore.OUT_DIR_KEY]
+    assert run_cfg == expected_cfg
+
+
+@dataclass
+class NetSchema:
+    name: str
+    num_layers: int
+    freeze: bool
+
+
+class ParamsSchema(TypedDict):
+    use_bn: bool
+    use_dropout: bool
+
+
+@dataclass
+class RunSchema:
+    lr: float
+    net: NetSchema
+    params: ParamsSchema
+    run_name: str = ""
+
+
+def test_hmain_schema(
+    tmp_path: Path,
+    base_cfg_dir: Path,
+    complex_run_file: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(sys, "argv", ["test", "--net.num_layers=50"])
+    stats: List[RunStats] = []
+
+    @hmain(
+        base_cfg_dir,
+        run_cfg_file=complex_run_file,
+        out_dir_root=str(tmp_path),
+        lazy_cfg=True,
+        schema=RunSchema,
+        on_stats=stats.append,
+    )
+    def test() -> None:
+        cfg = get_typed_cfg(RunSchema)
+        assert cfg is get_typed_cfg(RunSchema)
+        assert cfg.lr == 0.005
+        assert cfg.net.num_layers == 50
+        assert cfg.params.use_dropout is False
+        assert cfg.run_name == "test"
+
+        set_cfg("net.num_layers", 101)
+        assert get_typed_cfg(RunSchema).net.num_layers == 101
+
+    test()
+    assert "validate_schema" in stats[0].timings
+
+    monkeypatch.setattr(sys, "argv", ["test", "--lr=fast", "--net.freeze=None"])
+    with pytest.raises(ValueError) as e:
+        test()
+    assert len(str(e.value).splitlines()) == 3
+    assert not (tmp_path / "test_1").exists()
+
+    with pytest.raises(TypeError):
+        hmain(base_cfg_dir, schema=dict)
+
+
 def test_set_cfg(base_cfg_dir: Path, simple_run_file: Path) -> None:
     @hmain(
         base_cfg_dir=base_cfg_dir,
@@ -300,3 +503,392 @@ def test_set_cfg(base_cfg_dir: Path, simple_run_file: Path) -> None:
         assert hcfg("group_5") == [0.1, 0.5, 0.1]
 
     test()
+
+
+def test_hmain_bundle(tmp_path: Path, base_cfg_dir: Path, complex_run_file: Path) -> None:
+    bundle_file = tmp_path / "cfg.hbundle"
+    compile_bundle(base_cfg_dir, [complex_run_file], bundle_file)
+
+    @hmain(bundle_file, run_cfg_file=complex_run_file, create_out_dir=False, parse_cmd_line=False)
+    def test() -> None:
+        assert hcfg("dataset.name") == "cifar10"
+        assert hcfg("net.use_skip") is True
+        assert hcfg("run_name") == "test"
+
+    test()
+
+
+def test_hmain_bundle_overrides(
+    tmp_path: Path,
+    base_cfg_dir: Path,
+    complex_run_file: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    override_files = [tmp_path / "override1.yaml", tmp_path / "override2.yaml"]
+    override_files[0].write_text("lr: 0.1\noptimizer: sgd\n")
+    override_files[1].write_text("net:\n  base: net.resnet.resnet18\nlr: 0.2\n")
+    bundle_file = tmp_path / "cfg.hbundle"
+    compile_bundle(base_cfg_dir, [complex_run_file, *override_files], bundle_file)
+
+    loaded_bundles: List[Path] = []
+    load_bundle = ConfigBundle.load
+
+    def counting_load(bundle_file: Path) -> ConfigBundle:
+        loaded_bundles.append(bundle_file)
+        return load_bundle(bundle_file)
+
+    monkeypatch.setattr(ConfigBundle, "load", staticmethod(counting_load))
+
+    @hmain(
+        bundle_file,
+        run_cfg_file=complex_run_file,
+        create_out_dir=False,
+        parse_cmd_line=False,
+        override_cfg_files=override_files,
+    )
+    def test() -> None:
+        assert hcfg("lr") == 0.2
+        assert hcfg("optimizer") == "sgd"
+        assert hcfg("net.name") == "resnet18"
+
+    test()
+    assert loaded_bundles == [bundle_file]
+
+
+def test_hmain_cfg_cache(tmp_path: Path, base_cfg_dir: Path, complex_run_file: Path) -> None:
+    cache_dir = tmp_path / "cache"
+    caches = []
+
+    @hmain(
+        base_cfg_dir,
+        run_cfg_file=complex_run_file,
+        create_out_dir=False,
+        parse_cmd_line=False,
+        cfg_cache_dir=cache_dir,
+    )
+    def cached() -> None:
+        caches.append(ConfigHandler.get_cache())
+
+    @hmain(base_cfg_dir, run_cfg_file=complex_run_file, create_out_dir=False, parse_cmd_line=False)
+    def uncached() -> None:
+        caches.append(ConfigHandler.get_cache())
+
+    cached()
+    uncached()
+
+    assert caches[0] is not None and caches[0].cache_dir == cache_dir
+    assert caches[1] is None
+    assert ConfigHandler.get_cache() is None
+    assert len(list(cache_dir.glob(f"*{CACHE_ENTRY_EXT}"))) > 0
+
+
+def test_hmain_watch_cfg(tmp_path: Path, base_cfg_dir: Path, complex_run_file: Path) -> None:
+    bases_dir = tmp_path / "bases"
+    shutil.copytree(base_cfg_dir, bases_dir)
+    run_file = tmp_path / "run.yaml"
+    shutil.copy(complex_run_file, run_file)
+
+    with pytest.raises(ValueError):
+        hmain(base_cfg_dir, create_out_dir=False, parse_cmd_line=False, watch_cfg=True)(print)()
+
+    diffs: List[Dict[str, Any]] = []
+
+    @hmain(
+        bases_dir,
+        run_cfg_file=run_file,
+        create_out_dir=False,
+        parse_cmd_line=False,
+        watch_cfg=True,
+        on_cfg_change=diffs.append,
+        watch_interval=0.05,
+    )
+    def test() -> None:
+        assert hcfg("dataset.name") == "cifar10"
+
+        cifar_file = bases_dir / "dataset" / "cifar" / "cifar10.yaml"
+        cifar_cfg = ConfigHandler.load_cfg_file(cifar_file)
+        cifar_cfg["name"] = "watched"
+        ConfigHandler.save_cfg(cifar_cfg, cifar_file)
+
+        deadline = time.monotonic() + 5
+        while len(diffs) == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        assert diffs == [{"dataset.name": ("cifar10", "watched")}]
+        assert hcfg("dataset.name") == "watched"
+        assert hcfg("run_name") == "test"
+
+        set_cfg("lr", 0.5)
+        run_cfg = ConfigHandler.load_cfg_file(run_file)
+        run_cfg["optimizer"] = "sgd"
+        ConfigHandler.save_cfg(run_cfg, run_file)
+
+        deadline = time.monotonic() + 5
+        while len(diffs) == 1 and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        assert diffs[1] == {"optimizer": ("adam", "sgd")}
+        assert hcfg("lr") == 0.5
+
+    test()
+
+
+def test_cfg_context(base_cfg_dir: Path, simple_run_file: Path, complex_run_file: Path) -> None:
+    barrier = threading.Barrier(2)
+    names: Dict[str, Any] = {}
+
+    def run(run_file: Path) -> None:
+        @hmain(base_cfg_dir, run_cfg_file=run_file, create_out_dir=False, parse_cmd_line=False)
+        def test() -> None:
+            barrier.wait()
+            set_cfg("thread", run_file.stem)
+            barrier.wait()
+
+            async def read() -> Tuple[str, str]:
+                return hcfg("thread"), get_run_name()
+
+            async def main() -> List[Tuple[str, str]]:
+                tasks = [asyncio.create_task(read()) for _ in range(3)]
+                return list(await asyncio.gather(*tasks))
+
+            names[run_file.stem] = asyncio.run(main())
+
+        test()
+
+    threads = [threading.Thread(target=run, args=(f,)) for f in [simple_run_file, complex_run_file]]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert names["complex"] == [("complex", "test")] * 3
+    assert len(set(names["simple"])) == 1
+    assert names["simple"][0][0] == "simple"
+    assert names["simple"][0][1] != "test"
+    assert hcfg("thread") in ("simple", "complex")
+
+
+def test_cfg_context_fallback(base_cfg_dir: Path, simple_run_file: Path) -> None:
+    values: List[Any] = []
+
+    @hmain(base_cfg_dir, run_cfg_file=simple_run_file, create_out_dir=False, parse_cmd_line=False)
+    def test() -> int:
+        set_cfg("x", 3)
+
+        def read() -> None:
+            values.append(hcfg("x"))
+            values.append(get_cfg_copy()["x"])
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join()
+        return hcfg("x")
+
+    assert test() == 3
+    assert values == [3, 3]
+    assert hcfg("x") == 3
+    assert get_run_name() == hcfg("run_name")
+
+
+def test_cfg_context_ambiguous(
+    base_cfg_dir: Path, simple_run_file: Path, complex_run_file: Path
+) -> None:
+    started = threading.Barrier(2)
+    done = threading.Barrier(2)
+    errors: List[Exception] = []
+
+    def read() -> None:
+        try:
+            hcfg("run_name")
+        except ValueError as e:
+            errors.append(e)
+
+    def run(run_file: Path) -> None:
+        @hmain(base_cfg_dir, run_cfg_file=run_file, create_out_dir=False, parse_cmd_line=False)
+        def test() -> None:
+            started.wait()
+            if run_file == simple_run_file:
+                thread = threading.Thread(target=read)
+                thread.start()
+                thread.join()
+            done.wait()
+
+        test()
+
+    threads = [threading.Thread(target=run, args=(f,)) for f in [simple_run_file, complex_run_file]]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(errors) == 1
+    assert "copy_context().run" in str(errors[0])
+
+
+def test_hmain_async(
+    tmp_path: Path, base_cfg_dir: Path, simple_run_file: Path, complex_run_file: Path
+) -> None:
+    io_threads: List[threading.Thread] = []
+    save_cfg = ConfigHandler.save_cfg
+
+    def spy_save_cfg(cfg: Any, cfg_file: Path, **kwargs: Any) -> None:
+        io_threads.append(threading.current_thread())
+        save_cfg(cfg, cfg_file, **kwargs)
+
+    async def read(key: str) -> Any:
+        await asyncio.sleep(0)
+        return hcfg(key)
+
+    @hmain(
+        base_cfg_dir,
+        run_cfg_file=complex_run_file,
+        out_dir_root=str(tmp_path),
+        parse_cmd_line=False,
+    )
+    async def complex_run(x: int) -> Tuple[int, List[Any], Path]:
+        values = await asyncio.gather(read("dataset.name"), asyncio.create_task(read("run_name")))
+        return x, values, get_out_dir()
+
+    @hmain(base_cfg_dir, run_cfg_file=simple_run_file, create_out_dir=False, parse_cmd_line=False)
+    async def simple_run() -> Any:
+        return await read("group_3.param_e.param_g")
+
+    async def main() -> List[Any]:
+        return list(await asyncio.gather(complex_run(1), simple_run()))
+
+    ConfigHandler.save_cfg = spy_save_cfg  # type: ignore
+    try:
+        complex_result, simple_result = asyncio.run(main())
+    finally:
+        ConfigHandler.save_cfg = save_cfg  # type: ignore
+
+    x, values, out_dir = complex_result
+    assert (x, values) == (1, ["cifar10", "test"])
+    assert out_dir == tmp_path / "test"
+    assert (out_dir / "run.yaml").exists()
+    assert simple_result == 2
+    assert len(io_threads) == 1
+    assert io_threads[0] is not threading.main_thread()
+
+
+def test_hmain_async_template(base_cfg_dir: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    setup_threads: List[threading.Thread] = []
+
+    def get_cfg(*args: Any) -> Dict[str, Any]:
+        setup_threads.append(threading.current_thread())
+        return {"run_name": "tui"}
+
+    monkeypatch.setattr(hcore, "_get_cfg", get_cfg)
+
+    @hmain(
+        base_cfg_dir,
+        template_cfg_file=base_cfg_dir.parent / "templates" / "simple.yaml",
+        create_out_dir=False,
+        parse_cmd_line=False,
+    )
+    async def test() -> str:
+        return get_run_name()
+
+    assert asyncio.run(test()) == "tui"
+    assert setup_threads == [threading.main_thread()]
+
+
+def test_hmain_async_old_python(
+    base_cfg_dir: Path, simple_run_file: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(sys, "version_info", (3, 6, 15, "final", 0))
+    decorator = hmain(base_cfg_dir, run_cfg_file=simple_run_file, parse_cmd_line=False)
+
+    async def test() -> None:
+        pass
+
+    with pytest.raises(TypeError):
+        decorator(test)
+
+
+def test_hmain_stats(tmp_path: Path, base_cfg_dir: Path, complex_run_file: Path) -> None:
+    sys.argv = ["test", "--lr=1e-10"]
+    all_stats: List[RunStats] = []
+
+    @hmain(
+        base_cfg_dir,
+        run_cfg_file=complex_run_file,
+        out_dir_root=str(tmp_path),
+        on_stats=all_stats.append,
+        save_stats=True,
+    )
+    def test() -> None:
+        assert get_stats() is None
+
+    test()
+
+    (stats,) = all_stats
+    expected_phases = {"setup", "load_cfg", "parse_files", "parse_args"}
+    expected_phases.update({"create_out_dir", "save_run_file"})
+    assert set(stats.timings) == expected_phases
+    assert stats.timings["setup"] >= stats.timings["load_cfg"] >= stats.timings["parse_files"]
+    assert stats.counters["files_parsed"] > 1
+    assert stats.counters["bytes_read"] > complex_run_file.stat().st_size
+    assert stats.counters["bases_resolved"] > 0
+    assert stats.counters["resolution_steps"] >= stats.counters["bases_resolved"]
+    assert json.loads((tmp_path / "test" / "stats.json").read_text()) == stats.to_dict()
+
+    @hmain(
+        base_cfg_dir,
+        run_cfg_file=complex_run_file,
+        create_out_dir=False,
+        parse_cmd_line=False,
+        num_workers=4,
+        on_stats=all_stats.append,
+    )
+    def test_parallel() -> None:
+        pass
+
+    test_parallel()
+    assert all_stats[1].counters == stats.counters
+
+
+def test_hmain_no_stats(base_cfg_dir: Path, simple_run_file: Path) -> None:
+    seen_stats: List[Any] = []
+    load_cfg_file = ConfigHandler.load_cfg_file
+
+    def spy_load_cfg_file(cfg_file: Path) -> Any:
+        seen_stats.append(get_stats())
+        return load_cfg_file(cfg_file)
+
+    @hmain(base_cfg_dir, run_cfg_file=simple_run_file, create_out_dir=False, parse_cmd_line=False)
+    def test() -> None:
+        pass
+
+    ConfigHandler.load_cfg_file = spy_load_cfg_file  # type: ignore
+    try:
+        test()
+    finally:
+        ConfigHandler.load_cfg_file = load_cfg_file  # type: ignore
+
+    assert len(seen_stats) > 0
+    assert all(s is None for s in seen_stats)
+
+
+def test_hmain_background_run_file(
+    tmp_path: Path, base_cfg_dir: Path, complex_run_file: Path
+) -> None:
+    @hmain(
+        base_cfg_dir,
+        run_cfg_file=complex_run_file,
+        out_dir_root=str(tmp_path),
+        parse_cmd_line=False,
+        background_run_file=True,
+        fsync_run_file=True,
+    )
+    def test() -> Path:
+        set_cfg("lr", 1.0)
+        return get_out_dir()
+
+    out_dir = test()
+
+    assert wait_for_writes()
+    cfg = ConfigHandler.load_cfg_file(out_dir / "run.yaml")
+    assert cfg["dataset"]["name"] == "cifar10"
+    assert cfg["lr"] == 5e-3
+    assert [p.name for p in out_dir.iterdir()] == ["run.yaml"]
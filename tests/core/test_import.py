@@ -0,0 +1,51 @@
+import importlib
+import subprocess
+import sys
+
+import pytest
+
+import hesiod
+
+try:
+    from importlib import metadata
+except ImportError:  # python < 3.8
+    import importlib_metadata as metadata  # type: ignore
+
+SCRIPT = """
+import sys
+
+import hesiod
+
+modules = {modules}
+print(",".join(m for m in modules if m in sys.modules))
+"""
+
+
+def test_lazy_imports() -> None:
+    modules = [
+        "asciimatics",
+        "hesiod.ui",
+        "typeguard",
+        "pkg_resources",
+        "sqlite3",
+        "ctypes",
+        "dataclasses",
+    ]
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT.format(modules=modules)],
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout
+    assert output.strip() == ""
+
+
+def test_version(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(metadata, "version", lambda name: "1.2.3")
+    try:
+        importlib.reload(hesiod)
+        assert hesiod.__version__ == "1.2.3"
+    finally:
+        monkeypatch.undo()
+        vars(hesiod).pop("__version__", None)
+        importlib.reload(hesiod)
@@ -0,0 +1,112 @@
+import asyncio
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Tuple
+
+import pytest
+
+from hesiod import RunResult, get_out_dir, get_run_name, get_typed_cfg, hcfg, hmain, launch
+from hesiod.cfg.cfghandler import ConfigHandler
+from hesiod.cfg.sweep import Sweep
+
+
+@hmain("tests/configs/bases", create_out_dir=False, parse_cmd_line=False)
+def square(offset: int = 0) -> Tuple[int, str, int]:
+    x = hcfg("x", int)
+    if x < 0:
+        raise ValueError("negative x")
+    return x * x + offset, get_run_name(), os.getpid()
+
+
+@hmain("tests/configs/bases", out_dir_root="tests_launcher_logs", parse_cmd_line=False)
+def write_out_dir() -> str:
+    return str(get_out_dir())
+
+
+@dataclass
+class XSchema:
+    x: int
+
+
+@hmain(
+    "tests/configs/bases",
+    out_dir_root="tests_launcher_logs",
+    parse_cmd_line=False,
+    schema=XSchema,
+    save_stats=True,
+)
+def typed_x() -> int:
+    return get_typed_cfg(XSchema).x
+
+
+@hmain("tests/configs/bases", create_out_dir=False, parse_cmd_line=False)
+async def async_square() -> int:
+    await asyncio.sleep(0)
+    return hcfg("x", int) ** 2
+
+
+def test_launch() -> None:
+    results: List[RunResult] = []
+    cfgs = [{"x": 1}, {"x": -1}, {"x": 3, "run_name": "three"}]
+
+    outcomes = launch(square, iter(cfgs), num_workers=2, on_result=results.append, offset=10)
+
+    assert [r.cfg_index for r in outcomes] == [0, 1, 2]
+    assert sorted(r.cfg_index for r in results) == [0, 1, 2]
+
+    assert outcomes[0].ok
+    assert outcomes[0].result[:2] == (11, outcomes[0].run_name)
+    assert outcomes[0].run_name != ""
+    assert outcomes[0].worker_pid == outcomes[0].result[2] != os.getpid()
+    assert outcomes[0].duration >= 0
+
+    assert not outcomes[1].ok
+    assert outcomes[1].result is None
+    assert "ValueError: negative x" in outcomes[1].error  # type: ignore
+
+    assert outcomes[2].result[:2] == (19, "three")
+    assert outcomes[2].run_name == "three"
+    assert outcomes[2].out_dir is None
+
+
+def test_launch_sweep(tmp_path: Path, monkeypatch: Any) -> None:
+    monkeypatch.chdir(tmp_path)
+    sweep = Sweep({"lr": "@GRID(0.1;0.01)"}, {})
+
+    outcomes = launch(write_out_dir, sweep, num_workers=2)
+    outcomes += launch(write_out_dir, [{"lr": 1.0}, {"lr": 1.0, "run_name": "given"}])
+
+    assert len(set(r.run_name for r in outcomes)) == 4
+    assert outcomes[-1].run_name == "given"
+    for r in outcomes:
+        assert r.ok
+        assert r.out_dir == r.result == str(tmp_path / "tests_launcher_logs" / r.run_name)
+        run_cfg = ConfigHandler.load_cfg_file(Path(r.result) / "run.yaml")
+        assert run_cfg["lr"] in (0.1, 0.01, 1.0)
+
+    outcomes = launch(write_out_dir, [{"run_name": "given"}])
+    assert not outcomes[0].ok
+    assert "FileExistsError" in outcomes[0].error  # type: ignore
+
+
+def test_launch_setup(tmp_path: Path, monkeypatch: Any) -> None:
+    monkeypatch.chdir(tmp_path)
+
+    outcomes = launch(typed_x, [{"x": 2}, {"x": "two"}], num_workers=2)
+
+    assert outcomes[0].result == 2
+    assert (Path(outcomes[0].out_dir) / "stats.json").is_file()  # type: ignore
+    assert "does not match XSchema" in outcomes[1].error  # type: ignore
+    assert outcomes[1].out_dir is None
+
+
+def test_launch_async() -> None:
+    outcomes = launch(async_square, [{"x": 2}, {"x": 3}], num_workers=2)
+
+    assert [r.result for r in outcomes] == [4, 9]
+
+
+def test_launch_not_decorated() -> None:
+    with pytest.raises(ValueError):
+        launch(print, [{}])
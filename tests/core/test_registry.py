@@ -0,0 +1,93 @@
+from pathlib import Path
+
+import pytest
+
+from hesiod import RunRegistry, hcfg, hmain
+from hesiod.cfg.cfghandler import ConfigHandler
+from hesiod.cli import main
+
+
+def _make_registry(tmp_path: Path) -> RunRegistry:
+    registry = RunRegistry(tmp_path / "logs")
+    registry.register("r1", {"net": {"name": "resnet18"}, "params": {"lr": 0.1, "wd": 0}})
+    registry.register("r2", {"net": {"name": "resnet18"}, "params": {"lr": 0.001}})
+    registry.register("r3", {"net": {"name": "vgg"}, "params": {"lr": 0.005, "wd": 1e-4}})
+    registry.register("r4", {"net": {"name": "resnet18", "layers": [1, 2]}, "ok": True})
+    return registry
+
+
+def test_find(tmp_path: Path) -> None:
+    registry = _make_registry(tmp_path)
+
+    assert registry.find() == ["r1", "r2", "r3", "r4"]
+    assert registry.find("net.name == resnet18") == ["r1", "r2", "r4"]
+    assert registry.find("net.name == resnet18 and params.lr < 0.01") == ["r2"]
+    assert registry.find("net.name == 'vgg' or params.lr >= 0.1") == ["r1", "r3"]
+    assert registry.find("params.lr < 0.01 and not (params.wd == 0)") == ["r2", "r3"]
+    assert registry.find("params.wd != 0") == ["r3"]
+    assert registry.find("ok == True") == ["r4"]
+    assert registry.find("net.layers == [1,2]") == ["r4"]
+    assert registry.find("missing.key > 0") == []
+
+    for query in ["net.name ==", "net.name resnet18", "(net.name == vgg", "a == 1 b == 2"]:
+        with pytest.raises(ValueError):
+            registry.find(query)
+
+
+def test_register_update(tmp_path: Path) -> None:
+    registry = _make_registry(tmp_path)
+
+    registry.register("r1", {"net": {"name": "vgg"}})
+    assert registry.find("net.name == vgg") == ["r3", "r1"]
+    assert registry.get_values("r1", ["net.name", "params.lr"]) == {"net.name": "vgg"}
+
+
+def test_journal_mode(tmp_path: Path) -> None:
+    registry = _make_registry(tmp_path)
+
+    conn = registry.connect()
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone() == ("delete",)
+    finally:
+        conn.close()
+    assert not (tmp_path / "logs" / "hesiod_runs.db-wal").exists()
+
+
+def test_sync(tmp_path: Path) -> None:
+    registry = _make_registry(tmp_path)
+    run_dir = tmp_path / "logs" / "r5"
+    run_dir.mkdir()
+    ConfigHandler.save_cfg({"net": {"name": "vgg"}}, run_dir / "run.yaml")
+    (tmp_path / "logs" / "no_run_file").mkdir()
+
+    assert registry.sync() == 1
+    assert registry.find("net.name == vgg") == ["r5"]
+    assert registry.find() == ["r5"]
+    assert registry.sync() == 0
+
+
+def test_hmain_run_registry(tmp_path: Path, base_cfg_dir: Path, complex_run_file: Path) -> None:
+    out_dir_root = tmp_path / "logs"
+
+    @hmain(
+        base_cfg_dir,
+        run_cfg_file=complex_run_file,
+        out_dir_root=str(out_dir_root),
+        parse_cmd_line=False,
+        run_registry=True,
+    )
+    def test() -> None:
+        assert hcfg("dataset.name") == "cifar10"
+
+    test()
+
+    registry = RunRegistry(out_dir_root)
+    assert registry.find("dataset.name == cifar10 and net.use_skip == True") == ["test"]
+    assert registry.find("dataset.name == cifar100") == []
+
+
+def test_cli_runs(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    _make_registry(tmp_path)
+
+    main(["runs", "net.name == resnet18", "-r", str(tmp_path / "logs"), "-s", "params.lr"])
+    assert capsys.readouterr().out.splitlines() == ["r1 params.lr=0.1", "r2 params.lr=0.001", "r4 "]
@@ -0,0 +1,126 @@
+import threading
+from pathlib import Path
+from typing import List
+
+import pytest
+
+import hesiod.core as hcore
+import hesiod.runname as hrunname
+from hesiod import get_out_dir, get_run_name, hmain
+from hesiod.cfg.cfghandler import ConfigHandler
+from hesiod.runname import (
+    RUN_NAME_STRATEGY_DATE,
+    RUN_NAME_STRATEGY_HASH,
+    RUN_NAME_STRATEGY_ULID,
+    ULID_ALPHABET,
+    claim_run_dir,
+    get_default_run_name,
+    new_ulid,
+)
+
+
+def test_ulid() -> None:
+    ulids = [new_ulid() for _ in range(1000)]
+
+    assert all(len(u) == 26 and set(u) <= set(ULID_ALPHABET) for u in ulids)
+    assert len(set(ulids)) == len(ulids)
+    assert sorted(ulids) == ulids
+
+
+def test_hash_run_name() -> None:
+    name1 = get_default_run_name(RUN_NAME_STRATEGY_HASH, {"a": 1, "b": {"c": [1, 2]}})
+    name2 = get_default_run_name(RUN_NAME_STRATEGY_HASH, {"b": {"c": [1, 2]}, "a": 1})
+    name3 = get_default_run_name(RUN_NAME_STRATEGY_HASH, {"a": 2, "b": {"c": [1, 2]}})
+    name4 = get_default_run_name(
+        RUN_NAME_STRATEGY_HASH, {"a": 1, "b": {"c": [1, 2]}, "run_name": "x"}
+    )
+
+    assert name1.split("-")[0] == name2.split("-")[0] == name4.split("-")[0]
+    assert name1.split("-")[0] != name3.split("-")[0]
+    assert name1 != name2
+    assert get_default_run_name("unknown") == ""
+
+
+def test_claim_run_dir(tmp_path: Path) -> None:
+    name = "2020-01-01-00-00-00"
+    claimed = [claim_run_dir(tmp_path, name, RUN_NAME_STRATEGY_DATE)[0] for _ in range(3)]
+    assert claimed == [name, f"{name}_1", f"{name}_2"]
+
+    (tmp_path / f"{name}_9").mkdir()
+    run_name, run_dir = claim_run_dir(tmp_path, name, RUN_NAME_STRATEGY_DATE)
+    assert run_name == f"{name}_10"
+    assert run_dir == tmp_path / run_name and run_dir.is_dir()
+
+    with pytest.raises(FileExistsError):
+        claim_run_dir(tmp_path, name)
+
+    ulid = new_ulid()
+    assert claim_run_dir(tmp_path, ulid, RUN_NAME_STRATEGY_ULID)[0] == ulid
+    assert claim_run_dir(tmp_path, ulid, RUN_NAME_STRATEGY_ULID)[0] > ulid
+
+    hash_name = get_default_run_name(RUN_NAME_STRATEGY_HASH, {"a": 1})
+    claim_run_dir(tmp_path, hash_name, RUN_NAME_STRATEGY_HASH, {"a": 1})
+    new_hash_name, _ = claim_run_dir(tmp_path, hash_name, RUN_NAME_STRATEGY_HASH, {"a": 1})
+    assert new_hash_name.split("-")[0] == hash_name.split("-")[0]
+    assert new_hash_name != hash_name
+
+
+def test_claim_run_dir_concurrent(tmp_path: Path) -> None:
+    claimed: List[str] = []
+    barrier = threading.Barrier(32)
+
+    def claim() -> None:
+        barrier.wait()
+        claimed.append(claim_run_dir(tmp_path / "logs", "run", RUN_NAME_STRATEGY_DATE)[0])
+
+    threads = [threading.Thread(target=claim) for _ in range(32)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(claimed)) == 32
+    assert sorted(p.name for p in (tmp_path / "logs").iterdir()) == sorted(claimed)
+
+
+def test_claim_run_dir_rescan(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    for seq in ["", "_1", "_2"]:
+        (tmp_path / f"run{seq}").mkdir()
+    get_last_seq = hrunname._get_last_seq
+    scans: List[int] = []
+
+    def get_last_seq_and_claim(out_dir_root: Path, run_name: str) -> int:
+        last_seq = get_last_seq(out_dir_root, run_name)
+        scans.append(last_seq)
+        if len(scans) == 1:
+            # Other runs claim many names right after the first scan.
+            for seq in range(last_seq + 1, last_seq + 51):
+                (out_dir_root / f"{run_name}_{seq}").mkdir()
+        return last_seq
+
+    monkeypatch.setattr(hrunname, "_get_last_seq", get_last_seq_and_claim)
+    assert claim_run_dir(tmp_path, "run", RUN_NAME_STRATEGY_DATE)[0] == "run_53"
+    assert scans == [2, 52]
+
+
+def test_hmain_run_name_collision(
+    tmp_path: Path,
+    base_cfg_dir: Path,
+    no_run_name_run_file: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(hcore, "get_default_run_name", lambda s, c: "2020-01-01-00-00-00")
+
+    @hmain(
+        base_cfg_dir,
+        run_cfg_file=no_run_name_run_file,
+        out_dir_root=str(tmp_path),
+        parse_cmd_line=False,
+    )
+    def test() -> str:
+        assert get_out_dir().name == get_run_name()
+        return get_run_name()
+
+    assert [test(), test()] == ["2020-01-01-00-00-00", "2020-01-01-00-00-00_1"]
+    run_file = tmp_path / "2020-01-01-00-00-00_1" / "run.yaml"
+    assert ConfigHandler.load_cfg_file(run_file)["run_name"] == "2020-01-01-00-00-00_1"